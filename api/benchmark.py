@@ -0,0 +1,209 @@
+import argparse
+import json
+import pickle
+import random
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+# Добавляем родительскую директорию в путь Python
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+sys.path.append(str(parent_dir))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from api.main import MatrixRequest, app
+from api.transport import NPY_MEDIA_TYPE, encode_npy, json_dumps, orjson, parse_json_fields
+from backend import benchmark as core_benchmark
+from backend.matrix_core import Matrix
+
+
+def random_matrix(rows: int, cols: int, seed: int = 0) -> list[list]:
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(cols)] for _ in range(rows)]
+
+
+def time_call(func, *args, repeat: int = 3) -> float:
+    # Минимальное время из нескольких запусков, секунды
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def pydantic_parse(raw: bytes):
+    # Прежний путь: pydantic создает и проверяет float для каждого элемента
+    return MatrixRequest.model_validate_json(raw)
+
+
+def pydantic_serialize(result: list[list]) -> bytes:
+    # Прежний путь ответа FastAPI: jsonable_encoder, затем json.dumps
+    return json.dumps(jsonable_encoder({"result": result}), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode()
+
+
+def fast_parse(raw: bytes):
+    return parse_json_fields(raw, ("matrix",))
+
+
+def fast_serialize(result: list[list]) -> bytes:
+    return json_dumps({"result": result})
+
+
+def process_handoff(value) -> None:
+    # Передача входных данных в пул процессов и обратно
+    pickle.loads(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def benchmark_json(sizes=(100, 300, 500, 1000), repeat: int = 3) -> list[dict]:
+    results = []
+    for n in sizes:
+        matrix = random_matrix(n, n, seed=n)
+        raw = json.dumps({"matrix": matrix}).encode()
+        validated = pydantic_parse(raw).matrix
+        fields, _ = fast_parse(raw)
+        results.append({
+            "size": n,
+            "parse_pydantic_seconds": time_call(pydantic_parse, raw, repeat=repeat),
+            "parse_fast_seconds": time_call(fast_parse, raw, repeat=repeat),
+            "handoff_pydantic_seconds": time_call(process_handoff, validated, repeat=repeat),
+            "handoff_fast_seconds": time_call(process_handoff, fields["matrix"], repeat=repeat),
+            "serialize_pydantic_seconds": time_call(pydantic_serialize, matrix, repeat=repeat),
+            "serialize_fast_seconds": time_call(fast_serialize, matrix, repeat=repeat),
+        })
+    return results
+
+
+def print_json_report(results: list[dict]) -> None:
+    print(f"JSON parser: {'orjson' if orjson is not None else 'json'}")
+    print(f"{'n':>6} {'stage':>10} {'pydantic, s':>12} {'fast, s':>10} {'speedup':>8}")
+    for item in results:
+        for stage in ("parse", "handoff", "serialize"):
+            before, after = item[f"{stage}_pydantic_seconds"], item[f"{stage}_fast_seconds"]
+            print(f"{item['size']:>6} {stage:>10} {before:>12.4f} {after:>10.4f} {before / after:>7.1f}x")
+
+
+def _sparse_payload(matrix) -> dict:
+    return {"rows": matrix.rows, "cols": matrix.cols, "entries": matrix.to_coo()}
+
+
+def _matrix_body(make, n):
+    return {"matrix": make(n, n, 1)}
+
+
+def _two_matrices_body(make, n):
+    return {"matrix_a": make(n, n, 1), "matrix_b": make(n, n, 2)}
+
+
+def _system_body(make, n):
+    return {"coefficients": make(n, n, 1), "constants": core_benchmark.random_vector(n, 2)}
+
+
+def _sparse_matrix_body(make, n):
+    return {"matrix": _sparse_payload(make(n, n, 1))}
+
+
+def _sparse_two_matrices_body(make, n):
+    return {"matrix_a": _sparse_payload(make(n, n, 1)), "matrix_b": _sparse_payload(make(n, n, 2))}
+
+
+def _sparse_system_body(make, n):
+    return {"coefficients": _sparse_payload(make(n, n, 1)), "constants": core_benchmark.random_vector(n, 2),
+            "method": "gmres", "preconditioner": "ilu0"}
+
+
+DENSE_KINDS = ("dense", "integer", "structured")
+SPARSE_KINDS = ("sparse",)
+
+# Эндпоинты: имя -> (путь, построение тела запроса по виду данных и размеру, допустимые виды данных)
+ENDPOINTS = {
+    "determinant": ("/determinant", _matrix_body, DENSE_KINDS),
+    "add": ("/add", _two_matrices_body, DENSE_KINDS),
+    "multiply": ("/multiply", _two_matrices_body, DENSE_KINDS),
+    "inverse": ("/inverse", _matrix_body, DENSE_KINDS),
+    "solve": ("/solve", _system_body, DENSE_KINDS),
+    "transpose": ("/transpose", _matrix_body, DENSE_KINDS),
+    "rank": ("/rank", _matrix_body, DENSE_KINDS),
+    "sparse/add": ("/sparse/add", _sparse_two_matrices_body, SPARSE_KINDS),
+    "sparse/multiply": ("/sparse/multiply", _sparse_two_matrices_body, SPARSE_KINDS),
+    "sparse/transpose": ("/sparse/transpose", _sparse_matrix_body, SPARSE_KINDS),
+    "sparse/solve": ("/sparse/solve", _sparse_system_body, SPARSE_KINDS),
+}
+
+
+def encode_request(body: dict, transport: str) -> tuple[bytes, dict, dict]:
+    # Тело, заголовки и параметры строки запроса в выбранном формате.
+    # Кэш результатов отключается, чтобы замерялось само вычисление
+    headers = {"X-Matrix-Cache": "bypass"}
+    if transport == "json":
+        headers["Content-Type"] = "application/json"
+        return json.dumps(body).encode(), headers, {}
+
+    headers["Content-Type"] = headers["Accept"] = NPY_MEDIA_TYPE
+    parts, params = [], {}
+    for name, value in body.items():
+        if isinstance(value, list) and value and isinstance(value[0], list):
+            parts.append(encode_npy(Matrix.from_list(value)))
+        elif isinstance(value, list):
+            parts.append(encode_npy(Matrix(1, len(value), value), vector=True))
+        else:
+            params[name] = value
+    return b"".join(parts), headers, params
+
+
+def benchmark_endpoints(endpoints=None, kinds=None, sizes=(10, 50, 100, 200), repeat: int = 5,
+                        transport: str = "json", memory: bool = True, progress=None) -> list[dict]:
+    # Полный путь запроса через ASGI-приложение в том же процессе: разбор тела,
+    # планировщик, вычисление и сериализация ответа. Тяжелые задачи планировщик
+    # считает в дочерних процессах, их память в peak_bytes не входит
+    results = []
+    with TestClient(app) as client:
+        for name in endpoints or ENDPOINTS:
+            path, build, allowed = ENDPOINTS[name]
+            if transport != "json" and allowed is SPARSE_KINDS:
+                continue
+            for kind in kinds or core_benchmark.ALL_KINDS:
+                if kind not in allowed:
+                    continue
+                for n in sizes:
+                    item = {"endpoint": name, "kind": kind, "size": n, "transport": transport}
+                    content, headers, params = encode_request(build(core_benchmark.INPUTS[kind], n), transport)
+                    post = partial(client.post, path, content=content, headers=headers, params=params)
+                    response = post()
+                    if response.status_code != 200 or response.headers["content-type"] == "application/json" \
+                            and "error" in response.json():
+                        item["error"] = f"HTTP {response.status_code}: {response.text[:200]}"
+                    else:
+                        item.update(core_benchmark.measure(post, repeat=repeat, warmup=0, memory=memory))
+                    results.append(item)
+                    if progress is not None:
+                        progress(item)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк API: разбор и сериализация JSON или эндпоинты целиком")
+    core_benchmark.add_suite_arguments(parser, [100, 300, 500, 1000], core_benchmark.ALL_KINDS)
+    parser.add_argument("--endpoints", nargs="*", choices=list(ENDPOINTS), default=None,
+                        help="замерить эндпоинты (без имен - все) вместо разбора и сериализации JSON")
+    parser.add_argument("--transport", choices=["json", "npy"], default="json",
+                        help="формат тела запроса и ответа для --endpoints")
+    args = parser.parse_args(argv)
+
+    if args.endpoints is None:
+        print_json_report(benchmark_json(args.sizes, args.repeat))
+        return 0
+
+    core_benchmark.print_header()
+    results = benchmark_endpoints(args.endpoints or None, args.kinds, args.sizes, args.repeat,
+                                  args.transport, not args.no_memory, progress=core_benchmark.print_result)
+    return core_benchmark.finish_suite(args, results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import time
+from array import array
+from collections import OrderedDict
+from itertools import chain
+
+
+# Настройки кэша результатов (переменные окружения)
+CACHE_MAX_BYTES = int(os.environ.get("MATRIX_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL = float(os.environ.get("MATRIX_CACHE_TTL", "300"))
+
+
+def _update_digest(digest, value) -> None:
+    # Матрица кодируется размерностью и байтами float64, поэтому ключ
+    # вычисляется без сериализации в текст
+    if hasattr(value, "indptr"):
+        digest.update(b"S%d,%d;" % (value.rows, value.cols))
+        digest.update(value.indptr.tobytes())
+        digest.update(value.indices.tobytes())
+        digest.update(value.data.tobytes())
+    elif hasattr(value, "data") and hasattr(value, "rows"):
+        digest.update(b"M%d,%d;" % (value.rows, value.cols))
+        digest.update(value.data.tobytes())
+    elif isinstance(value, list) and value and isinstance(value[0], (list, tuple)):
+        digest.update(b"L%d,%d;" % (len(value), len(value[0])))
+        # Длины строк входят в ключ, чтобы неровные матрицы не совпадали с ровными
+        digest.update(array("q", map(len, value)).tobytes())
+        digest.update(array("d", chain.from_iterable(value)).tobytes())
+    elif isinstance(value, list):
+        digest.update(b"V%d;" % len(value))
+        digest.update(array("d", value).tobytes())
+    elif isinstance(value, array):
+        # Вектор из двоичного запроса
+        digest.update(b"V%d;" % len(value))
+        digest.update(value.tobytes() if value.typecode == "d" else array("d", value).tobytes())
+    else:
+        digest.update(repr(value).encode())
+    digest.update(b"|")
+
+
+def estimate_size(value) -> int:
+    # Приблизительный объем результата в памяти, байты
+    if hasattr(value, "data") and hasattr(value, "rows"):
+        return 64 + value.data.itemsize * len(value.data)
+    if isinstance(value, list):
+        if value and isinstance(value[0], list):
+            return 56 + sum(56 + 32 * len(row) for row in value)
+        return 56 + 32 * len(value)
+    return 64
+
+
+class ResultCache:
+    # LRU-кэш результатов с ограничением по объему и временем жизни записей.
+    # Ключ - хэш имени операции и байтов входных матриц
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, ttl: float = CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl > 0
+
+    @staticmethod
+    def make_key(operation: str, *args) -> bytes:
+        digest = hashlib.blake2b(operation.encode(), digest_size=16)
+        digest.update(b"|")
+        for arg in args:
+            _update_digest(digest, arg)
+        return digest.digest()
+
+    def get(self, key: bytes):
+        # Возвращает (найдено, значение)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        expires_at, size, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, value
+
+    def put(self, key: bytes, value, size: int | None = None) -> None:
+        if size is None:
+            size = estimate_size(value)
+        if not self.enabled or size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self.current_bytes += size
+
+        # Вытесняем давно не использованные записи
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def discard(self, key: bytes) -> bool:
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    def _remove(self, key: bytes) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+        }
@@ -0,0 +1,260 @@
+import asyncio
+import math
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+
+# Настройки слоя выполнения (переменные окружения)
+WORKERS = int(os.environ.get("MATRIX_WORKERS", str(os.cpu_count() or 1)))
+MAX_QUEUED_JOBS = int(os.environ.get("MATRIX_MAX_QUEUED_JOBS", "64"))
+JOB_TIMEOUT = float(os.environ.get("MATRIX_JOB_TIMEOUT", "60"))
+# Начальная оценка скорости одного исполнителя, условных операций в секунду;
+# дальше она уточняется по фактическому времени выполненных задач
+COST_RATE = float(os.environ.get("MATRIX_COST_RATE", "5e7"))
+# Задачи дешевле этой стоимости считаются в потоке: передача в процесс
+# стоит дороже самого вычисления. Для них отдельная очередь, поэтому
+# они никогда не ждут за тяжелыми задачами
+SMALL_JOB_COST = float(os.environ.get("MATRIX_SMALL_JOB_COST", "1e6"))
+# Суммарная стоимость принятых задач; по умолчанию - столько, сколько
+# все исполнители успевают посчитать за время таймаута
+COMPUTE_BUDGET = float(os.environ.get("MATRIX_COMPUTE_BUDGET", str(WORKERS * JOB_TIMEOUT * COST_RATE)))
+# Во сколько раз точные (рациональные) вычисления дороже вычислений с float
+EXACT_COST_FACTOR = 20.0
+
+
+class QueueFullError(Exception):
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BudgetExceededError(QueueFullError):
+    pass
+
+
+class JobTimeoutError(Exception):
+    pass
+
+
+def matrix_size(*args) -> int:
+    # Количество элементов во входных данных (матрицы, векторы, разреженные матрицы)
+    total = 0
+    for arg in args:
+        if hasattr(arg, "nnz"):
+            total += arg.nnz
+        elif hasattr(arg, "rows") and hasattr(arg, "cols"):
+            total += arg.rows * arg.cols
+        elif isinstance(arg, (list, tuple, array)) and arg:
+            # Вектор из быстрого разбора JSON или двоичного запроса - array
+            first = arg[0]
+            total += len(arg) * (len(first) if isinstance(first, (list, tuple)) else 1)
+    return total
+
+
+def _shape(matrix) -> tuple[int, int]:
+    if hasattr(matrix, "rows") and hasattr(matrix, "cols"):
+        return matrix.rows, matrix.cols
+    if isinstance(matrix, (list, tuple, array)) and matrix:
+        first = matrix[0]
+        return len(matrix), len(first) if isinstance(first, (list, tuple)) else 1
+    return 0, 0
+
+
+def estimate_cost(operation: str, *args) -> float:
+    # Оценка объема вычислений (условных операций с плавающей точкой) по форме
+    # входных данных. operation - имя операции, для умножения можно "multiply:strassen",
+    # для точного режима - "<операция>:exact"
+    name, _, method = operation.partition(":")
+    if not args:
+        return 0.0
+    if method == "exact":
+        return EXACT_COST_FACTOR * estimate_cost(name, *args)
+    rows, cols = _shape(args[0])
+    n = max(rows, cols)
+
+    if any(hasattr(arg, "nnz") for arg in args):
+        # Разреженные операции: по числу ненулевых элементов
+        if name == "multiply" and len(args) > 1:
+            other_rows = max(_shape(args[1])[0], 1)
+            return float(args[0].nnz * max(args[1].nnz // other_rows, 1))
+        if name == "solve":
+            return n ** 3 / 3
+        return float(matrix_size(*args))
+
+    if name in ("add", "transpose", "matvec"):
+        return float(rows * cols)
+    if name == "multiply" and len(args) > 1:
+        if method == "strassen":
+            return float(max(n, *_shape(args[1])) ** math.log2(7))
+        return float(rows * cols * _shape(args[1])[1])
+    if name == "determinant":
+        # До 80x80 целочисленные матрицы считаются точно (Барейсс), это дороже LU
+        return 2.0 * n ** 3 if n <= 80 else n ** 3 / 3
+    if name == "inverse":
+        return float(n ** 3)
+    if name == "solve":
+        return n ** 3 / 3 + n * n * max(_shape(args[1])[1], 1)
+    if name == "factorize":
+        return n ** 3 / 3
+    if name == "lu_solve":
+        # Готовое разложение: только прямой и обратный ход
+        return float(n * n * max(_shape(args[1])[1], 1))
+    if name == "rank":
+        return float(rows * cols * min(rows, cols))
+    return float(matrix_size(*args))
+
+
+class _Lane:
+    # Очередь задач одного класса стоимости со своим ограничением на
+    # одновременное выполнение и количество принятых задач
+    def __init__(self, slots: int, max_queued: int):
+        self.slots = asyncio.Semaphore(slots)
+        self.max_queued = max_queued
+        self.pending = 0
+        self.cost = 0.0
+
+
+class ComputeExecutor:
+    # Выполняет синхронные вычисления вне цикла событий. Стоимость каждой
+    # задачи оценивается заранее: дешевые считаются в пуле потоков, дорогие -
+    # в пуле процессов, у каждого класса своя очередь. Дорогие задачи
+    # принимаются в пределах общего вычислительного бюджета, ожидание
+    # результата ограничено таймаутом
+    def __init__(self, workers: int = WORKERS, max_queued: int = MAX_QUEUED_JOBS,
+                 timeout: float = JOB_TIMEOUT, small_cost: float = SMALL_JOB_COST,
+                 budget: float = COMPUTE_BUDGET, rate: float = COST_RATE):
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.small_cost = small_cost
+        self.budget = budget
+        self.rate = rate
+        self.cost_in_flight = 0.0
+        self.rejected = 0
+        self._small = _Lane(self.workers, max_queued)
+        self._large = _Lane(self.workers, max_queued)
+        self._processes = None
+        self._threads = None
+
+    @property
+    def pending(self) -> int:
+        return self._small.pending + self._large.pending
+
+    def _pool(self, use_processes: bool):
+        if not use_processes:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.workers)
+            return self._threads
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.workers)
+        return self._processes
+
+    def retry_after(self, cost: float) -> int:
+        # Через сколько секунд освободится заданный объем вычислений
+        return max(1, math.ceil(cost / (self.rate * self.workers)))
+
+    def _admit(self, lane: _Lane, cost: float, small: bool) -> None:
+        if lane.pending >= lane.max_queued:
+            self.rejected += 1
+            raise QueueFullError("Сервер перегружен: слишком много задач в очереди", self.retry_after(lane.cost))
+        # Задача дороже всего бюджета принимается, только когда сервер свободен
+        if not small and self.cost_in_flight > 0 and self.cost_in_flight + cost > self.budget:
+            self.rejected += 1
+            raise BudgetExceededError("Сервер перегружен: превышен вычислительный бюджет",
+                                      self.retry_after(self.cost_in_flight + cost - self.budget))
+        lane.pending += 1
+        lane.cost += cost
+        self.cost_in_flight += cost
+
+    def _finish(self, lane: _Lane, cost: float) -> None:
+        lane.pending -= 1
+        lane.cost -= cost
+        self.cost_in_flight -= cost
+
+    def _release(self, lane: _Lane, cost: float, started: float, future) -> None:
+        lane.slots.release()
+        self._finish(lane, cost)
+        # Результат задачи, брошенной по таймауту, никто не заберет
+        if future.cancelled() or future.exception() is not None:
+            return
+        # Скорость уточняется по заметным по времени задачам
+        elapsed = time.monotonic() - started
+        if elapsed > 0.05 and cost > 0:
+            self.rate = 0.8 * self.rate + 0.2 * cost / elapsed
+
+    async def run(self, func, *args, size: int | None = None, cost: float | None = None,
+                  use_processes: bool | None = None, timings: dict | None = None,
+                  timeout: float | None = None, on_start=None):
+        # timings - словарь, в который записываются очередь задачи ("lane"),
+        # ожидание исполнителя ("queue") и время вычисления ("compute"), секунды.
+        # timeout - свой предел ожидания вместо общего, on_start() вызывается,
+        # когда задача получила исполнителя
+        if timeout is None:
+            timeout = self.timeout
+        if cost is None:
+            cost = float(matrix_size(*args) if size is None else size)
+        small = cost < self.small_cost
+        lane = self._small if small else self._large
+        self._admit(lane, cost, small)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(lane.slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self._finish(lane, cost)
+            raise JobTimeoutError(f"Превышено время ожидания в очереди ({timeout:g} с)") from None
+        except BaseException:
+            self._finish(lane, cost)
+            raise
+
+        if timings is not None:
+            timings["lane"] = "small" if small else "large"
+            timings["queue"] = timings.get("queue", 0.0) + time.perf_counter() - started
+            started = time.perf_counter()
+
+        try:
+            if on_start is not None:
+                on_start()
+            if use_processes is None:
+                use_processes = not small
+            future = loop.run_in_executor(self._pool(use_processes), func, *args)
+        except BaseException:
+            # Задача не передана в пул (например, пул остановлен): место освобождается сразу
+            lane.slots.release()
+            self._finish(lane, cost)
+            raise
+
+        # Задача занимает место в очереди и бюджете, пока действительно выполняется,
+        # даже если клиент перестал ждать ее результат по таймауту
+        future.add_done_callback(partial(self._release, lane, cost, time.monotonic()))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            raise JobTimeoutError(f"Превышено время вычисления ({timeout:g} с)") from None
+        finally:
+            if timings is not None:
+                timings["compute"] = timings.get("compute", 0.0) + time.perf_counter() - started
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "small_pending": self._small.pending,
+            "large_pending": self._large.pending,
+            "cost_in_flight": self.cost_in_flight,
+            "budget": self.budget,
+            "rate": self.rate,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
@@ -0,0 +1,150 @@
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+from api.cache import estimate_size
+from api.executor import QueueFullError
+
+
+# Настройки асинхронных задач (переменные окружения)
+MAX_JOBS = int(os.environ.get("MATRIX_MAX_JOBS", "1000"))
+JOB_MAX_BYTES = int(os.environ.get("MATRIX_JOB_MAX_BYTES", str(256 * 1024 * 1024)))
+# Время хранения завершенной задачи и ее результата, секунды
+JOB_TTL = float(os.environ.get("MATRIX_JOB_TTL", "3600"))
+# Ограничение времени вычисления асинхронной задачи: клиент не держит соединение
+# открытым, поэтому оно больше таймаута обычного запроса
+ASYNC_JOB_TIMEOUT = float(os.environ.get("MATRIX_ASYNC_JOB_TIMEOUT", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    __slots__ = ("id", "operation", "status", "created_at", "started_at", "finished_at",
+                 "reported", "result", "error", "size", "task", "listener")
+
+    def __init__(self, operation: str):
+        self.id = secrets.token_hex(16)
+        self.operation = operation
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.reported = 0.0
+        self.result = None
+        self.error = None
+        self.size = 0
+        self.task = None
+        self.listener = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    @property
+    def progress(self) -> float:
+        # Доля выполненной работы по отчетам алгоритма (progress_listener); операции
+        # без отчетов остаются на 0.0 до завершения. 1.0 - только после завершения
+        if self.status == DONE:
+            return 1.0
+        return min(0.99, self.reported)
+
+    def summary(self) -> dict:
+        summary = {
+            "id": self.id,
+            "operation": self.operation,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            summary["error"] = self.error
+        return summary
+
+
+class JobStore:
+    # Асинхронные задачи в памяти процесса: ограничение по количеству задач
+    # и объему хранимых результатов. Завершенные задачи удаляются через ttl секунд
+    # после завершения или раньше, если нужно место для новых (сначала самые старые).
+    # Незавершенные задачи не вытесняются: если места нет, новая задача не принимается
+    def __init__(self, max_jobs: int = MAX_JOBS, max_bytes: int = JOB_MAX_BYTES, ttl: float = JOB_TTL):
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self._jobs = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def create(self, operation: str) -> Job:
+        self._expire()
+        if len(self._jobs) >= self.max_jobs and not self._evict_finished():
+            raise QueueFullError("Сервер перегружен: слишком много асинхронных задач", 5)
+        job = Job(operation)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def start(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+
+    def finish(self, job: Job, status: str, result=None, error: str | None = None) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.task = None
+        job.listener = None
+        if status != DONE:
+            job.error = error
+            return
+        size = estimate_size(result)
+        if size > self.max_bytes:
+            job.status = FAILED
+            job.error = "Результат слишком большой для хранения, используйте синхронный запрос"
+            return
+        job.result = result
+        job.size = size
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes and self._evict_finished(keep=job):
+            pass
+
+    def discard(self, job_id: str) -> bool:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        self.current_bytes -= job.size
+        return True
+
+    def _evict_finished(self, keep: Job | None = None) -> bool:
+        # Удаляет самую старую завершенную задачу
+        for job_id, job in self._jobs.items():
+            if job.finished and job is not keep:
+                self.discard(job_id)
+                return True
+        return False
+
+    def _expire(self) -> None:
+        deadline = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < deadline]
+        for job_id in expired:
+            self.discard(job_id)
+
+    def stats(self) -> dict:
+        self._expire()
+        counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return {"jobs": len(self._jobs), "bytes": self.current_bytes, "max_jobs": self.max_jobs,
+                "max_bytes": self.max_bytes, "ttl": self.ttl, **counts}
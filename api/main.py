@@ -1,7 +1,15 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+import asyncio
+import contextvars
+import os
+import secrets
 import sys
+from contextlib import asynccontextmanager
+from fractions import Fraction
+from functools import partial
 from pathlib import Path
 
 # Добавляем родительскую директорию в путь Python
@@ -15,8 +23,23 @@ try:
         matrix_multiply,
         determinant_optimized as determinant,
         inverse,
-        solve_system_gaussian
+        solve_system_gaussian,
+        transpose,
+        rank,
+        lu_factorize,
+        solve_iterative,
+        traced_call,
+        shutdown_parallel_pool,
+        ComputationCancelled,
+        EngineUnavailableError,
+        ITERATIVE_MAX_ITER,
+        Matrix
     )
+    from backend.out_of_core import FILE_OPERATIONS, open_file_matrix, run_file_operation
+    from api.progress import JobProgress, ProgressRelay
+    if os.environ.get("MATRIX_CLUSTER"):
+        # Регистрирует движок "distributed" (MATRIX_ENGINE=distributed)
+        import backend.distributed
 except ImportError as e:
     print(f"Import error: {e}")
     print("Make sure backend/matrix_core.py exists and has the required functions")
@@ -27,7 +50,7 @@ except ImportError as e:
         raise ValueError("Backend module not available")
 
 
-    def matrix_multiply(a, b):
+    def matrix_multiply(a, b, **kwargs):
         raise ValueError("Backend module not available")
 
 
@@ -43,8 +66,130 @@ except ImportError as e:
         raise ValueError("Backend module not available")
 
 
+    def transpose(matrix):
+        raise ValueError("Backend module not available")
+
+
+    def rank(matrix):
+        raise ValueError("Backend module not available")
+
+
+    def lu_factorize(coefficients):
+        raise ValueError("Backend module not available")
+
+
+    def solve_iterative(coefficients, constants, **kwargs):
+        raise ValueError("Backend module not available")
+
+
+    def traced_call(func, *args, **kwargs):
+        return func(*args, **kwargs), {}
+
+
+    def shutdown_parallel_pool():
+        pass
+
+
+    class ComputationCancelled(Exception):
+        pass
+
+
+    class EngineUnavailableError(RuntimeError):
+        pass
+
+
+    class ProgressRelay:
+        def __init__(self, loop, interval=None):
+            self.queue = asyncio.Queue()
+
+        def cancel(self):
+            pass
+
+        def run(self, func, *args):
+            raise ValueError("Backend module not available")
+
+
+    class JobProgress(ProgressRelay):
+        def __init__(self, job):
+            pass
+
+
+    ITERATIVE_MAX_ITER = 1000
+
+
+    FILE_OPERATIONS = {}
+
+
+    def open_file_matrix(path, shape=None, writable=False):
+        raise ValueError("Backend module not available")
+
+
+    def run_file_operation(operation, inputs, output=None, shapes=None, block_bytes=None, engine=None):
+        raise ValueError("Backend module not available")
+
+
     determinant = determinant_optimized
-app = FastAPI()
+
+
+    class Matrix:
+        pass
+
+from api.cache import ResultCache
+from api.executor import (
+    BudgetExceededError,
+    ComputeExecutor,
+    JobTimeoutError,
+    QueueFullError,
+    estimate_cost,
+    matrix_size,
+)
+from api.jobs import ASYNC_JOB_TIMEOUT, CANCELLED, DONE, FAILED, JobStore
+from api.metrics import Metrics, MetricsMiddleware, current_timings, record, stage
+from api.transport import (
+    FAST_JSON,
+    MATRIX_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    NPY_MEDIA_TYPE,
+    TransportError,
+    decode_body,
+    encode_result,
+    json_dumps,
+    media_type,
+    parse_json_fields,
+)
+
+# Тяжелые вычисления выполняются вне цикла событий
+executor = ComputeExecutor()
+# Кэш результатов повторяющихся запросов
+result_cache = ResultCache()
+# LU-разложения матриц коэффициентов для повторного решения СЛАУ
+FACTORIZATION_MAX_BYTES = int(os.environ.get("MATRIX_FACTORIZATION_MAX_BYTES", str(256 * 1024 * 1024)))
+FACTORIZATION_TTL = float(os.environ.get("MATRIX_FACTORIZATION_TTL", "3600"))
+factorizations = ResultCache(max_bytes=FACTORIZATION_MAX_BYTES, ttl=FACTORIZATION_TTL)
+# Метрики запросов для /metrics
+metrics = Metrics()
+# Асинхронные задачи /jobs
+jobs = JobStore()
+# Каталог файлов матриц для /files/{operation}; пути в запросах - относительно него.
+# Если не задан, операции с файлами недоступны
+DATA_DIR = os.environ.get("MATRIX_DATA_DIR") or None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    executor.shutdown()
+    shutdown_parallel_pool()
+
+
+# Трассировка вычислений по запросу: заголовок X-Matrix-Trace: 1. Отчет (спаны
+# вызовов matrix_core и счетчики) возвращается в заголовке ответа X-Matrix-Trace
+async def trace_requested(x_matrix_trace: str | None = Header(None)) -> None:
+    if x_matrix_trace and x_matrix_trace.lower() not in ("0", "off", "false"):
+        record("trace", [])
+
+
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(trace_requested)])
 
 # Настройка CORS
 app.add_middleware(
@@ -53,92 +198,778 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Браузерный клиент видит разбивку времени запроса и трассировку
+    expose_headers=["Server-Timing", "X-Matrix-Trace"],
 )
+# Счетчики и гистограммы запросов, заголовок Server-Timing
+app.add_middleware(MetricsMiddleware, metrics=metrics)
 # Модели запросов согласно договоренностям
 class MatrixRequest(BaseModel):
     matrix: list[list[float]]
 
+# Точный режим: вычисления в рациональных числах (движок "exact"). Рациональный
+# результат возвращается строкой "p/q" ("string") или парой [p, q] ("pair")
+class ExactOptions(BaseModel):
+    exact: bool = False
+    rational: str = "string"
+
+class ExactMatrixRequest(MatrixRequest, ExactOptions):
+    pass
+
 class TwoMatricesRequest(BaseModel):
     matrix_a: list[list[float]]
     matrix_b: list[list[float]]
 
-class SLAERequest(BaseModel):
+class MultiplyRequest(TwoMatricesRequest):
+    method: str = "classical"
+
+# Метод решения СЛАУ: "gaussian" (прямой) или итерационный
+# ("jacobi", "gauss_seidel", "cg", "gmres") с параметрами сходимости
+class SolverOptions(BaseModel):
+    method: str = "gaussian"
+    tol: float = 1e-10
+    max_iter: int | None = None
+    preconditioner: str | None = None
+    restart: int = 30
+
+class SLAERequest(SolverOptions, ExactOptions):
     coefficients: list[list[float]]
+    # Вектор или матрица n x k (по столбцу на каждую правую часть)
+    constants: list[float] | list[list[float]]
+
+class FactorizeRequest(BaseModel):
+    coefficients: list[list[float]]
+
+class ConstantsRequest(BaseModel):
+    constants: list[float] | list[list[float]]
+
+# Разреженная матрица в виде троек (строка, столбец, значение)
+class SparseMatrixModel(BaseModel):
+    rows: int
+    cols: int
+    entries: list[tuple[int, int, float]]
+
+class SparseMatrixRequest(BaseModel):
+    matrix: SparseMatrixModel
+
+class SparseTwoMatricesRequest(BaseModel):
+    matrix_a: SparseMatrixModel
+    matrix_b: SparseMatrixModel
+
+class SparseSLAERequest(SolverOptions):
+    coefficients: SparseMatrixModel
     constants: list[float]
 
+# Матрицы в файлах каталога данных: путь и, для сырых float64 без заголовка, размерность
+class FileInput(BaseModel):
+    path: str
+    shape: tuple[int, int] | None = None
+
+class FileOperationRequest(BaseModel):
+    inputs: list[FileInput]
+    output: str | None = None
+    block_bytes: int | None = None
+
+# Пакетный запрос: список разнородных операций
+class BatchOperation(BaseModel):
+    operation: str
+    matrix: list[list[float]] | None = None
+    matrix_a: list[list[float]] | None = None
+    matrix_b: list[list[float]] | None = None
+    coefficients: list[list[float]] | None = None
+    constants: list[float] | None = None
+
+class BatchRequest(BaseModel):
+    operations: list[BatchOperation]
+    parallel: bool = False
+
+# Асинхронная задача: одна операция в формате элемента пакета
+class JobRequest(BatchOperation):
+    pass
+
+
+# Операции, доступные по имени: функция и имена ее аргументов в запросе
+OPERATIONS = {
+    "determinant": (determinant, ("matrix",)),
+    "add": (matrix_add, ("matrix_a", "matrix_b")),
+    "multiply": (matrix_multiply, ("matrix_a", "matrix_b")),
+    "inverse": (inverse, ("matrix",)),
+    "solve": (solve_system_gaussian, ("coefficients", "constants")),
+    "transpose": (transpose, ("matrix",)),
+    "rank": (rank, ("matrix",)),
+}
+
+# Ограничение на количество операций в одном пакете
+MAX_BATCH_SIZE = int(os.environ.get("MATRIX_MAX_BATCH_SIZE", "10000"))
+
+
+def run_operation(operation: str, arguments: dict) -> dict:
+    # Результат или ошибка одной операции в формате ответа эндпоинтов
+    if operation not in OPERATIONS:
+        return {"error": f"Неизвестная операция: {operation}"}
+    func, names = OPERATIONS[operation]
+    for name in names:
+        if arguments.get(name) is None:
+            return {"error": f"Для операции {operation} не указан параметр {name}"}
+    try:
+        return {"result": func(*(arguments[name] for name in names))}
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        # Сбой одной операции не должен ронять весь пакет
+        return {"error": f"Ошибка вычисления: {e}"}
+
+
+def run_operations(items: list[tuple[str, dict]]) -> list[dict]:
+    # Выполнение части пакета (в том числе в дочернем процессе)
+    return [run_operation(operation, arguments) for operation, arguments in items]
+
+
+def operations_cost(items: list[tuple[str, dict]]) -> float:
+    # Суммарная оценка стоимости части пакета; неизвестные операции ничего не стоят
+    return sum(estimate_cost(operation, *(arguments.get(name) for name in OPERATIONS[operation][1]))
+               for operation, arguments in items if operation in OPERATIONS)
+
+
+async def compute(func, *args, operation: str | None = None, cost: float | None = None,
+                  use_processes: bool | None = None):
+    # Вычисление в пуле исполнителя со стоимостью, оцененной по операции и форме
+    # входных данных; перегрузка, таймаут и недоступный движок - ошибки HTTP,
+    # ошибки входных данных (ValueError) передаются обработчику как раньше
+    if cost is None and operation is not None:
+        cost = estimate_cost(operation, *args)
+    timings = current_timings()
+    traces = timings.get("trace") if timings is not None else None
+    try:
+        if traces is not None:
+            result, trace = await executor.run(partial(traced_call, func), *args, cost=cost,
+                                               use_processes=use_processes, timings=timings)
+            traces.append(trace)
+            if isinstance(result, ValueError):
+                raise result
+            return result
+        return await executor.run(func, *args, cost=cost, use_processes=use_processes, timings=timings)
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except JobTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except EngineUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def cache_allowed(cache_control: str | None = Header(None), x_matrix_cache: str | None = Header(None)) -> bool:
+    # Кэш отключается заголовком Cache-Control: no-cache / no-store или X-Matrix-Cache: bypass
+    if cache_control and ("no-cache" in cache_control or "no-store" in cache_control):
+        return False
+    if x_matrix_cache and x_matrix_cache.lower() in ("bypass", "off", "0"):
+        return False
+    return True
+
+
+async def compute_cached(operation: str, func, *args, use_cache: bool = True, cost: float | None = None,
+                         use_processes: bool | None = None):
+    # Результат (или ошибка входных данных) берется из кэша по хэшу операции и матриц.
+    # При трассировке кэш не используется: нужен отчет о самом вычислении
+    timings = current_timings()
+    if not (use_cache and result_cache.enabled) or (timings is not None and "trace" in timings):
+        return await compute(func, *args, operation=operation, cost=cost, use_processes=use_processes)
+
+    key = result_cache.make_key(operation, *args)
+    found, value = result_cache.get(key)
+    record("cache", "hit" if found else "miss")
+    if found:
+        if isinstance(value, ValueError):
+            raise value
+        return value
+
+    try:
+        result = await compute(func, *args, operation=operation, cost=cost, use_processes=use_processes)
+    except ValueError as e:
+        result_cache.put(key, e, size=64 + 4 * len(str(e)))
+        raise
+    result_cache.put(key, result)
+    return result
+
+
+# Двоичный транспорт: тело запроса в формате по Content-Type, ответ - по Accept.
+# JSON остается форматом по умолчанию
+def parse_body(model, matrix_fields: tuple, vector_fields: tuple = ()):
+    def parse_request(raw: bytes, http_request: Request):
+        content_type = media_type(http_request.headers.get("content-type"))
+        if content_type is None:
+            parsed = parse_json_fields(raw, matrix_fields, vector_fields) if FAST_JSON else None
+            if parsed is not None:
+                # Матрицы уже собраны в буферы; pydantic проверяет только остальные поля
+                fields, rest = parsed
+                try:
+                    request = model.model_validate({**rest, **{name: [] for name in fields}})
+                except ValidationError:
+                    pass
+                else:
+                    for name, value in fields.items():
+                        setattr(request, name, value)
+                    return request
+            try:
+                return model.model_validate_json(raw)
+            except ValidationError as e:
+                raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
+        try:
+            fields = decode_body(raw, content_type, matrix_fields, vector_fields)
+        except TransportError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Остальные параметры двоичного запроса (например, method) передаются в строке запроса
+        # и проверяются pydantic; матрицы уже проверены при декодировании
+        params = {name: value for name, value in http_request.query_params.items()
+                  if name in model.model_fields and name not in fields}
+        try:
+            request = model.model_validate({**params, **{name: [] for name in fields}})
+        except ValidationError as e:
+            raise RequestValidationError([{**error, "loc": ("query", *error["loc"])} for error in e.errors()])
+        for name, value in fields.items():
+            setattr(request, name, value)
+        return request
+
+    async def dependency(http_request: Request):
+        raw = await http_request.body()
+        with stage("parse"):
+            request = parse_request(raw, http_request)
+        # Размер входных данных - для распределения запросов по размерам в метриках
+        record("size", matrix_size(*(getattr(request, name) for name in matrix_fields + vector_fields)))
+        return request
+
+    return dependency
+
+
+def body_schema(model) -> dict:
+    # Описание тела запроса для OpenAPI: тело разбирается вручную, поэтому схема задается явно
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": model.model_json_schema()},
+        MATRIX_MEDIA_TYPE: binary,
+        NPY_MEDIA_TYPE: binary,
+        MSGPACK_MEDIA_TYPE: binary,
+    }}}
+
+
+RATIONAL_FORMATS = ("string", "pair")
+
+
+def rational_value(value, rational: str):
+    # Точные числа (Fraction, int) в формате ответа; вложенные списки обходятся рекурсивно
+    if isinstance(value, list):
+        return [rational_value(item, rational) for item in value]
+    if isinstance(value, (Fraction, int)):
+        value = Fraction(value)
+        return [value.numerator, value.denominator] if rational == "pair" else str(value)
+    return value
+
+
+def exact_mode(request: ExactOptions, operation: str, func):
+    # Имя операции для кэша и функция с учетом точного режима
+    if not request.exact:
+        return operation, func
+    if request.rational not in RATIONAL_FORMATS:
+        raise ValueError(f"Неизвестный формат рациональных чисел: {request.rational}. "
+                         f"Доступны: {', '.join(RATIONAL_FORMATS)}")
+    return f"{operation}:exact", partial(func, engine="exact")
+
+
+def respond(result, accept: str | None, rational: str | None = None):
+    with stage("serialize"):
+        return serialize(result, accept, rational)
+
+
+def serialize(result, accept: str | None, rational: str | None = None):
+    content_type = media_type(accept)
+    if rational is not None:
+        # Точный результат не представим в float64, поэтому всегда возвращается в JSON
+        result = rational_value(result, rational)
+    # Составной результат (например, итерационного решателя) всегда возвращается в JSON
+    if content_type is None or rational is not None or isinstance(result, dict):
+        payload = {"result": result.to_list() if isinstance(result, Matrix) else result}
+        # Ответ сериализуется сразу в байты, минуя jsonable_encoder
+        return Response(content=json_dumps(payload), media_type="application/json") if FAST_JSON else payload
+    try:
+        return Response(content=encode_result(result, content_type), media_type=content_type)
+    except TransportError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
 
 
+# Состояние кэша результатов
+@app.get("/cache/stats")
+async def cache_stats():
+    return result_cache.stats()
+
+
+@app.delete("/cache")
+async def clear_cache():
+    result_cache.clear()
+    return {"status": "ok"}
+
+
+# Состояние планировщика вычислений
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    return executor.stats()
+
+
+# Метрики в текстовом формате Prometheus
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(content=metrics.render(result_cache.stats(), executor.stats()),
+                    media_type="text/plain; version=0.0.4")
+
+
 # Эндпоинт для определителя матрицы
-@app.post("/determinant")
-async def calculate_determinant(request: MatrixRequest):
+@app.post("/determinant", openapi_extra=body_schema(ExactMatrixRequest))
+async def calculate_determinant(request: ExactMatrixRequest = Depends(parse_body(ExactMatrixRequest, ("matrix",))),
+                                accept: str | None = Header(None), use_cache: bool = Depends(cache_allowed)):
     try:
-        result = determinant(request.matrix)
-        return {"result": result}
+        operation, func = exact_mode(request, "determinant", determinant)
+        result = await compute_cached(operation, func, request.matrix, use_cache=use_cache)
+        return respond(result, accept, request.rational if request.exact else None)
     except ValueError as e:
         return {"error": str(e)}
 
 
 # Эндпоинт для сложения матриц
-@app.post("/add")
-async def add_matrices(request: TwoMatricesRequest):
+@app.post("/add", openapi_extra=body_schema(TwoMatricesRequest))
+async def add_matrices(request: TwoMatricesRequest = Depends(parse_body(TwoMatricesRequest, ("matrix_a", "matrix_b"))),
+                       accept: str | None = Header(None)):
     try:
-        result = matrix_add(request.matrix_a, request.matrix_b)
-        return {"result": result}
+        result = await compute(matrix_add, request.matrix_a, request.matrix_b, operation="add")
+        return respond(result, accept)
     except ValueError as e:
         return {"error": str(e)}
 
 
 # Эндпоинт для умножения матриц
-@app.post("/multiply")
-async def multiply_matrices(request: TwoMatricesRequest):
+@app.post("/multiply", openapi_extra=body_schema(MultiplyRequest))
+async def multiply_matrices(request: MultiplyRequest = Depends(parse_body(MultiplyRequest, ("matrix_a", "matrix_b"))),
+                            accept: str | None = Header(None), use_cache: bool = Depends(cache_allowed)):
     try:
-        result = matrix_multiply(request.matrix_a, request.matrix_b)
-        return {"result": result}
+        # Параллельное умножение само распределяет строки по общему пулу процессов,
+        # из потока исполнителя им только управляют
+        result = await compute_cached(f"multiply:{request.method}", partial(matrix_multiply, method=request.method),
+                                      request.matrix_a, request.matrix_b, use_cache=use_cache,
+                                      use_processes=False if request.method == "parallel" else None)
+        return respond(result, accept)
     except ValueError as e:
         return {"error": str(e)}
 
 
 # Эндпоинт для обратной матрицы
-@app.post("/inverse")
-async def calculate_inverse(request: MatrixRequest):
+@app.post("/inverse", openapi_extra=body_schema(ExactMatrixRequest))
+async def calculate_inverse(request: ExactMatrixRequest = Depends(parse_body(ExactMatrixRequest, ("matrix",))),
+                            accept: str | None = Header(None), use_cache: bool = Depends(cache_allowed)):
     try:
-        result = inverse(request.matrix)
-        return {"result": result}
+        operation, func = exact_mode(request, "inverse", inverse)
+        result = await compute_cached(operation, func, request.matrix, use_cache=use_cache)
+        return respond(result, accept, request.rational if request.exact else None)
     except ValueError as e:
         return {"error": str(e)}
 
 
 # Эндпоинт для решения СЛАУ
-@app.post("/solve")
-async def solve_system(request: SLAERequest):
+def solver(request: SolverOptions, coefficients) -> tuple[str, object, float | None]:
+    # Имя операции для кэша, функция решения и оценка стоимости по параметрам запроса
+    if getattr(request, "exact", False):
+        if request.method != "gaussian":
+            raise ValueError("Точный режим доступен только для метода gaussian")
+        operation, func = exact_mode(request, "solve", solve_system_gaussian)
+        return operation, func, None
+    if request.method == "gaussian":
+        return "solve", solve_system_gaussian, None
+    func = partial(solve_iterative, method=request.method, tol=request.tol, max_iter=request.max_iter,
+                   preconditioner=request.preconditioner, restart=request.restart)
+    operation = (f"solve:{request.method}:{request.tol!r}:{request.max_iter}:"
+                 f"{request.preconditioner}:{request.restart}")
+    # Не больше max_iter умножений матрицы на вектор
+    cost = estimate_cost("matvec", coefficients) * (request.max_iter or ITERATIVE_MAX_ITER)
+    return operation, func, cost
+
+
+@app.post("/solve", openapi_extra=body_schema(SLAERequest))
+async def solve_system(request: SLAERequest = Depends(parse_body(SLAERequest, ("coefficients",), ("constants",))),
+                       accept: str | None = Header(None), use_cache: bool = Depends(cache_allowed)):
     try:
-        result = solve_system_gaussian(request.coefficients, request.constants)
-        return {"result": result}
+        operation, func, cost = solver(request, request.coefficients)
+        result = await compute_cached(operation, func, request.coefficients, request.constants,
+                                      use_cache=use_cache, cost=cost)
+        return respond(result, accept, request.rational if request.exact else None)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+# LU-разложение матрицы коэффициентов: возвращает идентификатор, по которому
+# следующие системы с той же матрицей решаются за O(n^2)
+@app.post("/solve/factorize", openapi_extra=body_schema(FactorizeRequest))
+async def factorize_system(request: FactorizeRequest = Depends(parse_body(FactorizeRequest, ("coefficients",)))):
+    key = factorizations.make_key("lu", request.coefficients)
+    found, factorization = factorizations.get(key)
+    try:
+        if not found:
+            factorization = await compute(lu_factorize, request.coefficients, operation="factorize")
+            n = factorization.n
+            factorizations.put(key, factorization, size=64 + 8 * n * n + 8 * n)
+        return {"result": {"handle": key.hex(), "size": factorization.n}}
     except ValueError as e:
         return {"error": str(e)}
 
 
+def stored_factorization(handle: str):
+    try:
+        found, factorization = factorizations.get(bytes.fromhex(handle))
+    except ValueError:
+        found = False
+    if not found:
+        raise HTTPException(status_code=404, detail="Разложение не найдено или устарело, выполните /solve/factorize заново")
+    return factorization
+
+
+@app.post("/solve/{handle}", openapi_extra=body_schema(ConstantsRequest))
+async def solve_factorized(handle: str,
+                           request: ConstantsRequest = Depends(parse_body(ConstantsRequest, (), ("constants",))),
+                           accept: str | None = Header(None)):
+    factorization = stored_factorization(handle)
+    try:
+        # Передача разложения в процесс стоит столько же, сколько само решение, поэтому - в потоке
+        result = await compute(factorization.solve, request.constants, use_processes=False,
+                               cost=estimate_cost("lu_solve", factorization.lu, request.constants))
+        return respond(result, accept)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.delete("/solve/{handle}")
+async def delete_factorization(handle: str):
+    try:
+        removed = factorizations.discard(bytes.fromhex(handle))
+    except ValueError:
+        removed = False
+    if not removed:
+        raise HTTPException(status_code=404, detail="Разложение не найдено или устарело")
+    return {"status": "ok"}
+
+
 # Транспонирование
-@app.post("/transpose")
-async def transpose_matrix(request: MatrixRequest):
+@app.post("/transpose", openapi_extra=body_schema(MatrixRequest))
+async def transpose_matrix(request: MatrixRequest = Depends(parse_body(MatrixRequest, ("matrix",))),
+                           accept: str | None = Header(None)):
     try:
-        from backend.matrix_core import transpose
-        result = transpose(request.matrix)
-        return {"result": result}
+        result = await compute(transpose, request.matrix, operation="transpose")
+        return respond(result, accept)
     except ValueError as e:
         return {"error": str(e)}
 
 # Ранг
-@app.post("/rank")
-async def rank_matrix(request: MatrixRequest):
+@app.post("/rank", openapi_extra=body_schema(ExactMatrixRequest))
+async def rank_matrix(request: ExactMatrixRequest = Depends(parse_body(ExactMatrixRequest, ("matrix",))),
+                      accept: str | None = Header(None), use_cache: bool = Depends(cache_allowed)):
     try:
-        from backend.matrix_core import rank
-        result = rank(request.matrix)
+        # Ранг - целое число, в точном режиме меняется только способ вычисления
+        operation, func = exact_mode(request, "rank", rank)
+        result = await compute_cached(operation, func, request.matrix, use_cache=use_cache)
+        return respond(result, accept)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+# Разреженные матрицы
+def to_sparse(model: SparseMatrixModel):
+    from backend.matrix_core import SparseMatrix
+    return SparseMatrix.from_coo(model.rows, model.cols, model.entries)
+
+
+def sparse_payload(matrix):
+    # Разреженный результат возвращается в том же формате троек
+    from backend.matrix_core import SparseMatrix
+    if isinstance(matrix, SparseMatrix):
+        return {"rows": matrix.rows, "cols": matrix.cols, "entries": matrix.to_coo()}
+    return matrix
+
+
+@app.post("/sparse/add")
+async def add_sparse_matrices(request: SparseTwoMatricesRequest):
+    try:
+        result = await compute(matrix_add, to_sparse(request.matrix_a), to_sparse(request.matrix_b), operation="add")
+        return {"result": sparse_payload(result)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.post("/sparse/multiply")
+async def multiply_sparse_matrices(request: SparseTwoMatricesRequest):
+    try:
+        result = await compute(matrix_multiply, to_sparse(request.matrix_a), to_sparse(request.matrix_b),
+                               operation="multiply")
+        return {"result": sparse_payload(result)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.post("/sparse/transpose")
+async def transpose_sparse_matrix(request: SparseMatrixRequest):
+    try:
+        result = await compute(transpose, to_sparse(request.matrix), operation="transpose")
+        return {"result": sparse_payload(result)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.post("/sparse/solve")
+async def solve_sparse_system(request: SparseSLAERequest):
+    try:
+        coefficients = to_sparse(request.coefficients)
+        _, func, cost = solver(request, coefficients)
+        result = await compute(func, coefficients, request.constants, operation="solve", cost=cost)
         return {"result": result}
     except ValueError as e:
         return {"error": str(e)}
 
 
+# Операции над матрицами в файлах: данные читаются и результат пишется по блокам,
+# в ответе - путь к файлу результата относительно каталога данных
+def data_path(name: str) -> Path:
+    root = Path(DATA_DIR).resolve()
+    path = (root / name).resolve()
+    if not path.is_relative_to(root):
+        raise ValueError(f"Путь {name} выходит за пределы каталога данных")
+    return path
+
+
+@app.post("/files/{operation}")
+async def file_operation(operation: str, request: FileOperationRequest):
+    if DATA_DIR is None:
+        raise HTTPException(status_code=404, detail="Операции с файлами отключены: не задан MATRIX_DATA_DIR")
+    if operation not in FILE_OPERATIONS:
+        raise HTTPException(status_code=404, detail=f"Неизвестная операция: {operation}")
+    try:
+        paths = [data_path(item.path) for item in request.inputs]
+        shapes = [item.shape for item in request.inputs]
+        output = data_path(request.output or f"{operation}-{secrets.token_hex(8)}.npy")
+        # Оценка стоимости по размерностям из заголовков файлов
+        matrices = []
+        for path, shape in zip(paths, shapes):
+            with open_file_matrix(path, shape) as matrix:
+                matrices.append(matrix)
+        record("size", matrix_size(*matrices))
+        result = await compute(run_file_operation, operation, [str(path) for path in paths], str(output),
+                               shapes, request.block_bytes, cost=estimate_cost(operation, *matrices))
+        result["path"] = str(Path(result["path"]).relative_to(Path(DATA_DIR).resolve()))
+        return {"result": result}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+# Пакетное выполнение операций в одном HTTP-запросе
+@app.post("/batch")
+async def run_batch(request: BatchRequest):
+    if len(request.operations) > MAX_BATCH_SIZE:
+        return {"error": f"Слишком много операций в пакете: {len(request.operations)}, максимум {MAX_BATCH_SIZE}"}
+
+    items = [(item.operation, item.model_dump(exclude={"operation"})) for item in request.operations]
+
+    if not request.parallel or executor.workers < 2 or len(items) < 2:
+        return {"results": await compute(run_operations, items, cost=operations_cost(items))}
+
+    # Пакет делится на части по числу процессов, порядок результатов сохраняется
+    chunk_size = -(-len(items) // executor.workers)
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    parts = await asyncio.gather(*(
+        compute(run_operations, chunk, cost=operations_cost(chunk), use_processes=True) for chunk in chunks
+    ))
+    return {"results": [result for part in parts for result in part]}
+
+
+# Асинхронные задачи: запрос сразу возвращает идентификатор, состояние и результат
+# запрашиваются отдельно, поэтому долгие вычисления не зависят от одного HTTP-соединения
+async def run_job(job, func, args: list, cost: float) -> None:
+    # Задача считается в потоке под слушателем прогресса (как /ws/compute): он обновляет
+    # progress задачи, а отмена или таймаут прерывают вычисление на следующем шаге
+    # алгоритма, и место в очереди исполнителя освобождается
+    job.listener = JobProgress(job)
+    listener = job.listener
+    try:
+        result = await executor.run(listener.run, func, *args, cost=cost, use_processes=False,
+                                    timeout=ASYNC_JOB_TIMEOUT, on_start=partial(jobs.start, job))
+    except ComputationCancelled:
+        jobs.finish(job, CANCELLED, error="Задача отменена")
+    except ValueError as e:
+        jobs.finish(job, FAILED, error=str(e))
+    except JobTimeoutError as e:
+        jobs.finish(job, FAILED, error=str(e))
+    except asyncio.CancelledError:
+        jobs.finish(job, CANCELLED, error="Задача отменена")
+        raise
+    except QueueFullError:
+        # Отказ при постановке в очередь: задача снимается в submit_job
+        raise
+    except Exception as e:
+        jobs.finish(job, FAILED, error=f"Ошибка вычисления: {e}")
+    else:
+        jobs.finish(job, DONE, result)
+    finally:
+        listener.cancel()
+
+
+def stored_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача не найдена или устарела")
+    return job
+
+
+def requested_call(request: JobRequest) -> tuple | dict:
+    # Функция и аргументы операции из запроса или ошибка в формате ответа эндпоинтов
+    if request.operation not in OPERATIONS:
+        return {"error": f"Неизвестная операция: {request.operation}"}
+    func, names = OPERATIONS[request.operation]
+    arguments = request.model_dump(exclude={"operation"})
+    for name in names:
+        if arguments.get(name) is None:
+            return {"error": f"Для операции {request.operation} не указан параметр {name}"}
+    return func, [arguments[name] for name in names]
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    call = requested_call(request)
+    if isinstance(call, dict):
+        return call
+    func, args = call
+    cost = estimate_cost(request.operation, *args)
+
+    try:
+        job = jobs.create(request.operation)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    # Задача выполняется в своем контексте: замеры и трассировка этого запроса ее не касаются
+    job.task = asyncio.create_task(run_job(job, func, args, cost), context=contextvars.Context())
+    # Постановка в очередь исполнителя происходит сразу: перегрузка - ошибка этого запроса
+    await asyncio.sleep(0)
+    if job.task is not None and job.task.done() and isinstance(job.task.exception(), QueueFullError):
+        e = job.task.exception()
+        jobs.discard(job.id)
+        status = 429 if isinstance(e, BudgetExceededError) else 503
+        raise HTTPException(status_code=status, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    return {"result": job.summary()}
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return {"result": stored_job(job_id).summary()}
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str, accept: str | None = Header(None)):
+    job = stored_job(job_id)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail="Задача еще не завершена")
+    if job.status != DONE:
+        return {"error": job.error}
+    return respond(job.result, accept)
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    # Незавершенная задача отменяется; завершенная удаляется вместе с результатом.
+    # Уже начатое вычисление прерывается на следующем шаге алгоритма (операции
+    # без отчетов о прогрессе досчитываются, но их результат отбрасывается)
+    job = stored_job(job_id)
+    if job.finished:
+        jobs.discard(job_id)
+    elif job.task is not None:
+        if job.listener is not None:
+            job.listener.cancel()
+        job.task.cancel()
+        jobs.finish(job, CANCELLED, error="Задача отменена")
+    return {"result": job.summary()}
+
+
+@app.get("/jobs")
+async def jobs_stats():
+    return jobs.stats()
+
+
+# Потоковое вычисление по WebSocket: клиент отправляет операцию в формате /jobs,
+# сервер присылает сообщения о прогрессе и затем результат. Сообщение
+# {"type": "cancel"} или закрытие соединения прерывает вычисление на следующем шаге
+async def cancel_on_request(websocket: WebSocket, relay: ProgressRelay) -> None:
+    try:
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict) and message.get("type") == "cancel":
+                break
+    except (WebSocketDisconnect, ValueError):
+        pass
+    relay.cancel()
+
+
+async def stream_computation(websocket: WebSocket, relay: ProgressRelay, func, args: list, cost: float) -> dict:
+    # Вычисление в потоке исполнителя (слушатель прогресса не передается в дочерний
+    # процесс); сообщения о прогрессе отправляются по мере поступления
+    computation = asyncio.ensure_future(executor.run(relay.run, func, *args, cost=cost, use_processes=False,
+                                                     timeout=ASYNC_JOB_TIMEOUT))
+    try:
+        while not computation.done():
+            update = asyncio.ensure_future(relay.queue.get())
+            await asyncio.wait((computation, update), return_when=asyncio.FIRST_COMPLETED)
+            if update.done():
+                await websocket.send_json(update.result())
+            else:
+                update.cancel()
+        while not relay.queue.empty():
+            await websocket.send_json(relay.queue.get_nowait())
+        return {"type": "result", "result": computation.result()}
+    except ComputationCancelled:
+        return {"type": "cancelled", "error": "Вычисление отменено"}
+    except ValueError as e:
+        return {"type": "error", "error": str(e)}
+    except QueueFullError as e:
+        return {"type": "error", "error": str(e), "retry_after": e.retry_after}
+    except (JobTimeoutError, EngineUnavailableError) as e:
+        return {"type": "error", "error": str(e)}
+    finally:
+        # Клиент отключился: вычисление останавливается на следующем шаге
+        relay.cancel()
+        computation.cancel()
+
+
+@app.websocket("/ws/compute")
+async def compute_stream(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        try:
+            request = JobRequest.model_validate(await websocket.receive_json())
+        except (ValidationError, ValueError):
+            await websocket.send_json({"type": "error", "error": "Некорректный запрос: ожидается операция "
+                                                                 "в формате /jobs"})
+            await websocket.close()
+            return
+        call = requested_call(request)
+        if isinstance(call, dict):
+            await websocket.send_json({"type": "error", **call})
+            await websocket.close()
+            return
+        func, args = call
+
+        relay = ProgressRelay(asyncio.get_running_loop())
+        listener = asyncio.create_task(cancel_on_request(websocket, relay))
+        try:
+            message = await stream_computation(websocket, relay, func, args,
+                                               estimate_cost(request.operation, *args))
+        finally:
+            listener.cancel()
+        await websocket.send_text(json_dumps(message).decode())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
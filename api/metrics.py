@@ -0,0 +1,262 @@
+import json
+import time
+from contextvars import ContextVar
+from math import inf
+
+
+# Границы корзин гистограмм: время запроса и ожидания в очереди (секунды),
+# размер входных данных (количество элементов матриц)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Этапы запроса для заголовка Server-Timing, в порядке вывода
+STAGES = ("parse", "queue", "compute", "serialize")
+
+# Замеры текущего запроса: этапы (секунды), размер входных данных, обращение к кэшу.
+# Заполняются зависимостями и обработчиками, читаются промежуточным слоем
+_current = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> dict | None:
+    return _current.get()
+
+
+class stage:
+    # Замер этапа текущего запроса: with stage("parse"): ...
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        timings = _current.get()
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + time.perf_counter() - self.started
+        return False
+
+
+def record(name: str, value) -> None:
+    # Значение для текущего запроса (размер входных данных, попадание в кэш)
+    timings = _current.get()
+    if timings is not None:
+        timings[name] = value
+
+
+def size_bucket(size: int) -> str:
+    # Верхняя граница корзины размера как метка
+    for bound in SIZE_BUCKETS:
+        if size <= bound:
+            return str(bound)
+    return "+Inf"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(buckets) + (inf,)
+        # Метки -> [количество по корзинам (не накопленное), сумма, количество]
+        self._values = {}
+
+    def observe(self, value: float, *labels) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def count(self, *labels) -> int:
+        entry = self._values.get(labels)
+        return entry[2] if entry is not None else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+
+def _samples(name: str, documentation: str, samples: list[tuple[tuple, tuple, float]],
+             kind: str = "gauge") -> list[str]:
+    # Значения, которые считаются в другом месте (кэш, планировщик): (имена меток, значения меток, значение)
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for names, labels, value in samples:
+        lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+    return lines
+
+
+class Metrics:
+    # Метрики запросов API в текстовом формате Prometheus. Счетчики живут в памяти
+    # процесса: при нескольких процессах сервера каждый отдает свои значения
+    def __init__(self):
+        self.requests = Counter("matrix_requests_total", "Количество запросов", ("endpoint", "method", "status"))
+        self.errors = Counter("matrix_request_errors_total",
+                              "Ошибки: input - ошибка входных данных в ответе, http - код 4xx/5xx",
+                              ("endpoint", "type"))
+        self.latency = Histogram("matrix_request_duration_seconds", "Время обработки запроса",
+                                 ("endpoint", "size"))
+        self.sizes = Histogram("matrix_request_elements", "Количество элементов матриц в запросе",
+                               ("endpoint",), SIZE_BUCKETS)
+        self.stages = Histogram("matrix_request_stage_seconds", "Время этапов запроса", ("endpoint", "stage"))
+        self.queue_wait = Histogram("matrix_queue_wait_seconds", "Ожидание свободного исполнителя", ("lane",))
+        self.cache = Counter("matrix_cache_requests_total", "Обращения к кэшу результатов",
+                             ("endpoint", "result"))
+
+    def observe(self, endpoint: str, method: str, status: int, input_error: bool, duration: float,
+                timings: dict) -> None:
+        self.requests.inc(endpoint, method, str(status))
+        if status >= 400:
+            self.errors.inc(endpoint, "http")
+        elif input_error:
+            self.errors.inc(endpoint, "input")
+
+        size = timings.get("size")
+        self.latency.observe(duration, endpoint, size_bucket(size) if size is not None else "none")
+        if size is not None:
+            self.sizes.observe(size, endpoint)
+        for name in STAGES:
+            if name in timings:
+                self.stages.observe(timings[name], endpoint, name)
+        if "queue" in timings:
+            self.queue_wait.observe(timings["queue"], timings.get("lane", "unknown"))
+        if "cache" in timings:
+            self.cache.inc(endpoint, timings["cache"])
+
+    def render(self, cache_stats: dict | None = None, scheduler_stats: dict | None = None) -> str:
+        lines = []
+        for metric in (self.requests, self.errors, self.latency, self.sizes, self.stages, self.queue_wait,
+                       self.cache):
+            lines.extend(metric.render())
+        if cache_stats is not None:
+            lines.extend(_samples("matrix_cache_hit_ratio", "Доля попаданий в кэш результатов",
+                                  [((), (), cache_stats["hit_ratio"])]))
+            lines.extend(_samples("matrix_cache_bytes", "Объем кэша результатов, байты",
+                                  [((), (), cache_stats["bytes"])]))
+            lines.extend(_samples("matrix_cache_entries", "Записей в кэше результатов",
+                                  [((), (), cache_stats["entries"])]))
+        if scheduler_stats is not None:
+            lines.extend(_samples("matrix_scheduler_pending", "Принятые и еще не завершенные задачи",
+                                  [(("lane",), ("small",), scheduler_stats["small_pending"]),
+                                   (("lane",), ("large",), scheduler_stats["large_pending"])]))
+            lines.extend(_samples("matrix_scheduler_cost_in_flight", "Оценка стоимости выполняемых задач",
+                                  [((), (), scheduler_stats["cost_in_flight"])]))
+            lines.extend(_samples("matrix_scheduler_rejected_total", "Задачи, отклоненные из-за перегрузки",
+                                  [((), (), scheduler_stats["rejected"])], kind="counter"))
+        return "\n".join(lines) + "\n"
+
+
+def trace_header(traces: list) -> str:
+    # Отчеты трассировки вычислений запроса (времена в миллисекундах), компактный JSON в ASCII
+    for trace in traces:
+        for span in trace.get("spans", ()):
+            span["start"] = round(span["start"] * 1000, 3)
+            span["duration"] = round((span["duration"] or 0.0) * 1000, 3)
+    return json.dumps(traces, separators=(",", ":"))
+
+
+def server_timing(timings: dict, total: float) -> str:
+    # Значение заголовка Server-Timing, миллисекунды
+    parts = [f"{name};dur={timings[name] * 1000:.3f}" for name in STAGES if name in timings]
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    # Промежуточный слой ASGI: замеряет каждый HTTP-запрос, записывает метрики
+    # и добавляет к ответу заголовок Server-Timing
+    def __init__(self, app, metrics: Metrics, exclude: tuple = ("/metrics",)):
+        self.app = app
+        self.metrics = metrics
+        self.exclude = exclude
+        self._routes = None
+
+    def _endpoint(self, scope) -> str:
+        # Шаблон пути маршрута (например, /solve/{handle}), чтобы не плодить метки
+        if self._routes is None:
+            router = scope.get("router")
+            self._routes = {route.endpoint: route.path for route in getattr(router, "routes", ())
+                            if hasattr(route, "endpoint")}
+        return self._routes.get(scope.get("endpoint"), "other")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _current.set(timings)
+        started = time.perf_counter()
+        response = {"status": 500, "input_error": False}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", server_timing(timings, time.perf_counter() - started).encode()))
+                if timings.get("trace"):
+                    headers.append((b"x-matrix-trace", trace_header(timings["trace"]).encode()))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and not response.get("body_seen"):
+                # Эндпоинты сообщают об ошибке входных данных ответом {"error": ...} с кодом 200
+                response["body_seen"] = True
+                response["input_error"] = message.get("body", b"")[:9] == b'{"error":'
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.metrics.observe(self._endpoint(scope), scope["method"], response["status"],
+                                 response["input_error"], time.perf_counter() - started, timings)
@@ -0,0 +1,69 @@
+import asyncio
+import os
+import threading
+import time
+
+from backend.matrix_core import ComputationCancelled, progress_listener
+
+
+# Минимальный интервал между сообщениями о прогрессе одного вычисления, секунды
+PROGRESS_INTERVAL = float(os.environ.get("MATRIX_PROGRESS_INTERVAL", "0.1"))
+
+
+class ProgressListener:
+    # Слушатель прогресса вычисления в потоке исполнителя. cancel() прерывает
+    # вычисление на следующем шаге алгоритма; report() получает отчеты о шагах
+    def __init__(self):
+        self._cancelled = threading.Event()
+
+    def __call__(self, stage: str, done: int, total: int) -> None:
+        if self._cancelled.is_set():
+            raise ComputationCancelled("Вычисление отменено")
+        self.report(stage, done, total)
+
+    def report(self, stage: str, done: int, total: int) -> None:
+        pass
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def run(self, func, *args):
+        # Вызов в потоке исполнителя: у каждого потока свой контекст, слушатель
+        # устанавливается на время вызова
+        with progress_listener(self):
+            return func(*args)
+
+
+class ProgressRelay(ProgressListener):
+    # Передает отчеты в цикл событий через очередь не чаще interval секунд
+    # (последний шаг - всегда)
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval: float = PROGRESS_INTERVAL):
+        super().__init__()
+        self.loop = loop
+        self.interval = interval
+        self.queue = asyncio.Queue()
+        self._last = 0.0
+
+    def report(self, stage: str, done: int, total: int) -> None:
+        now = time.monotonic()
+        if now - self._last < self.interval and done < total:
+            return
+        self._last = now
+        message = {"type": "progress", "stage": stage, "done": done, "total": total,
+                   "progress": round(done / total, 4) if total else 1.0}
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+
+class JobProgress(ProgressListener):
+    # Прогресс асинхронной задачи /jobs: доля выполненных шагов последнего отчета
+    # сохраняется в задаче, чтение из цикла событий не требует синхронизации
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+
+    def report(self, stage: str, done: int, total: int) -> None:
+        self.job.reported = done / total if total else 1.0
@@ -0,0 +1,846 @@
+import asyncio
+import json
+import random
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Добавляем родительскую директорию в путь Python
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+sys.path.append(str(parent_dir))
+
+import api.main as main
+import backend.distributed as distributed
+import backend.matrix_core as core
+from api.cache import ResultCache
+from api.executor import ComputeExecutor, JobTimeoutError
+from api.jobs import JobStore
+from api.main import app
+from api.metrics import Histogram
+from api.transport import TransportError, decode_body, decode_npy, encode_frames, encode_npy, msgpack
+
+
+def random_matrix(rows: int, cols: int, seed: int) -> list[list]:
+    generator = random.Random(seed)
+    return [[generator.uniform(-1, 1) for _ in range(cols)] for _ in range(rows)]
+
+
+@pytest.fixture
+def client():
+    main.result_cache.clear()
+    with TestClient(app) as client:
+        yield client
+
+
+class TestBatch:
+    """Тесты пакетного выполнения операций /batch"""
+
+    def test_mixed_results(self, client):
+        """Ошибка одной операции не мешает остальным"""
+        response = client.post("/batch", json={"operations": [
+            {"operation": "determinant", "matrix": [[1, 2], [3, 4]]},
+            {"operation": "inverse", "matrix": [[1, 2], [2, 4]]},
+            {"operation": "unknown"},
+            {"operation": "add", "matrix_a": [[1]]},
+            {"operation": "transpose", "matrix": [[1, 2]]},
+        ]})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0] == {"result": -2.0}
+        assert "вырожденная" in results[1]["error"]
+        assert results[2] == {"error": "Неизвестная операция: unknown"}
+        assert results[3] == {"error": "Для операции add не указан параметр matrix_b"}
+        assert results[4] == {"result": [[1.0], [2.0]]}
+
+    def test_unexpected_error_per_item(self, client, monkeypatch):
+        """Не связанная с входными данными ошибка - тоже ошибка одной операции"""
+        def failing(matrix):
+            raise RuntimeError("сбой")
+
+        monkeypatch.setitem(main.OPERATIONS, "failing", (failing, ("matrix",)))
+        response = client.post("/batch", json={"operations": [
+            {"operation": "failing", "matrix": [[1]]},
+            {"operation": "rank", "matrix": [[1, 2], [2, 4]]},
+        ]})
+        assert response.status_code == 200
+        assert response.json()["results"] == [{"error": "Ошибка вычисления: сбой"}, {"result": 1}]
+
+    def test_parallel_keeps_order(self, client, monkeypatch):
+        """Параллельный пакет возвращает результаты в порядке операций"""
+        monkeypatch.setattr(main.executor, "workers", 2)
+        operations = [{"operation": "determinant", "matrix": [[i, 0], [0, 1]]} for i in range(7)]
+        operations.append({"operation": "inverse", "matrix": [[0]]})
+        response = client.post("/batch", json={"operations": operations, "parallel": True})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [item["result"] for item in results[:7]] == [float(i) for i in range(7)]
+        assert "error" in results[7]
+
+    def test_batch_size_limit(self, client, monkeypatch):
+        """Слишком большой пакет отклоняется"""
+        monkeypatch.setattr(main, "MAX_BATCH_SIZE", 1)
+        response = client.post("/batch", json={"operations": [{"operation": "rank", "matrix": [[1]]}] * 2})
+        assert "Слишком много операций" in response.json()["error"]
+
+
+class TestExecutor:
+    """Тесты выполнения вычислений в пулах исполнителя"""
+
+    def test_large_job_in_process_pool(self, client):
+        """Дорогая задача считается в пуле процессов с тем же результатом"""
+        a = random_matrix(120, 120, 1)
+        response = client.post("/multiply", json={"matrix_a": a, "matrix_b": a},
+                               headers={"Cache-Control": "no-cache"})
+        expected = main.matrix_multiply(a, a)
+        assert response.json()["result"] == expected
+        stats = client.get("/scheduler/stats").json()
+        assert stats["small_pending"] == 0 and stats["large_pending"] == 0
+
+    def test_timeout_504(self, client, monkeypatch):
+        """Превышение времени вычисления - 504"""
+        monkeypatch.setattr(main.executor, "timeout", 0.001)
+        a = random_matrix(150, 150, 2)
+        response = client.post("/inverse", json={"matrix": a}, headers={"Cache-Control": "no-cache"})
+        assert response.status_code == 504
+        assert "Превышено время" in response.json()["detail"]
+
+    def test_job_timeout_error(self):
+        """Исполнитель сообщает о таймауте своим исключением"""
+        async def scenario():
+            executor = ComputeExecutor(workers=1, timeout=0.05)
+            try:
+                with pytest.raises(JobTimeoutError):
+                    await executor.run(time.sleep, 0.5, cost=1.0)
+            finally:
+                executor.shutdown()
+
+        asyncio.run(scenario())
+
+
+class TestResultCache:
+    """Тесты кэша результатов"""
+
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        # Считает вызовы вычисления определителя
+        calls = []
+        determinant = main.determinant
+
+        def counted(matrix):
+            calls.append(matrix)
+            return determinant(matrix)
+
+        monkeypatch.setattr(main, "determinant", counted)
+        return calls
+
+    def test_hit(self, client, calls):
+        """Повторный запрос берется из кэша"""
+        first = client.post("/determinant", json={"matrix": [[1, 2], [3, 4]]})
+        second = client.post("/determinant", json={"matrix": [[1, 2], [3, 4]]})
+        assert first.json() == second.json() == {"result": -2.0}
+        assert len(calls) == 1
+        assert client.get("/cache/stats").json()["hits"] >= 1
+
+    def test_bypass(self, client, calls):
+        """Cache-Control: no-cache и X-Matrix-Cache: bypass вычисляют заново"""
+        client.post("/determinant", json={"matrix": [[2, 0], [0, 2]]})
+        client.post("/determinant", json={"matrix": [[2, 0], [0, 2]]}, headers={"Cache-Control": "no-cache"})
+        client.post("/determinant", json={"matrix": [[2, 0], [0, 2]]}, headers={"X-Matrix-Cache": "bypass"})
+        assert len(calls) == 3
+
+    def test_cached_error(self, client, monkeypatch):
+        """Ошибка входных данных тоже кэшируется и возвращается повторно"""
+        calls = []
+        inverse = main.inverse
+
+        def counted(matrix):
+            calls.append(matrix)
+            return inverse(matrix)
+
+        monkeypatch.setattr(main, "inverse", counted)
+        first = client.post("/inverse", json={"matrix": [[1, 2], [2, 4]]})
+        second = client.post("/inverse", json={"matrix": [[1, 2], [2, 4]]})
+        assert "вырожденная" in first.json()["error"]
+        assert second.json() == first.json()
+        assert len(calls) == 1
+
+    def test_clear(self, client, calls):
+        """DELETE /cache очищает кэш"""
+        client.post("/determinant", json={"matrix": [[1]]})
+        assert client.delete("/cache").json() == {"status": "ok"}
+        assert client.get("/cache/stats").json()["entries"] == 0
+        client.post("/determinant", json={"matrix": [[1]]})
+        assert len(calls) == 2
+
+    def test_lru_eviction(self):
+        """Сверх объема вытесняются давно не использованные записи"""
+        cache = ResultCache(max_bytes=200, ttl=60)
+        cache.put(b"a", 1, size=100)
+        cache.put(b"b", 2, size=100)
+        assert cache.get(b"a") == (True, 1)
+        cache.put(b"c", 3, size=100)
+        assert cache.get(b"b") == (False, None)
+        assert cache.get(b"a") == (True, 1)
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl(self):
+        """Устаревшая запись не возвращается"""
+        cache = ResultCache(max_bytes=1000, ttl=0.01)
+        cache.put(b"a", 1)
+        time.sleep(0.02)
+        assert cache.get(b"a") == (False, None)
+        assert cache.stats()["entries"] == 0
+
+    def test_key_depends_on_shape(self):
+        """Ключ различает матрицы с одинаковыми элементами разной формы"""
+        assert ResultCache.make_key("rank", [[1, 2, 3, 4]]) != ResultCache.make_key("rank", [[1, 2], [3, 4]])
+        assert ResultCache.make_key("rank", [[1, 2]]) != ResultCache.make_key("determinant", [[1, 2]])
+
+
+class TestBinaryTransport:
+    """Тесты двоичных форматов тела запроса и ответа"""
+
+    def post_binary(self, client, body: bytes, content_type: str, endpoint: str = "/multiply", **headers):
+        return client.post(endpoint, content=body, headers={"Content-Type": content_type, **headers})
+
+    def test_npy_round_trip(self, client):
+        """Матрицы .npy в запросе и ответе"""
+        a = main.Matrix.from_list([[1, 2], [3, 4]])
+        body = encode_npy(a) + encode_npy(main.Matrix.identity(2))
+        response = self.post_binary(client, body, "application/x-npy", Accept="application/x-npy")
+        assert response.status_code == 200
+        assert decode_npy(response.content)[0].to_list() == [[1.0, 2.0], [3.0, 4.0]]
+
+    def test_frames(self, client):
+        """Кадры application/x-matrix"""
+        body = encode_frames(main.Matrix.from_list([[1, 2]]), main.Matrix.from_list([[3], [4]]))
+        response = self.post_binary(client, body, "application/x-matrix")
+        assert response.json() == {"result": [[11.0]]}
+
+    @pytest.mark.parametrize("body", [
+        b"\x93NUMPY\x01\x00",
+        b"\x93NUMPY",
+        b"\x93NUMPY\x01\x00\x10\x00{'descr': 5}    ",
+        b"\x93NUMPY\x01\x00\x30\x00{'descr': '<f8', 'fortran_order': False, 'shape': (-1, 2)}",
+        b"NOTNPY",
+    ])
+    def test_truncated_npy(self, client, body):
+        """Поврежденный .npy - ошибка 400, а не 500"""
+        response = self.post_binary(client, body, "application/x-npy")
+        assert response.status_code == 400
+        assert ".npy" in response.json()["detail"]
+
+    @pytest.mark.parametrize("body", [
+        b"MTX1\x02\x00",
+        b"XXXX" + bytes(8),
+        b"MTX1\x02\x00\x00\x00\x02\x00\x00\x00" + bytes(8),
+    ])
+    def test_bad_frames(self, client, body):
+        """Поврежденные кадры x-matrix - ошибка 400"""
+        response = self.post_binary(client, body, "application/x-matrix")
+        assert response.status_code == 400
+
+    def test_frame_count(self, client):
+        """Не то количество матриц - ошибка 400"""
+        body = encode_frames(main.Matrix.from_list([[1]]))
+        response = self.post_binary(client, body, "application/x-matrix")
+        assert response.status_code == 400
+        assert "Ожидалось матриц" in response.json()["detail"]
+
+    @pytest.mark.parametrize("matrix_a", [
+        [[1, 2], [3]],
+        {"shape": [2, 2, 2], "data": b""},
+        {"shape": "x", "data": b""},
+        {"shape": [1, 1], "data": "abcdefgh"},
+        {"shape": [2, 2]},
+        [["a"]],
+    ])
+    def test_bad_msgpack(self, client, matrix_a):
+        """Неровные строки и неверная форма msgpack - ошибка 400"""
+        if msgpack is None:
+            pytest.skip("msgpack не установлен")
+        body = msgpack.packb({"matrix_a": matrix_a, "matrix_b": [[1]]})
+        response = self.post_binary(client, body, "application/msgpack")
+        assert response.status_code == 400
+
+    def test_decode_errors_are_transport_errors(self):
+        """Все ошибки разбора - TransportError"""
+        with pytest.raises(TransportError):
+            decode_body(b"\x93NUMPY\x01\x00", "application/x-npy", ("matrix",))
+        with pytest.raises(TransportError):
+            decode_body(b"MTX1", "application/x-matrix", ("matrix",))
+
+
+class TestFastJson:
+    """Тесты быстрого разбора JSON: ответы совпадают с разбором через pydantic"""
+
+    @pytest.mark.parametrize("endpoint, body", [
+        ("/multiply", {"matrix_a": [[1, 2]], "matrix_b": [[3], [4]]}),
+        ("/multiply", {"matrix_a": [[1, 2]], "matrix_b": [[3], [4]], "method": "strassen"}),
+        ("/multiply", {"matrix_a": [[1, "a"]], "matrix_b": [[3], [4]]}),
+        ("/multiply", {"matrix_a": [[1, 2], [3]], "matrix_b": [[3], [4]]}),
+        ("/multiply", {"matrix_a": [[1, 2]]}),
+        ("/multiply", {"matrix_a": [[1, 2]], "matrix_b": [[3], [4]], "method": "bogus"}),
+        ("/solve", {"coefficients": [[2, 0], [0, 4]], "constants": [2, 4]}),
+        ("/solve", {"coefficients": [[2, 0], [0, 4]], "constants": [[2, 1], [4, 2]]}),
+        ("/solve", {"coefficients": [[2, 0], [0, 4]], "constants": [2, "x"]}),
+        ("/determinant", {"matrix": []}),
+        ("/determinant", {"matrix": [[True, 2], [3, 4.5]]}),
+        ("/transpose", {"matrix": "not a matrix"}),
+    ])
+    def test_parity(self, client, monkeypatch, endpoint, body):
+        """Одинаковые результаты, ошибки и ответы 422 в обоих режимах"""
+        responses = []
+        for fast in (True, False):
+            monkeypatch.setattr(main, "FAST_JSON", fast)
+            response = client.post(endpoint, json=body, headers={"Cache-Control": "no-cache"})
+            responses.append((response.status_code, response.json()))
+        assert responses[0] == responses[1]
+
+    def test_validation_error_location(self, client):
+        """Ошибка 422 указывает на элемент матрицы"""
+        response = client.post("/multiply", json={"matrix_a": [[1, "a"]], "matrix_b": [[3], [4]]})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "matrix_a", 0, 1]
+
+    def test_invalid_json(self, client):
+        """Некорректный JSON - ошибка 422"""
+        response = client.post("/determinant", content=b"{", headers={"Content-Type": "application/json"})
+        assert response.status_code == 422
+
+
+class TestAdmission:
+    """Тесты допуска задач по стоимости: 429 и 503 с Retry-After"""
+
+    def test_queue_full_503(self, client, monkeypatch):
+        """Заполненная очередь - 503 с Retry-After"""
+        monkeypatch.setattr(main.executor._small, "max_queued", 0)
+        response = client.post("/determinant", json={"matrix": [[1, 2], [3, 4]]},
+                               headers={"Cache-Control": "no-cache"})
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_budget_exceeded_429(self, client, monkeypatch):
+        """Превышение бюджета тяжелыми задачами - 429 с Retry-After"""
+        monkeypatch.setattr(main.executor, "budget", 1.0)
+        monkeypatch.setattr(main.executor, "cost_in_flight", 1.0)
+        a = random_matrix(120, 120, 3)
+        response = client.post("/multiply", json={"matrix_a": a, "matrix_b": a},
+                               headers={"Cache-Control": "no-cache"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_small_jobs_ignore_budget(self, client, monkeypatch):
+        """Легкие задачи не ограничиваются бюджетом"""
+        monkeypatch.setattr(main.executor, "budget", 1.0)
+        monkeypatch.setattr(main.executor, "cost_in_flight", 1.0)
+        response = client.post("/determinant", json={"matrix": [[1, 2], [3, 4]]},
+                               headers={"Cache-Control": "no-cache"})
+        assert response.json() == {"result": -2.0}
+
+    def test_rejected_counter(self, client, monkeypatch):
+        """Отклоненные задачи учитываются в /scheduler/stats"""
+        rejected = client.get("/scheduler/stats").json()["rejected"]
+        monkeypatch.setattr(main.executor._small, "max_queued", 0)
+        client.post("/rank", json={"matrix": [[1]]}, headers={"Cache-Control": "no-cache"})
+        assert client.get("/scheduler/stats").json()["rejected"] == rejected + 1
+
+    def test_slot_released_when_submit_fails(self):
+        """Место в очереди освобождается, если задачу не удалось передать в пул"""
+        async def scenario():
+            executor = ComputeExecutor(workers=1, timeout=1.0)
+
+            def broken_pool(use_processes):
+                raise RuntimeError("пул остановлен")
+
+            executor._pool = broken_pool
+            for _ in range(2):
+                # Без освобождения второй вызов ждал бы занятое место до таймаута
+                with pytest.raises(RuntimeError):
+                    await executor.run(sum, [1, 2], cost=1.0)
+            assert executor.pending == 0 and executor.cost_in_flight == 0
+
+        asyncio.run(scenario())
+
+
+class TestFactorizationStore:
+    """Тесты /solve/factorize, /solve/{handle} и DELETE /solve/{handle}"""
+
+    def factorize(self, client, coefficients) -> dict:
+        return client.post("/solve/factorize", json={"coefficients": coefficients}).json()
+
+    def test_solve_with_handle(self, client):
+        """Разложение решает несколько систем с одной матрицей"""
+        result = self.factorize(client, [[2, 1], [1, 3]])["result"]
+        assert result["size"] == 2
+        handle = result["handle"]
+        first = client.post(f"/solve/{handle}", json={"constants": [3, 4]}).json()
+        assert first["result"] == pytest.approx([1, 1])
+        several = client.post(f"/solve/{handle}", json={"constants": [[3, 1], [4, 3]]}).json()
+        assert several["result"][0] == pytest.approx([1, 0])
+        assert several["result"][1] == pytest.approx([1, 1])
+
+    def test_same_matrix_same_handle(self, client):
+        """Идентификатор зависит только от матрицы"""
+        assert self.factorize(client, [[1, 2], [3, 4]]) == self.factorize(client, [[1, 2], [3, 4]])
+
+    def test_singular(self, client):
+        """Вырожденная матрица - ошибка входных данных"""
+        assert "вырожденная" in self.factorize(client, [[1, 2], [2, 4]])["error"]
+
+    def test_wrong_constants_size(self, client):
+        """Размер правой части не совпадает с разложением"""
+        handle = self.factorize(client, [[2, 1], [1, 3]])["result"]["handle"]
+        assert "error" in client.post(f"/solve/{handle}", json={"constants": [1, 2, 3]}).json()
+
+    def test_delete(self, client):
+        """После удаления разложение недоступно"""
+        handle = self.factorize(client, [[5, 1], [1, 5]])["result"]["handle"]
+        assert client.delete(f"/solve/{handle}").json() == {"status": "ok"}
+        assert client.post(f"/solve/{handle}", json={"constants": [1, 2]}).status_code == 404
+        assert client.delete(f"/solve/{handle}").status_code == 404
+
+    @pytest.mark.parametrize("handle", ["00" * 16, "not-hex"])
+    def test_unknown_handle(self, client, handle):
+        """Неизвестный или некорректный идентификатор - 404"""
+        assert client.post(f"/solve/{handle}", json={"constants": [1]}).status_code == 404
+        assert client.delete(f"/solve/{handle}").status_code == 404
+
+
+def metric_samples(text: str) -> dict:
+    # Значения метрик из текстового формата Prometheus: "имя{метки}" -> значение
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestMetrics:
+    """Тесты /metrics и заголовка Server-Timing"""
+
+    def test_exposition_format(self, client):
+        """Текстовый формат Prometheus с HELP и TYPE для каждой метрики"""
+        client.post("/determinant", json={"matrix": [[1, 2], [3, 4]]})
+        response = client.get("/metrics")
+        assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+        lines = response.text.splitlines()
+        for metric, kind in (("matrix_requests_total", "counter"),
+                             ("matrix_request_duration_seconds", "histogram"),
+                             ("matrix_scheduler_pending", "gauge"),
+                             ("matrix_cache_hit_ratio", "gauge")):
+            assert f"# TYPE {metric} {kind}" in lines
+            assert any(line.startswith(f"# HELP {metric} ") for line in lines)
+        for line in lines:
+            if not line.startswith("#"):
+                float(line.rsplit(" ", 1)[1].replace("+Inf", "inf"))
+
+    def test_request_counters(self, client):
+        """Счетчики по шаблону маршрута, ошибки входных данных и HTTP"""
+        before = metric_samples(client.get("/metrics").text)
+        client.post("/determinant", json={"matrix": [[1, 2], [3, 4]]})
+        client.post("/inverse", json={"matrix": [[1, 2], [2, 4]]})
+        client.post("/solve/abcd", json={"constants": [1]})
+        after = metric_samples(client.get("/metrics").text)
+
+        def delta(name):
+            return after.get(name, 0) - before.get(name, 0)
+
+        assert delta('matrix_requests_total{endpoint="/determinant",method="POST",status="200"}') == 1
+        assert delta('matrix_request_errors_total{endpoint="/inverse",type="input"}') == 1
+        assert delta('matrix_requests_total{endpoint="/solve/{handle}",method="POST",status="404"}') == 1
+        assert delta('matrix_request_errors_total{endpoint="/solve/{handle}",type="http"}') == 1
+        # Запросы к самой /metrics не учитываются
+        assert not any('endpoint="/metrics"' in name for name in after)
+
+    def test_histogram_buckets_cumulative(self):
+        """Корзины гистограммы накопленные, последняя - +Inf"""
+        histogram = Histogram("latency", "Время", ("endpoint",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, "/add")
+        lines = histogram.render()
+        assert 'latency_bucket{endpoint="/add",le="0.1"} 1' in lines
+        assert 'latency_bucket{endpoint="/add",le="1.0"} 2' in lines
+        assert 'latency_bucket{endpoint="/add",le="+Inf"} 3' in lines
+        assert 'latency_count{endpoint="/add"} 3' in lines
+        assert 'latency_sum{endpoint="/add"} 5.55' in lines
+
+    def test_server_timing(self, client):
+        """Заголовок Server-Timing с этапами запроса"""
+        response = client.post("/determinant", json={"matrix": [[1, 2], [3, 4]]},
+                               headers={"Cache-Control": "no-cache"})
+        stages = dict(part.split(";dur=") for part in response.headers["Server-Timing"].split(", "))
+        assert list(stages) == ["parse", "queue", "compute", "serialize", "total"]
+        assert all(float(value) >= 0 for value in stages.values())
+        assert float(stages["total"]) >= float(stages["compute"])
+
+
+class TestDistributedEngine:
+    """Тесты ответа API при недоступных узлах движка distributed"""
+
+    @pytest.fixture
+    def dead_cluster(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            address = probe.getsockname()
+        cluster = distributed.configure_cluster([address], retries=1)
+        default = core.get_default_engine()
+        core.set_default_engine("distributed")
+        yield cluster
+        core.set_default_engine(default)
+        cluster.close()
+
+    def test_unavailable_503(self, client, dead_cluster):
+        """Все узлы недоступны - 503, а не 500"""
+        response = client.post("/multiply", json={"matrix_a": [[1, 2]], "matrix_b": [[3], [4]]},
+                               headers={"Cache-Control": "no-cache"})
+        assert response.status_code == 503
+        assert "недоступны" in response.json()["detail"]
+
+    def test_not_configured_503(self, client, monkeypatch):
+        """Движок distributed без настроенных узлов - 503"""
+        monkeypatch.setattr(distributed, "_cluster", None)
+        monkeypatch.setattr(distributed, "CLUSTER_ADDRESSES", "")
+        default = core.get_default_engine()
+        core.set_default_engine("distributed")
+        try:
+            response = client.post("/multiply", json={"matrix_a": [[1, 2]], "matrix_b": [[3], [4]]},
+                                   headers={"Cache-Control": "no-cache"})
+        finally:
+            core.set_default_engine(default)
+        assert response.status_code == 503
+        assert "Не заданы вычислительные узлы" in response.json()["detail"]
+
+    def test_error_not_cached(self, client, dead_cluster):
+        """Отказ кластера не кэшируется как ошибка входных данных"""
+        body = {"matrix_a": [[1, 2]], "matrix_b": [[3], [4]]}
+        assert client.post("/multiply", json=body).status_code == 503
+        core.set_default_engine("python")
+        assert client.post("/multiply", json=body).json() == {"result": [[11.0]]}
+
+
+def wait_job(client, job_id: str, timeout: float = 5.0) -> dict:
+    # Опрос состояния задачи до завершения
+    deadline = time.monotonic() + timeout
+    while True:
+        summary = client.get(f"/jobs/{job_id}").json()["result"]
+        if summary["status"] not in ("queued", "running") or time.monotonic() > deadline:
+            return summary
+        time.sleep(0.01)
+
+
+def wait_idle(pending: int, timeout: float = 2.0) -> bool:
+    # Ожидание, пока исполнитель не освободит места, занятые задачами теста:
+    # место освобождается в цикле событий клиента, поэтому ждать нужно до его закрытия
+    deadline = time.monotonic() + timeout
+    while main.executor.pending > pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return main.executor.pending == pending
+
+
+class TestJobs:
+    """Тесты асинхронных задач /jobs"""
+
+    @pytest.fixture
+    def blocked(self, client, monkeypatch):
+        # Определитель, который ждет разрешения: задача остается незавершенной
+        pending = main.executor.pending
+        release = threading.Event()
+
+        def waiting(matrix):
+            release.wait(5)
+            return 0.0
+
+        monkeypatch.setitem(main.OPERATIONS, "determinant", (waiting, main.OPERATIONS["determinant"][1]))
+        yield release
+        release.set()
+        wait_idle(pending)
+
+    def test_submit_and_result(self, client):
+        """Задача принимается с 202, результат - в формате синхронного эндпоинта"""
+        response = client.post("/jobs", json={"operation": "determinant", "matrix": [[1, 2], [3, 4]]})
+        assert response.status_code == 202
+        job_id = response.json()["result"]["id"]
+        summary = wait_job(client, job_id)
+        assert summary["status"] == "done"
+        assert summary["progress"] == 1.0
+        assert client.get(f"/jobs/{job_id}/result").json() == {"result": -2.0}
+
+    def test_invalid_request(self, client):
+        """Неизвестная операция и недостающий параметр - ошибка без создания задачи"""
+        jobs = len(main.jobs)
+        assert "Неизвестная операция" in client.post("/jobs", json={"operation": "foo"}).json()["error"]
+        response = client.post("/jobs", json={"operation": "add", "matrix_a": [[1]]})
+        assert "не указан параметр matrix_b" in response.json()["error"]
+        assert len(main.jobs) == jobs
+
+    def test_failed_job(self, client):
+        """Ошибка входных данных сохраняется в задаче"""
+        response = client.post("/jobs", json={"operation": "inverse", "matrix": [[1, 2], [2, 4]]})
+        job_id = response.json()["result"]["id"]
+        summary = wait_job(client, job_id)
+        assert summary["status"] == "failed"
+        assert client.get(f"/jobs/{job_id}/result").json() == {"error": summary["error"]}
+
+    def test_running_job_and_cancel(self, client, blocked):
+        """Результат незавершенной задачи - 409; DELETE отменяет, повторный DELETE удаляет"""
+        job_id = client.post("/jobs", json={"operation": "determinant", "matrix": [[1]]}).json()["result"]["id"]
+        assert client.get(f"/jobs/{job_id}/result").status_code == 409
+        assert client.delete(f"/jobs/{job_id}").json()["result"]["status"] == "cancelled"
+        assert client.get(f"/jobs/{job_id}/result").json() == {"error": "Задача отменена"}
+        client.delete(f"/jobs/{job_id}")
+        assert client.get(f"/jobs/{job_id}").status_code == 404
+
+    @pytest.fixture
+    def endless(self, client, monkeypatch):
+        # Ранг, который пересчитывается до отмены: отчеты о прогрессе идут постоянно
+        pending = main.executor.pending
+        stopped = threading.Event()
+
+        def endless(matrix):
+            try:
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline:
+                    core.rank(matrix, engine="python")
+                return 0
+            finally:
+                stopped.set()
+
+        monkeypatch.setitem(main.OPERATIONS, "rank", (endless, main.OPERATIONS["rank"][1]))
+        yield stopped
+        stopped.wait(5)
+        wait_idle(pending)
+
+    def test_progress_from_listener(self, client, endless):
+        """progress - доля шагов по отчетам алгоритма, а не оценка по времени"""
+        matrix = [[float(i == j) for j in range(5)] for i in range(5)]
+        job_id = client.post("/jobs", json={"operation": "rank", "matrix": matrix}).json()["result"]["id"]
+        deadline = time.monotonic() + 5
+        summary = client.get(f"/jobs/{job_id}").json()["result"]
+        while summary["progress"] == 0.0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+            summary = client.get(f"/jobs/{job_id}").json()["result"]
+        assert summary["status"] == "running"
+        assert summary["progress"] in {0.2, 0.4, 0.6, 0.8, 0.99}
+        client.delete(f"/jobs/{job_id}")
+
+    def test_cancel_stops_computation(self, client, endless):
+        """DELETE прерывает начатое вычисление и освобождает место в очереди"""
+        pending = main.executor.pending
+        job_id = client.post("/jobs", json={"operation": "rank", "matrix": [[1.0, 2.0], [3.0, 4.0]]}).json()
+        job_id = job_id["result"]["id"]
+        deadline = time.monotonic() + 5
+        while client.get(f"/jobs/{job_id}").json()["result"]["status"] != "running":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        client.delete(f"/jobs/{job_id}")
+        assert endless.wait(2)
+        assert wait_idle(pending)
+
+    def test_unknown_job(self, client):
+        """Неизвестная задача - 404"""
+        assert client.get("/jobs/nope").status_code == 404
+        assert client.get("/jobs/nope/result").status_code == 404
+        assert client.delete("/jobs/nope").status_code == 404
+
+    def test_ttl_expiry(self, client, monkeypatch):
+        """Завершенная задача удаляется через ttl секунд"""
+        monkeypatch.setattr(main, "jobs", JobStore())
+        job_id = client.post("/jobs", json={"operation": "rank", "matrix": [[1]]}).json()["result"]["id"]
+        assert wait_job(client, job_id)["status"] == "done"
+        monkeypatch.setattr(main.jobs, "ttl", -1.0)
+        assert client.get(f"/jobs/{job_id}").status_code == 404
+        assert client.get("/jobs").json()["done"] == 0
+
+    def test_max_jobs_503(self, client, blocked, monkeypatch):
+        """Незавершенные задачи не вытесняются: сверх max_jobs - 503 с Retry-After"""
+        monkeypatch.setattr(main, "jobs", JobStore(max_jobs=1))
+        first = client.post("/jobs", json={"operation": "determinant", "matrix": [[1]]})
+        assert first.status_code == 202
+        response = client.post("/jobs", json={"operation": "rank", "matrix": [[1]]})
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        client.delete(f"/jobs/{first.json()['result']['id']}")
+
+
+def receive_until_done(websocket) -> list[dict]:
+    # Сообщения вычисления до итогового (result, error или cancelled)
+    messages = [websocket.receive_json()]
+    while messages[-1]["type"] == "progress":
+        messages.append(websocket.receive_json())
+    return messages
+
+
+class TestComputeStream:
+    """Тесты потокового вычисления /ws/compute"""
+
+    def test_result_with_progress(self, client):
+        """Прогресс завершается сообщением done == total, затем результат"""
+        a = random_matrix(40, 40, 5)
+        b = [sum(row) for row in a]
+        with client.websocket_connect("/ws/compute") as websocket:
+            websocket.send_json({"operation": "solve", "coefficients": a, "constants": b})
+            messages = receive_until_done(websocket)
+        assert messages[-1]["type"] == "result"
+        assert messages[-1]["result"] == pytest.approx([1.0] * 40)
+        progress = messages[:-1]
+        assert progress and progress[-1]["done"] == progress[-1]["total"]
+        assert progress[-1]["progress"] == 1.0
+
+    def test_integer_determinant_progress(self, client):
+        """Определитель целой матрицы (самый частый случай) тоже сообщает о прогрессе"""
+        matrix = [[(i * 7 + j * 3) % 11 + (i == j) * 20 for j in range(30)] for i in range(30)]
+        with client.websocket_connect("/ws/compute") as websocket:
+            websocket.send_json({"operation": "determinant", "matrix": matrix})
+            messages = receive_until_done(websocket)
+        assert messages[-1]["type"] == "result"
+        assert messages[-2] == {"type": "progress", "stage": "elimination", "done": 30, "total": 30,
+                                "progress": 1.0}
+
+    def test_cancel(self, client, monkeypatch):
+        """Сообщение cancel прерывает вычисление на следующем шаге"""
+        def endless(matrix):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                core.rank(matrix, engine="python")
+            return 0
+
+        monkeypatch.setitem(main.OPERATIONS, "rank", (endless, main.OPERATIONS["rank"][1]))
+        with client.websocket_connect("/ws/compute") as websocket:
+            websocket.send_json({"operation": "rank", "matrix": [[1.0, 2.0], [3.0, 4.0]]})
+            assert websocket.receive_json()["type"] == "progress"
+            websocket.send_json({"type": "cancel"})
+            assert receive_until_done(websocket)[-1]["type"] == "cancelled"
+
+    @pytest.mark.parametrize("message, error", [
+        ({"operation": "foo"}, "Неизвестная операция"),
+        ({"operation": "add", "matrix_a": [[1]]}, "не указан параметр matrix_b"),
+        ("nope", "Некорректный запрос"),
+    ])
+    def test_invalid_request(self, client, message, error):
+        """Некорректный запрос - сообщение об ошибке без вычисления"""
+        with client.websocket_connect("/ws/compute") as websocket:
+            if isinstance(message, dict):
+                websocket.send_json(message)
+            else:
+                websocket.send_text(message)
+            response = websocket.receive_json()
+        assert response["type"] == "error"
+        assert error in response["error"]
+
+    def test_input_error(self, client):
+        """Ошибка входных данных приходит сообщением error"""
+        with client.websocket_connect("/ws/compute") as websocket:
+            websocket.send_json({"operation": "inverse", "matrix": [[1, 2], [2, 4]]})
+            assert receive_until_done(websocket)[-1] == {
+                "type": "error", "error": "Матрица вырожденная (определитель = 0), обратной матрицы не существует"}
+
+
+class TestFileOperations:
+    """Тесты операций с матрицами в файлах /files/{operation}"""
+
+    @pytest.fixture
+    def data_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "DATA_DIR", str(tmp_path))
+        with core.FileMatrix.create(tmp_path / "a.npy", 2, 3) as matrix:
+            for i in range(2):
+                for j in range(3):
+                    matrix[i, j] = i * 3 + j
+        return tmp_path
+
+    def test_round_trip(self, client, data_dir):
+        """Результат записывается в файл в каталоге данных"""
+        response = client.post("/files/transpose", json={"inputs": [{"path": "a.npy"}], "output": "t.npy"})
+        assert response.json()["result"] == {"path": "t.npy", "rows": 3, "cols": 2}
+        with core.FileMatrix(data_dir / "t.npy") as result:
+            assert result.to_list() == [[0.0, 3.0], [1.0, 4.0], [2.0, 5.0]]
+
+    def test_path_outside_data_dir(self, client, data_dir):
+        """Путь за пределами каталога данных - ошибка"""
+        response = client.post("/files/transpose", json={"inputs": [{"path": "../a.npy"}]})
+        assert "выходит за пределы каталога данных" in response.json()["error"]
+
+    def test_disabled(self, client, monkeypatch):
+        """Без MATRIX_DATA_DIR операции с файлами недоступны"""
+        monkeypatch.setattr(main, "DATA_DIR", None)
+        assert client.post("/files/add", json={"inputs": []}).status_code == 404
+
+
+class TestTracing:
+    """Тесты трассировки по заголовку X-Matrix-Trace"""
+
+    def test_trace_header(self, client):
+        """Отчет возвращается в заголовке ответа в формате JSON"""
+        response = client.post("/multiply", json={"matrix_a": [[1, 2]], "matrix_b": [[3], [4]]},
+                               headers={"X-Matrix-Trace": "1"})
+        assert response.json() == {"result": [[11.0]]}
+        traces = json.loads(response.headers["X-Matrix-Trace"])
+        assert [span["name"] for span in traces[0]["spans"]][0] == "matrix_multiply"
+        assert traces[0]["spans"][0]["duration"] >= 0
+
+    def test_no_trace_by_default(self, client):
+        """Без заголовка запроса трассировки нет"""
+        response = client.post("/multiply", json={"matrix_a": [[1, 2]], "matrix_b": [[3], [4]]})
+        assert "X-Matrix-Trace" not in response.headers
+
+
+class TestSparse:
+    """Тесты эндпоинтов /sparse/*: матрицы в формате троек (строка, столбец, значение)"""
+
+    A = {"rows": 2, "cols": 2, "entries": [[0, 0, 2.0], [1, 1, 4.0], [0, 1, 1.0]]}
+    B = {"rows": 2, "cols": 3, "entries": [[0, 2, 1.0], [1, 0, 3.0]]}
+
+    def test_add(self, client):
+        """Сумма разреженных матриц - в том же формате"""
+        response = client.post("/sparse/add", json={"matrix_a": self.A, "matrix_b": self.A})
+        assert response.json() == {"result": {"rows": 2, "cols": 2,
+                                              "entries": [[0, 0, 4.0], [0, 1, 2.0], [1, 1, 8.0]]}}
+
+    def test_add_shape_mismatch(self, client):
+        """Разные размерности слагаемых - ошибка"""
+        response = client.post("/sparse/add", json={"matrix_a": self.A, "matrix_b": self.B})
+        assert response.json() == {"error": "Матрицы должны иметь одинаковое количество столбцов"}
+
+    def test_multiply(self, client):
+        """Произведение разреженных матриц"""
+        response = client.post("/sparse/multiply", json={"matrix_a": self.A, "matrix_b": self.B})
+        assert response.json() == {"result": {"rows": 2, "cols": 3,
+                                              "entries": [[0, 0, 3.0], [0, 2, 2.0], [1, 0, 12.0]]}}
+
+    def test_multiply_shape_mismatch(self, client):
+        """Несовместимые размерности сомножителей - ошибка"""
+        response = client.post("/sparse/multiply", json={"matrix_a": self.B, "matrix_b": self.A})
+        assert "Несовместимые размерности для умножения" in response.json()["error"]
+
+    def test_transpose(self, client):
+        """Транспонирование меняет местами индексы"""
+        response = client.post("/sparse/transpose", json={"matrix": self.B})
+        assert response.json() == {"result": {"rows": 3, "cols": 2, "entries": [[0, 1, 3.0], [2, 0, 1.0]]}}
+
+    def test_entry_out_of_range(self, client):
+        """Индекс элемента за пределами размерности - ошибка входных данных"""
+        matrix = {"rows": 2, "cols": 2, "entries": [[2, 0, 1.0]]}
+        response = client.post("/sparse/transpose", json={"matrix": matrix})
+        assert response.json() == {"error": "Индекс элемента (2, 0) выходит за пределы матрицы 2x2"}
+
+    def test_solve(self, client):
+        """Решение прямым методом и GMRES"""
+        response = client.post("/sparse/solve", json={"coefficients": self.A, "constants": [4, 8]})
+        assert response.json() == {"result": [1.0, 2.0]}
+        response = client.post("/sparse/solve", json={"coefficients": self.A, "constants": [4, 8],
+                                                      "method": "gmres"})
+        result = response.json()["result"]
+        assert result["converged"] is True
+        assert result["solution"] == pytest.approx([1.0, 2.0])
+
+    def test_solve_constants_mismatch(self, client):
+        """Размер вектора констант не совпадает с системой - ошибка"""
+        response = client.post("/sparse/solve", json={"coefficients": self.A, "constants": [1]})
+        assert response.json() == {"error": "Размер вектора констант не совпадает с размером системы"}
@@ -0,0 +1,340 @@
+import ast
+import json
+import os
+import struct
+import sys
+from array import array
+
+from backend.matrix_core import Matrix
+
+try:
+    import msgpack
+except ImportError:  # msgpack не обязателен: без него формат недоступен
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # без orjson быстрый путь JSON использует стандартный модуль json
+    orjson = None
+
+# Быстрый разбор JSON для матричных эндпоинтов ("0" - всегда через pydantic)
+FAST_JSON = os.environ.get("MATRIX_FAST_JSON", "1") != "0"
+
+
+# Двоичные форматы матриц. Все они декодируются сразу в буфер Matrix (float64),
+# без создания объекта Python на каждый элемент
+MATRIX_MEDIA_TYPE = "application/x-matrix"
+NPY_MEDIA_TYPE = "application/x-npy"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+BINARY_MEDIA_TYPES = (MATRIX_MEDIA_TYPE, NPY_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Кадр формата application/x-matrix: сигнатура, строки, столбцы (uint32, little-endian),
+# затем rows * cols чисел float64 little-endian построчно
+FRAME_MAGIC = b"MTX1"
+_FRAME_HEADER = struct.Struct("<4sII")
+
+_NPY_MAGIC = b"\x93NUMPY"
+# Типы данных .npy, которые можно прочитать через array
+_NPY_TYPECODES = {"f8": "d", "f4": "f", "i8": "q", "i4": "i", "i2": "h", "i1": "b",
+                  "u8": "Q", "u4": "I", "u2": "H", "u1": "B", "b1": "B"}
+
+
+class TransportError(ValueError):
+    pass
+
+
+def media_type(header: str | None) -> str | None:
+    # Двоичный тип из заголовка Content-Type или Accept (None - JSON)
+    if not header:
+        return None
+    for part in header.split(","):
+        value = part.split(";")[0].strip().lower()
+        if value in BINARY_MEDIA_TYPES:
+            return MSGPACK_MEDIA_TYPE if value == "application/x-msgpack" else value
+    return None
+
+
+def _float64_buffer(raw, little_endian: bool = True) -> array:
+    data = array("d")
+    data.frombytes(raw)
+    if little_endian != (sys.byteorder == "little"):
+        data.byteswap()
+    return data
+
+
+def _little_endian_bytes(data: array) -> bytes:
+    if sys.byteorder == "little":
+        return data.tobytes()
+    swapped = array("d", data)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def decode_frames(raw: bytes) -> list[Matrix]:
+    matrices = []
+    offset = 0
+    view = memoryview(raw)
+    while offset < len(raw):
+        if len(raw) - offset < _FRAME_HEADER.size:
+            raise TransportError("Неполный заголовок матрицы в двоичном запросе")
+        magic, rows, cols = _FRAME_HEADER.unpack_from(raw, offset)
+        if magic != FRAME_MAGIC:
+            raise TransportError("Неверная сигнатура матрицы в двоичном запросе")
+        offset += _FRAME_HEADER.size
+        end = offset + 8 * rows * cols
+        if end > len(raw):
+            raise TransportError("Размер данных не совпадает с размерностью матрицы")
+        matrices.append(Matrix(rows, cols, _float64_buffer(view[offset:end])))
+        offset = end
+    return matrices
+
+
+def encode_frames(*matrices: Matrix) -> bytes:
+    parts = []
+    for matrix in matrices:
+        parts.append(_FRAME_HEADER.pack(FRAME_MAGIC, matrix.rows, matrix.cols))
+        parts.append(_little_endian_bytes(matrix.data))
+    return b"".join(parts)
+
+
+def decode_npy(raw: bytes) -> list[Matrix]:
+    # Одна или несколько подряд записанных структур .npy (как после нескольких numpy.save)
+    matrices = []
+    offset = 0
+    view = memoryview(raw)
+    while offset < len(raw):
+        try:
+            matrix, offset = _decode_npy_array(raw, view, offset)
+        except TransportError:
+            raise
+        except (struct.error, IndexError, ValueError, TypeError):
+            # Обрезанный заголовок, неверные типы полей, отрицательная размерность
+            raise TransportError("Некорректная структура .npy") from None
+        matrices.append(matrix)
+    return matrices
+
+
+def _decode_npy_array(raw: bytes, view: memoryview, offset: int) -> tuple[Matrix, int]:
+    if raw[offset:offset + 6] != _NPY_MAGIC:
+        raise TransportError("Неверная сигнатура .npy")
+    major = raw[offset + 6]
+    if major == 1:
+        (header_length,) = struct.unpack_from("<H", raw, offset + 8)
+        header_start = offset + 10
+    else:
+        (header_length,) = struct.unpack_from("<I", raw, offset + 8)
+        header_start = offset + 12
+    try:
+        header = ast.literal_eval(bytes(view[header_start:header_start + header_length]).decode("latin1"))
+        descr, fortran_order, shape = header["descr"], header["fortran_order"], tuple(header["shape"])
+    except (ValueError, SyntaxError, KeyError, TypeError):
+        raise TransportError("Некорректный заголовок .npy") from None
+
+    if len(shape) == 0:
+        rows, cols = 1, 1
+    elif len(shape) == 1:
+        rows, cols = 1, shape[0]
+    elif len(shape) == 2:
+        rows, cols = shape
+    else:
+        raise TransportError("Поддерживаются только одно- и двумерные массивы .npy")
+    if rows < 0 or cols < 0:
+        raise TransportError("Некорректная размерность массива .npy")
+
+    byte_order, kind = descr[0], descr[1:]
+    if kind not in _NPY_TYPECODES:
+        raise TransportError(f"Неподдерживаемый тип данных .npy: {descr}")
+    typecode = _NPY_TYPECODES[kind]
+    item_size = array(typecode).itemsize
+    start = header_start + header_length
+    end = start + rows * cols * item_size
+    if end > len(raw):
+        raise TransportError("Размер данных не совпадает с размерностью массива .npy")
+
+    little_endian = byte_order != ">"
+    if typecode == "d":
+        data = _float64_buffer(view[start:end], little_endian)
+    else:
+        values = array(typecode)
+        values.frombytes(view[start:end])
+        if item_size > 1 and little_endian != (sys.byteorder == "little"):
+            values.byteswap()
+        data = array("d", values)
+
+    matrix = Matrix(rows, cols, data)
+    if fortran_order and rows > 1 and cols > 1:
+        # Данные по столбцам: буфер содержит транспонированную матрицу
+        column_major = Matrix(cols, rows, data)
+        data = array("d")
+        for j in range(rows):
+            data.extend(column_major.data[j::rows])
+        matrix = Matrix(rows, cols, data)
+    return matrix, end
+
+
+def encode_npy(matrix: Matrix, vector: bool = False) -> bytes:
+    shape = f"({matrix.cols},)" if vector else f"({matrix.rows}, {matrix.cols})"
+    header = f"{{'descr': '<f8', 'fortran_order': False, 'shape': {shape}, }}"
+    # Заголовок дополняется пробелами до кратности 64 байт (формат .npy версии 1.0)
+    padding = 64 - (len(_NPY_MAGIC) + 4 + len(header) + 1) % 64
+    header = header + " " * (padding % 64) + "\n"
+    return _NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1") + \
+        _little_endian_bytes(matrix.data)
+
+
+def _msgpack_value(value, vector: bool):
+    # Матрица в msgpack: {"shape": [rows, cols], "data": <float64 little-endian>} или вложенные списки.
+    # Поле-вектор может быть и матрицей (например, несколько правых частей СЛАУ)
+    try:
+        return _msgpack_matrix(value, vector)
+    except TransportError:
+        raise
+    except (IndexError, ValueError, TypeError):
+        # Неверная размерность, неровные строки, данные не того типа
+        raise TransportError("Некорректная матрица в запросе msgpack") from None
+
+
+def _msgpack_matrix(value, vector: bool):
+    if isinstance(value, dict):
+        try:
+            shape, raw = value["shape"], value["data"]
+        except KeyError:
+            raise TransportError("Матрица msgpack должна содержать поля shape и data") from None
+        vector = vector and len(shape) == 1
+        rows, cols = (1, shape[0]) if len(shape) == 1 else shape
+        if not isinstance(raw, bytes) or rows < 0 or cols < 0 or len(raw) != 8 * rows * cols:
+            raise TransportError("Размер данных не совпадает с размерностью матрицы")
+        matrix = Matrix(rows, cols, _float64_buffer(raw))
+    else:
+        vector = vector and not (isinstance(value, list) and value and isinstance(value[0], list))
+        try:
+            matrix = Matrix(1, len(value), value) if vector else Matrix.from_list(value)
+        except TypeError:
+            raise TransportError("Матрица msgpack должна состоять из чисел") from None
+        except ValueError as e:
+            raise TransportError(f"Некорректная матрица в запросе msgpack: {e}") from None
+    return matrix.data if vector else matrix
+
+
+def decode_body(raw: bytes, content_type: str, matrix_fields: tuple, vector_fields: tuple = ()) -> dict:
+    # Поля запроса из двоичного тела. Для x-matrix и .npy матрицы идут подряд
+    # в порядке полей модели, векторы передаются как матрицы из одной строки
+    # (матрица из нескольких строк в поле-векторе остается матрицей)
+    fields = matrix_fields + vector_fields
+    if content_type == MSGPACK_MEDIA_TYPE:
+        if msgpack is None:
+            raise TransportError("Формат msgpack недоступен: модуль msgpack не установлен")
+        try:
+            payload = msgpack.unpackb(raw, raw=False)
+        except Exception:
+            raise TransportError("Некорректное тело запроса msgpack") from None
+        if not isinstance(payload, dict):
+            raise TransportError("Тело запроса msgpack должно быть словарем")
+        result = {}
+        for name, value in payload.items():
+            if name in fields:
+                result[name] = _msgpack_value(value, name in vector_fields)
+            else:
+                result[name] = value
+        missing = [name for name in fields if name not in result]
+        if missing:
+            raise TransportError(f"В запросе отсутствуют поля: {', '.join(missing)}")
+        return result
+
+    matrices = decode_npy(raw) if content_type == NPY_MEDIA_TYPE else decode_frames(raw)
+    if len(matrices) != len(fields):
+        raise TransportError(f"Ожидалось матриц в запросе: {len(fields)}, получено: {len(matrices)}")
+    result = dict(zip(fields, matrices))
+    for name in vector_fields:
+        if result[name].rows == 1:
+            result[name] = result[name].data
+    return result
+
+
+def encode_result(result, content_type: str) -> bytes:
+    # Результат в двоичном виде: матрица, вектор (одна строка) или скаляр (1x1)
+    vector = False
+    if isinstance(result, Matrix):
+        matrix = result
+    elif isinstance(result, list) and result and isinstance(result[0], list):
+        matrix = Matrix.from_list(result)
+    elif isinstance(result, (list, array)):
+        matrix = Matrix(1, len(result), result)
+        vector = True
+    else:
+        matrix = Matrix(1, 1, [result])
+
+    if content_type == MSGPACK_MEDIA_TYPE:
+        if msgpack is None:
+            raise TransportError("Формат msgpack недоступен: модуль msgpack не установлен")
+        if isinstance(result, (int, float)):
+            return msgpack.packb({"result": result})
+        shape = [matrix.cols] if vector else [matrix.rows, matrix.cols]
+        return msgpack.packb({"result": {"shape": shape, "data": _little_endian_bytes(matrix.data)}})
+    if content_type == NPY_MEDIA_TYPE:
+        return encode_npy(matrix, vector)
+    return encode_frames(matrix)
+
+
+def json_loads(raw: bytes):
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def json_dumps(payload) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload)
+        except TypeError:
+            # orjson не сериализует целые больше 64 бит (точные результаты)
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _matrix_from_json(value) -> Matrix | None:
+    # Проверка формы и типа за один проход: строки копируются в буфер целиком,
+    # нечисловой элемент обнаруживает сам array.fromlist
+    if type(value) is not list:
+        return None
+    cols = len(value[0]) if value and type(value[0]) is list else 0
+    data = array("d")
+    try:
+        for row in value:
+            if type(row) is not list or len(row) != cols:
+                return None
+            data.fromlist(row)
+    except TypeError:
+        return None
+    return Matrix(len(value), cols, data)
+
+
+def _vector_from_json(value) -> array | None:
+    if type(value) is not list:
+        return None
+    data = array("d")
+    try:
+        data.fromlist(value)
+    except TypeError:
+        return None
+    return data
+
+
+def parse_json_fields(raw: bytes, matrix_fields: tuple, vector_fields: tuple = ()) -> tuple[dict, dict] | None:
+    # Матрицы и векторы JSON-запроса в виде буферов и остальные поля запроса.
+    # None - запрос не подходит для быстрого пути (ошибка, неровные строки,
+    # строки вместо чисел и т.п.) и должен разбираться pydantic, как раньше
+    try:
+        payload = json_loads(raw)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+
+    fields = {}
+    for name in matrix_fields + vector_fields:
+        value = payload.pop(name, None)
+        vector = name in vector_fields and not (type(value) is list and value and type(value[0]) is list)
+        converted = _vector_from_json(value) if vector else _matrix_from_json(value)
+        if converted is None:
+            return None
+        fields[name] = converted
+    return fields, payload
@@ -0,0 +1,422 @@
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+
+# Добавляем родительскую директорию в путь Python
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+sys.path.append(str(parent_dir))
+
+from backend.matrix_core import (
+    SparseMatrix,
+    determinant_optimized,
+    get_default_engine,
+    inverse,
+    lu_factorize,
+    matrix_add,
+    matrix_multiply,
+    rank,
+    set_default_engine,
+    set_parallel_workers,
+    shutdown_parallel_pool,
+    solve_iterative,
+    solve_system_gaussian,
+    transpose,
+)
+
+
+def naive_multiply(a: list[list], b: list[list]) -> list[list]:
+    # Исходный тройной цикл с обходом B по столбцам - эталон для сравнения
+    rows_a, cols_a, cols_b = len(a), len(a[0]), len(b[0])
+    result = [[0 for _ in range(cols_b)] for _ in range(rows_a)]
+    for i in range(rows_a):
+        for j in range(cols_b):
+            for k in range(cols_a):
+                result[i][j] += a[i][k] * b[k][j]
+    return result
+
+
+def random_matrix(rows: int, cols: int, seed: int = 0) -> list[list]:
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) for _ in range(cols)] for _ in range(rows)]
+
+
+def integer_matrix(rows: int, cols: int, seed: int = 0) -> list[list]:
+    rng = random.Random(seed)
+    return [[rng.randint(-9, 9) for _ in range(cols)] for _ in range(rows)]
+
+
+def structured_matrix(rows: int, cols: int, seed: int = 0) -> list[list]:
+    # Трехдиагональная матрица с диагональным преобладанием (симметричная
+    # положительно определенная, если квадратная) - типичная матрица разностной схемы
+    return [[4.0 if i == j else -1.0 if abs(i - j) == 1 else 0.0 for j in range(cols)] for i in range(rows)]
+
+
+def sparse_matrix(rows: int, cols: int, seed: int = 0, per_row: int = 3) -> SparseMatrix:
+    # Несколько случайных элементов в строке и диагональ, преобладающая над ними
+    rng = random.Random(seed)
+    entries = [(i, i, float(per_row + 1)) for i in range(min(rows, cols))]
+    for i in range(rows):
+        entries.extend((i, rng.randrange(cols), rng.uniform(-1, 1)) for _ in range(per_row))
+    return SparseMatrix.from_coo(rows, cols, entries)
+
+
+def sparse_spd_matrix(rows: int, cols: int, seed: int = 0, per_row: int = 3) -> SparseMatrix:
+    # Симметричная разреженная матрица с диагональным преобладанием - положительно
+    # определенная, на ней сходится метод сопряженных градиентов
+    rng = random.Random(seed)
+    n = min(rows, cols)
+    entries = [(i, i, float(2 * per_row + 1)) for i in range(n)]
+    for i in range(n):
+        for _ in range(per_row):
+            j, value = rng.randrange(n), rng.uniform(-1, 1)
+            if j != i:
+                entries.extend([(i, j, value), (j, i, value)])
+    return SparseMatrix.from_coo(rows, cols, entries)
+
+
+def random_vector(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    return [rng.uniform(-1, 1) for _ in range(n)]
+
+
+# Виды входных данных: функция (строки, столбцы, seed) -> матрица
+INPUTS = {
+    "dense": random_matrix,
+    "integer": integer_matrix,
+    "structured": structured_matrix,
+    "sparse": sparse_matrix,
+    "sparse_spd": sparse_spd_matrix,
+}
+
+ALL_KINDS = tuple(INPUTS)
+# Итерационные методы сходятся только на матрицах с подходящей структурой:
+# GMRES с ILU(0) - на матрицах с диагональным преобладанием, метод сопряженных
+# градиентов - только на симметричных положительно определенных
+ITERATIVE_KINDS = ("structured", "sparse", "sparse_spd")
+SPD_KINDS = ("structured", "sparse_spd")
+
+
+def _two_square(make, n):
+    return make(n, n, 1), make(n, n, 2)
+
+
+def _one_square(make, n):
+    return (make(n, n, 1),)
+
+
+def _system(make, n):
+    return make(n, n, 1), random_vector(n, 2)
+
+
+def _rectangular_product(make, n):
+    # Прямоугольные сомножители: (n x 2n) * (2n x n/2)
+    return make(n, 2 * n, 1), make(2 * n, max(n // 2, 1), 2)
+
+
+def _factorized_system(make, n):
+    # Разложение строится до замера, измеряется только прямой и обратный ход
+    return lu_factorize(make(n, n, 1)), random_vector(n, 2)
+
+
+def _lu_solve(factorization, constants):
+    return factorization.solve(constants)
+
+
+# Операции: имя -> (функция, построение аргументов по виду данных и размеру,
+# допустимые виды данных, максимальный размер или None)
+OPERATIONS = {
+    "add": (matrix_add, _two_square, ALL_KINDS, None),
+    "multiply": (matrix_multiply, _two_square, ALL_KINDS, None),
+    "multiply:rectangular": (matrix_multiply, _rectangular_product, ALL_KINDS, None),
+    "multiply:strassen": (partial(matrix_multiply, method="strassen"), _two_square, ("dense", "integer"), None),
+    "multiply:parallel": (partial(matrix_multiply, method="parallel"), _two_square, ("dense", "integer"), None),
+    "transpose": (transpose, _one_square, ALL_KINDS, None),
+    "determinant": (determinant_optimized, _one_square, ALL_KINDS, None),
+    "inverse": (inverse, _one_square, ALL_KINDS, None),
+    "rank": (rank, _one_square, ALL_KINDS, None),
+    "solve": (solve_system_gaussian, _system, ALL_KINDS, None),
+    "factorize": (lu_factorize, _one_square, ALL_KINDS, None),
+    "lu_solve": (_lu_solve, _factorized_system, ALL_KINDS, None),
+    "solve:cg": (partial(solve_iterative, method="cg"), _system, SPD_KINDS, None),
+    "solve:gmres": (partial(solve_iterative, method="gmres", preconditioner="ilu0"), _system, ITERATIVE_KINDS, None),
+    # Рациональные числа растут с размером, поэтому точный режим ограничен
+    "determinant:exact": (partial(determinant_optimized, engine="exact"), _one_square, ("integer",), 200),
+    "solve:exact": (partial(solve_system_gaussian, engine="exact"), _system, ("integer",), 100),
+}
+
+
+def time_call(func, *args, repeat: int = 3) -> float:
+    # Минимальное время из нескольких запусков, секунды
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def percentile(values: list, q: float) -> float:
+    # Перцентиль по ближайшему рангу (для небольшого числа замеров)
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def measure(func, *args, repeat: int = 5, warmup: int = 1, memory: bool = True) -> dict:
+    # Медиана и 95-й перцентиль времени по repeat запускам после прогрева;
+    # пиковая память измеряется отдельным запуском, так как tracemalloc замедляет код
+    for _ in range(warmup):
+        func(*args)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func(*args)
+        times.append(time.perf_counter() - start)
+
+    result = {
+        "runs": repeat,
+        "median_seconds": statistics.median(times),
+        "p95_seconds": percentile(times, 95),
+        "min_seconds": min(times),
+    }
+    if isinstance(value, dict) and "converged" in value:
+        # Итерационный метод: время без сходимости - не стоимость решения
+        result["converged"] = value["converged"]
+    if memory:
+        tracemalloc.start()
+        try:
+            func(*args)
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_suite(operations=None, kinds=None, sizes=(10, 50, 100, 200), repeat: int = 5,
+              memory: bool = True, progress=None) -> list[dict]:
+    results = []
+    for name in operations or OPERATIONS:
+        func, build, allowed, max_size = OPERATIONS[name]
+        for kind in kinds or ALL_KINDS:
+            if kind not in allowed:
+                continue
+            for n in sizes:
+                if max_size is not None and n > max_size:
+                    continue
+                item = {"operation": name, "kind": kind, "size": n}
+                try:
+                    args = build(INPUTS[kind], n)
+                    item.update(measure(func, *args, repeat=repeat, memory=memory))
+                except ValueError as e:
+                    # Например, случайная целочисленная матрица оказалась вырожденной
+                    item["error"] = str(e)
+                results.append(item)
+                if progress is not None:
+                    progress(item)
+    return results
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "engine": get_default_engine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def result_key(item: dict) -> tuple:
+    # Операция ядра или эндпоинт API (с форматом тела запроса)
+    name = item.get("operation", item.get("endpoint"))
+    if "transport" in item:
+        name = f"{name}[{item['transport']}]"
+    return name, item["kind"], item["size"]
+
+
+def write_results(path, results: list[dict]) -> None:
+    Path(path).write_text(json.dumps({"environment": environment(), "results": results}, indent=2,
+                                     ensure_ascii=False), encoding="utf-8")
+
+
+def load_results(path) -> list[dict]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))["results"]
+
+
+def compare_results(results: list[dict], baseline: list[dict], threshold: float = 0.2,
+                    min_seconds: float = 1e-3) -> list[dict]:
+    # Регрессии относительно сохраненного прогона: медиана времени или пиковая
+    # память выросли больше чем в (1 + threshold) раз. Замеры быстрее min_seconds
+    # в обоих прогонах не сравниваются - их разброс больше любого порога, как и
+    # прогоны итерационных методов без сходимости
+    previous = {result_key(item): item for item in baseline}
+    regressions = []
+    for item in results:
+        old = previous.get(result_key(item))
+        if old is None or "median_seconds" not in item or "median_seconds" not in old:
+            continue
+        if item.get("converged") is False or old.get("converged") is False:
+            continue
+        metrics = ["peak_bytes"]
+        if max(item["median_seconds"], old["median_seconds"]) >= min_seconds:
+            metrics.insert(0, "median_seconds")
+        for metric in metrics:
+            if not old.get(metric) or metric not in item:
+                continue
+            ratio = item[metric] / old[metric]
+            if ratio > 1 + threshold:
+                regressions.append({"key": "/".join(map(str, result_key(item))), "metric": metric,
+                                    "baseline": old[metric], "current": item[metric], "ratio": ratio})
+    return regressions
+
+
+def print_result(item: dict) -> None:
+    name = item.get("operation", item.get("endpoint"))
+    if "error" in item:
+        print(f"{name:>22} {item['kind']:>10} {item['size']:>6}  ошибка: {item['error']}")
+        return
+    peak = f"{item['peak_bytes'] / 1024:.0f}" if "peak_bytes" in item else "-"
+    note = "  не сошелся" if item.get("converged") is False else ""
+    print(f"{name:>22} {item['kind']:>10} {item['size']:>6} {item['median_seconds']:>12.5f} "
+          f"{item['p95_seconds']:>12.5f} {peak:>10}{note}")
+
+
+def print_header() -> None:
+    print(f"{'operation':>22} {'kind':>10} {'n':>6} {'median, s':>12} {'p95, s':>12} {'peak, KiB':>10}")
+
+
+def print_regressions(regressions: list[dict], threshold: float) -> None:
+    if not regressions:
+        print(f"Регрессий больше {threshold:.0%} нет")
+        return
+    print(f"Регрессии больше {threshold:.0%}:")
+    for item in regressions:
+        print(f"  {item['key']} {item['metric']}: {item['baseline']:.6g} -> {item['current']:.6g} "
+              f"({item['ratio']:.2f}x)")
+
+
+def benchmark_multiply(sizes=(50, 100, 200, 300, 500), repeat: int = 3, naive_limit: int = 300) -> list[dict]:
+    results = []
+    for n in sizes:
+        a = random_matrix(n, n, seed=n)
+        b = random_matrix(n, n, seed=n + 1)
+
+        kernel = time_call(matrix_multiply, a, b, repeat=repeat)
+        # Исходный алгоритм на больших размерах слишком медленный для повторов
+        naive = time_call(naive_multiply, a, b, repeat=1) if n <= naive_limit else None
+
+        results.append({
+            "size": n,
+            "kernel_seconds": kernel,
+            "naive_seconds": naive,
+            "speedup": naive / kernel if naive is not None else None,
+        })
+    return results
+
+
+def print_multiply_report(results: list[dict]) -> None:
+    print(f"{'n':>6} {'naive, s':>10} {'kernel, s':>10} {'speedup':>8}")
+    for item in results:
+        naive = f"{item['naive_seconds']:.4f}" if item["naive_seconds"] is not None else "-"
+        speedup = f"{item['speedup']:.1f}x" if item["speedup"] is not None else "-"
+        print(f"{item['size']:>6} {naive:>10} {item['kernel_seconds']:>10.4f} {speedup:>8}")
+
+
+def benchmark_parallel(sizes=(200, 400, 800), workers=(1, 2, 4, 8), repeat: int = 3) -> list[dict]:
+    # Ускорение параллельного умножения относительно однопроцессного ядра.
+    # Пул создается до замера: первый вызов с новым числом процессов не измеряется
+    results = []
+    for n in sizes:
+        a = random_matrix(n, n, seed=n)
+        b = random_matrix(n, n, seed=n + 1)
+        serial = time_call(matrix_multiply, a, b, repeat=repeat)
+        for count in workers:
+            set_parallel_workers(count)
+            matrix_multiply(a, b, method="parallel")
+            seconds = time_call(partial(matrix_multiply, method="parallel"), a, b, repeat=repeat)
+            results.append({
+                "size": n,
+                "workers": count,
+                "serial_seconds": serial,
+                "parallel_seconds": seconds,
+                "speedup": serial / seconds,
+                "efficiency": serial / seconds / count,
+            })
+    shutdown_parallel_pool()
+    return results
+
+
+def print_parallel_report(results: list[dict]) -> None:
+    print(f"{'n':>6} {'workers':>8} {'serial, s':>10} {'parallel, s':>12} {'speedup':>8} {'efficiency':>10}")
+    for item in results:
+        print(f"{item['size']:>6} {item['workers']:>8} {item['serial_seconds']:>10.4f} "
+              f"{item['parallel_seconds']:>12.4f} {item['speedup']:>7.2f}x {item['efficiency']:>10.0%}")
+
+
+def add_suite_arguments(parser: argparse.ArgumentParser, sizes: list, kinds: tuple) -> None:
+    # Общие параметры прогона и сравнения (используются и бенчмарком API)
+    parser.add_argument("--sizes", type=int, nargs="+", default=sizes)
+    parser.add_argument("--kinds", nargs="+", choices=kinds, default=None,
+                        help="виды входных данных (по умолчанию все)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-memory", action="store_true", help="не измерять пиковую память")
+    parser.add_argument("--output", help="файл JSON для результатов")
+    parser.add_argument("--baseline", help="файл JSON с результатами предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимый относительный рост времени и памяти (0.2 = 20%%)")
+    parser.add_argument("--min-time", type=float, default=1e-3,
+                        help="замеры быстрее этого времени (с) не сравниваются с базовыми")
+
+
+def finish_suite(args, results: list[dict]) -> int:
+    # Запись результатов и сравнение с базовым прогоном; код возврата 1 при регрессиях
+    if args.output:
+        write_results(args.output, results)
+    if not args.baseline:
+        return 0
+    regressions = compare_results(results, load_results(args.baseline), args.threshold, args.min_time)
+    print_regressions(regressions, args.threshold)
+    return 1 if regressions else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарки matrix_core")
+    add_suite_arguments(parser, [10, 50, 100, 200], ALL_KINDS)
+    parser.add_argument("--operations", nargs="+", choices=list(OPERATIONS), default=None,
+                        help="операции (по умолчанию все)")
+    parser.add_argument("--engine", default=None, help="вычислительный движок по умолчанию")
+    parser.add_argument("--compare-naive", action="store_true",
+                        help="только сравнить ядро умножения с исходным алгоритмом")
+    parser.add_argument("--naive-limit", type=int, default=300,
+                        help="максимальный размер, для которого запускается исходный алгоритм")
+    parser.add_argument("--parallel-scaling", action="store_true",
+                        help="только измерить ускорение параллельного умножения по числу процессов")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8],
+                        help="числа процессов для --parallel-scaling")
+    args = parser.parse_args(argv)
+
+    if args.engine is not None:
+        set_default_engine(args.engine)
+    if args.compare_naive:
+        print_multiply_report(benchmark_multiply(args.sizes, args.repeat, args.naive_limit))
+        return 0
+    if args.parallel_scaling:
+        print_parallel_report(benchmark_parallel(args.sizes, args.workers, args.repeat))
+        return 0
+
+    print_header()
+    results = run_suite(args.operations, args.kinds, args.sizes, args.repeat, not args.no_memory,
+                        progress=print_result)
+    return finish_suite(args, results)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
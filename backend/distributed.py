@@ -0,0 +1,471 @@
+import argparse
+import contextvars
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from array import array
+from operator import sub
+from pathlib import Path
+
+# Добавляем родительскую директорию в путь Python
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+sys.path.append(str(parent_dir))
+
+from backend.matrix_core import (
+    EngineUnavailableError,
+    LUFactorization,
+    Matrix,
+    _PIVOT_EPS,
+    _annotate,
+    _count,
+    matrix_multiply,
+    register_engine,
+    solve_system_gaussian,
+)
+
+
+# Распределенные вычисления: координатор делит умножение на блоки (и обновления
+# хвостовой подматрицы в блочном LU-разложении для СЛАУ) и рассылает их узлам по TCP.
+# Узел - процесс `python backend/distributed.py worker`, который считает блоки
+# ядрами matrix_core. Задачи с потерянного узла переотправляются другим узлам.
+# Движок "distributed": matrix_multiply(a, b, engine="distributed")
+
+# Узлы по умолчанию: "host:port,host:port"
+CLUSTER_ADDRESSES = os.environ.get("MATRIX_CLUSTER", "")
+# Сторона квадратного блока результата, который считается одной задачей
+CLUSTER_BLOCK_SIZE = int(os.environ.get("MATRIX_CLUSTER_BLOCK_SIZE", "256"))
+# Ожидание ответа узла, секунды; дольше - узел считается потерянным
+CLUSTER_TIMEOUT = float(os.environ.get("MATRIX_CLUSTER_TIMEOUT", "300"))
+# Сколько раз подряд узел может не ответить, прежде чем координатор перестанет его использовать
+CLUSTER_RETRIES = int(os.environ.get("MATRIX_CLUSTER_RETRIES", "3"))
+
+
+class ClusterError(EngineUnavailableError):
+    pass
+
+
+# Сообщение: длина заголовка (uint32 little-endian), заголовок JSON, затем матрицы
+# в формате кадра application/x-matrix (MTX1, строки, столбцы, float64 little-endian)
+_LENGTH = struct.Struct("<I")
+_FRAME = struct.Struct("<4sII")
+_FRAME_MAGIC = b"MTX1"
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Соединение закрыто")
+        received += count
+    return buffer
+
+
+def send_message(sock: socket.socket, header: dict, matrices=()) -> None:
+    encoded = json.dumps({**header, "matrices": len(matrices)}).encode()
+    parts = [_LENGTH.pack(len(encoded)), encoded]
+    for matrix in matrices:
+        data = matrix.data
+        if sys.byteorder != "little":
+            data = array("d", data)
+            data.byteswap()
+        parts.append(_FRAME.pack(_FRAME_MAGIC, matrix.rows, matrix.cols))
+        parts.append(data.tobytes())
+    sock.sendall(b"".join(parts))
+
+
+def recv_message(sock: socket.socket) -> tuple[dict, list[Matrix]]:
+    (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    header = json.loads(_recv_exact(sock, length))
+    matrices = []
+    for _ in range(header.get("matrices", 0)):
+        magic, rows, cols = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+        if magic != _FRAME_MAGIC:
+            raise ConnectionError("Неверная сигнатура матрицы в сообщении")
+        data = array("d")
+        data.frombytes(_recv_exact(sock, 8 * rows * cols))
+        if sys.byteorder != "little":
+            data.byteswap()
+        matrices.append(Matrix(rows, cols, data))
+    return header, matrices
+
+
+# Операции узла: имя -> функция от матриц сообщения, возвращающая матрицу
+def _multiply_block(a: Matrix, b: Matrix) -> Matrix:
+    return matrix_multiply(a, b)
+
+
+def _update_block(c: Matrix, a: Matrix, b: Matrix) -> Matrix:
+    # C - A * B: обновление хвостовой подматрицы LU-разложения
+    product = matrix_multiply(a, b)
+    return Matrix(c.rows, c.cols, array("d", map(sub, c.data, product.data)))
+
+
+WORKER_OPERATIONS = {
+    "multiply": _multiply_block,
+    "update": _update_block,
+}
+
+
+class _WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                header, matrices = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            operation = header.get("op")
+            if operation == "ping":
+                send_message(self.request, {"ok": True})
+                continue
+            if operation not in WORKER_OPERATIONS:
+                send_message(self.request, {"error": f"Неизвестная операция: {operation}"})
+                continue
+            try:
+                result = WORKER_OPERATIONS[operation](*matrices)
+            except (ValueError, TypeError) as e:
+                send_message(self.request, {"error": str(e)})
+                continue
+            send_message(self.request, {"ok": True}, [result])
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _WorkerHandler)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server_address[:2]
+
+
+class _Connection:
+    def __init__(self, address: tuple[str, int], timeout: float):
+        self.address = address
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def call(self, operation: str, matrices) -> Matrix:
+        send_message(self.sock, {"op": operation}, matrices)
+        header, result = recv_message(self.sock)
+        if "error" in header:
+            # Ошибка вычисления на узле не исправится переотправкой
+            raise ClusterError(f"Узел {self.address[0]}:{self.address[1]}: {header['error']}")
+        return result[0]
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def parse_addresses(value) -> list[tuple[str, int]]:
+    # "host:port,host:port" или список пар (host, port)
+    if isinstance(value, str):
+        value = [part.strip() for part in value.split(",") if part.strip()]
+    addresses = []
+    for item in value:
+        if isinstance(item, str):
+            host, _, port = item.rpartition(":")
+            if not host or not port.isdigit():
+                raise ValueError(f"Некорректный адрес узла: {item}")
+            item = (host, int(port))
+        addresses.append((item[0], int(item[1])))
+    return addresses
+
+
+class Cluster:
+    # Координатор: очередь блочных задач и по потоку на каждый узел. Поток узла
+    # держит постоянное соединение и берет задачи из общей очереди; если узел
+    # не ответил, задача возвращается в очередь и ее забирает другой узел.
+    # Узел, не ответивший retries раз подряд, выбывает до следующего run()
+    def __init__(self, addresses, block_size: int = CLUSTER_BLOCK_SIZE, timeout: float = CLUSTER_TIMEOUT,
+                 retries: int = CLUSTER_RETRIES):
+        self.addresses = parse_addresses(addresses)
+        if not self.addresses:
+            raise ValueError("Не заданы вычислительные узлы")
+        if block_size < 1:
+            raise ValueError("Размер блока должен быть положительным")
+        self.block_size = block_size
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self._connections = {}
+        self._lock = threading.Lock()
+
+    def ping(self) -> dict:
+        # Доступность узлов: адрес -> True/False
+        status = {}
+        for address in self.addresses:
+            try:
+                connection = _Connection(address, self.timeout)
+            except OSError:
+                status[f"{address[0]}:{address[1]}"] = False
+                continue
+            try:
+                send_message(connection.sock, {"op": "ping"})
+                status[f"{address[0]}:{address[1]}"] = bool(recv_message(connection.sock)[0].get("ok"))
+            except OSError:
+                status[f"{address[0]}:{address[1]}"] = False
+            finally:
+                connection.close()
+        return status
+
+    def run(self, tasks: list[tuple[str, list]]) -> list[Matrix]:
+        # Задачи (операция узла, матрицы) -> результаты в том же порядке
+        with self._lock:
+            return self._run(tasks)
+
+    def _run(self, tasks):
+        results = [None] * len(tasks)
+        pending = queue.Queue()
+        for index in range(len(tasks)):
+            pending.put(index)
+        state = {"remaining": len(tasks), "error": None}
+        state_lock = threading.Lock()
+
+        def serve(address):
+            failures = 0
+            while True:
+                with state_lock:
+                    if state["remaining"] == 0 or state["error"] is not None:
+                        return
+                try:
+                    index = pending.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                try:
+                    connection = self._connections.get(address)
+                    if connection is None:
+                        connection = self._connections[address] = _Connection(address, self.timeout)
+                    operation, matrices = tasks[index]
+                    results[index] = connection.call(operation, matrices)
+                except ClusterError as e:
+                    with state_lock:
+                        state["error"] = e
+                    return
+                except (OSError, ValueError):
+                    # Узел недоступен или оборвал соединение: задача уходит другому узлу
+                    connection = self._connections.pop(address, None)
+                    if connection is not None:
+                        connection.close()
+                    pending.put(index)
+                    _count("retries")
+                    failures += 1
+                    if failures >= self.retries:
+                        return
+                    time.sleep(0.05 * failures)
+                    continue
+                failures = 0
+                _count("remote_tasks")
+                with state_lock:
+                    state["remaining"] -= 1
+
+        # Трассировка (ContextVar) продолжается в потоках узлов
+        threads = [threading.Thread(target=contextvars.copy_context().run, args=(serve, address), daemon=True)
+                   for address in self.addresses]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if state["error"] is not None:
+            raise state["error"]
+        if state["remaining"]:
+            raise ClusterError("Все вычислительные узлы недоступны")
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._connections.clear()
+
+
+_cluster = None
+
+
+def configure_cluster(addresses, **options) -> Cluster:
+    # Узлы движка "distributed"; без вызова берутся из MATRIX_CLUSTER
+    global _cluster
+    if _cluster is not None:
+        _cluster.close()
+    _cluster = Cluster(addresses, **options)
+    return _cluster
+
+
+def get_cluster() -> Cluster:
+    global _cluster
+    if _cluster is None:
+        if not CLUSTER_ADDRESSES:
+            raise ClusterError("Не заданы вычислительные узлы: переменная MATRIX_CLUSTER или configure_cluster()")
+        _cluster = Cluster(CLUSTER_ADDRESSES)
+    return _cluster
+
+
+def _submatrix(matrix: Matrix, row_start: int, row_stop: int, col_start: int, col_stop: int) -> Matrix:
+    cols = matrix.cols
+    data = array("d")
+    for i in range(row_start, row_stop):
+        data.extend(matrix.data[i * cols + col_start:i * cols + col_stop])
+    return Matrix(row_stop - row_start, col_stop - col_start, data)
+
+
+def _put_submatrix(matrix: Matrix, row_start: int, col_start: int, block: Matrix) -> None:
+    cols, width = matrix.cols, block.cols
+    for i in range(block.rows):
+        start = (row_start + i) * cols + col_start
+        matrix.data[start:start + width] = block.data[i * width:(i + 1) * width]
+
+
+def _bounds(size: int, step: int) -> list[tuple[int, int]]:
+    return [(start, min(size, start + step)) for start in range(0, size, step)]
+
+
+def distributed_multiply(a: list[list], b: list[list], cluster: Cluster | None = None) -> list[list]:
+    # Блок (I, J) результата - задача узлу: полоса строк A и полоса столбцов B
+    cluster = cluster or get_cluster()
+    _annotate("algorithm", "distributed")
+    a, b = Matrix.from_list(a), Matrix.from_list(b)
+    step = cluster.block_size
+    row_blocks, col_blocks = _bounds(a.rows, step), _bounds(b.cols, step)
+    a_panels = [_submatrix(a, start, stop, 0, a.cols) for start, stop in row_blocks]
+    b_panels = [_submatrix(b, 0, b.rows, start, stop) for start, stop in col_blocks]
+    _count("flops", 2 * a.rows * a.cols * b.cols)
+
+    tasks = [("multiply", [a_panel, b_panel]) for a_panel in a_panels for b_panel in b_panels]
+    blocks = iter(cluster.run(tasks))
+    result = Matrix(a.rows, b.cols)
+    for row_start, _ in row_blocks:
+        for col_start, _ in col_blocks:
+            _put_submatrix(result, row_start, col_start, next(blocks))
+    return result.to_list()
+
+
+def distributed_lu_factor(matrix: list[list], cluster: Cluster | None = None) -> LUFactorization:
+    # Блочное LU-разложение с частичным выбором ведущего элемента (как getrf в LAPACK):
+    # полоса столбцов разлагается на координаторе, строки U12 получаются прямой
+    # подстановкой, а обновление хвоста A22 -= L21 * U12 (основной объем, O(n^3))
+    # делится на блоки между узлами
+    cluster = cluster or get_cluster()
+    _annotate("algorithm", "distributed")
+    lu = Matrix.from_list(matrix)
+    lu = Matrix(lu.rows, lu.cols, array("d", lu.data))
+    n = lu.rows
+    data = lu.data
+    perm = list(range(n))
+    scale = max(map(abs, data))
+    tolerance = _PIVOT_EPS * scale
+    step = cluster.block_size
+
+    for panel_start in range(0, n, step):
+        panel_stop = min(n, panel_start + step)
+        for k in range(panel_start, panel_stop):
+            pivot_index = max(range(k, n), key=lambda i: abs(data[i * n + k]))
+            max_value = abs(data[pivot_index * n + k])
+            if max_value == 0 or max_value <= tolerance:
+                raise ValueError("Матрица коэффициентов вырожденная, LU-разложение невозможно")
+            if pivot_index != k:
+                # Строки переставляются целиком: и уже посчитанная часть L, и еще не обработанная
+                row_k = data[k * n:(k + 1) * n]
+                data[k * n:(k + 1) * n] = data[pivot_index * n:(pivot_index + 1) * n]
+                data[pivot_index * n:(pivot_index + 1) * n] = row_k
+                perm[k], perm[pivot_index] = perm[pivot_index], perm[k]
+                _count("pivot_swaps")
+            pivot = data[k * n + k]
+            tail = data[k * n + k + 1:k * n + panel_stop]
+            for i in range(k + 1, n):
+                factor = data[i * n + k] / pivot
+                data[i * n + k] = factor
+                # Пустой срез не присваивается: array запрещает это при экспортированном буфере
+                if factor != 0 and tail:
+                    start = i * n + k + 1
+                    data[start:i * n + panel_stop] = array(
+                        "d", [x - factor * y for x, y in zip(data[start:i * n + panel_stop], tail)])
+
+        if panel_stop == n:
+            break
+        # U12 = L11^-1 * A12 (L11 с единичной диагональю)
+        for i in range(panel_start + 1, panel_stop):
+            row = data[i * n + panel_stop:(i + 1) * n]
+            for t in range(panel_start, i):
+                factor = data[i * n + t]
+                if factor != 0:
+                    row = array("d", [x - factor * y for x, y in
+                                      zip(row, data[t * n + panel_stop:(t + 1) * n])])
+            data[i * n + panel_stop:(i + 1) * n] = row
+
+        trailing = _bounds(n - panel_stop, step)
+        tiles = [(panel_stop + row_start, panel_stop + row_stop, panel_stop + col_start, panel_stop + col_stop)
+                 for row_start, row_stop in trailing for col_start, col_stop in trailing]
+        width = panel_stop - panel_start
+        _count("flops", 2 * (n - panel_stop) ** 2 * width)
+        tasks = [("update", [_submatrix(lu, r0, r1, c0, c1),
+                             _submatrix(lu, r0, r1, panel_start, panel_stop),
+                             _submatrix(lu, panel_start, panel_stop, c0, c1)])
+                 for r0, r1, c0, c1 in tiles]
+        for (r0, _, c0, _), block in zip(tiles, cluster.run(tasks)):
+            _put_submatrix(lu, r0, c0, block)
+
+    return LUFactorization(lu, perm)
+
+
+def distributed_solve(coefficients: list[list], constants: list, cluster: Cluster | None = None) -> list:
+    try:
+        factorization = distributed_lu_factor(coefficients, cluster)
+    except ValueError:
+        # Вырожденная система: тип ошибки (нет решений / бесконечно много)
+        # определяет встроенная реализация
+        return solve_system_gaussian(coefficients, constants, engine="python")
+    return factorization.solve(constants)
+
+
+# Операции движка; модуль регистрирует их в backend.matrix_core при импорте
+ENGINE_OPERATIONS = {
+    "matrix_multiply": distributed_multiply,
+    "solve_system_gaussian": distributed_solve,
+}
+register_engine("distributed", ENGINE_OPERATIONS)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Вычислительный узел для движка distributed")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker = subparsers.add_parser("worker", help="запустить узел")
+    worker.add_argument("--host", default="127.0.0.1", help="адрес для входящих соединений")
+    worker.add_argument("--port", type=int, default=0, help="порт (0 - любой свободный)")
+    ping = subparsers.add_parser("ping", help="проверить доступность узлов")
+    ping.add_argument("addresses", help="узлы: host:port,host:port")
+    args = parser.parse_args(argv)
+
+    if args.command == "ping":
+        status = Cluster(args.addresses).ping()
+        print(json.dumps(status))
+        return 0 if all(status.values()) else 1
+
+    server = WorkerServer(args.host, args.port)
+    host, port = server.address
+    print(f"Узел слушает {host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
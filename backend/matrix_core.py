@@ -1,55 +1,974 @@
-def matrix_add(a: list[list], b: list[list]) -> list[list]:
+import ast
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fractions import Fraction
+from functools import partial, wraps
+from math import hypot, isfinite, lcm, prod, sqrt
+from multiprocessing import shared_memory
+from operator import add, mul, sub
+from time import perf_counter
+
+try:
+    from math import sumprod as _dot  # Python 3.12+
+except ImportError:
+    def _dot(x, y):
+        return sum(map(mul, x, y))
+
+try:
+    import numpy as np
+except ImportError:  # NumPy не обязателен: без него работает только движок "python"
+    np = None
+
+
+# Реестр вычислительных движков: имя движка -> {имя операции: функция}.
+# Проверка входных данных всегда выполняется в этом модуле до вызова движка,
+# поэтому сообщения об ошибках не зависят от выбранного движка
+_ENGINES = {}
+_default_engine = os.environ.get("MATRIX_ENGINE", "python")
+# Движок "auto" выбирает NumPy, начиная с этого количества элементов
+AUTO_ENGINE_THRESHOLD = int(os.environ.get("MATRIX_AUTO_THRESHOLD", "4096"))
+
+
+def register_engine(name: str, operations: dict) -> None:
+    # Операции, отсутствующие в движке, выполняются встроенной реализацией
+    if name in ("python", "auto"):
+        raise ValueError(f"Имя движка {name} зарезервировано")
+    _ENGINES[name] = dict(operations)
+
+
+def unregister_engine(name: str) -> None:
+    # Движок по умолчанию, если он удален, сбрасывается на встроенный
+    global _default_engine
+    _ENGINES.pop(name, None)
+    if _default_engine == name:
+        _default_engine = "python"
+
+
+class EngineUnavailableError(RuntimeError):
+    # Внешний движок (например, кластер узлов) не может выполнить вычисление;
+    # входные данные при этом корректны, API отвечает 503
+    pass
+
+
+def available_engines() -> list[str]:
+    return ["python", "auto"] + sorted(_ENGINES)
+
+
+def set_default_engine(name: str) -> None:
+    global _default_engine
+    if name not in available_engines():
+        raise ValueError(f"Неизвестный вычислительный движок: {name}")
+    _default_engine = name
+
+
+def get_default_engine() -> str:
+    return _default_engine
+
+
+def _engine_operation(engine, operation: str, size: int):
+    # Возвращает реализацию операции выбранного движка или None для встроенной
+    name = _default_engine if engine is None else engine
+    if name == "auto":
+        name = "numpy" if "numpy" in _ENGINES and size >= AUTO_ENGINE_THRESHOLD else "python"
+    if name == "python":
+        _annotate("engine", "python")
+        return None
+    if name not in _ENGINES:
+        raise ValueError(f"Неизвестный вычислительный движок: {name}")
+    implementation = _ENGINES[name].get(operation)
+    _annotate("engine", name if implementation is not None else "python")
+    return implementation
+
+
+class Matrix:
+    # Плотная матрица в одном непрерывном буфере array('d'), построчно.
+    # Занимает 8 байт на элемент вместо объекта float и ссылки в списке;
+    # строки отдаются как memoryview без копирования, поэтому код,
+    # работающий с вложенными списками через matrix[i][j], принимает Matrix без изменений
+    __slots__ = ("rows", "cols", "data", "_view")
+
+    def __init__(self, rows: int, cols: int, data=None):
+        if rows < 0 or cols < 0:
+            raise ValueError("Размерность матрицы не может быть отрицательной")
+        if data is None:
+            data = array("d", bytes(8 * rows * cols))
+        elif not isinstance(data, array) or data.typecode != "d":
+            data = array("d", data)
+        if len(data) != rows * cols:
+            raise ValueError(f"Размер буфера ({len(data)}) не совпадает с размерностью матрицы {rows}x{cols}")
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self._view = memoryview(data)
+
+    @classmethod
+    def from_list(cls, matrix: list[list]) -> "Matrix":
+        if isinstance(matrix, Matrix):
+            return matrix
+        rows = len(matrix)
+        cols = len(matrix[0]) if rows else 0
+        data = array("d")
+        for row in matrix:
+            if len(row) != cols:
+                raise ValueError("Все строки должны иметь одинаковую длину")
+            data.extend(row)
+        return cls(rows, cols, data)
+
+    @classmethod
+    def identity(cls, n: int) -> "Matrix":
+        result = cls(n, n)
+        result.data[::n + 1] = array("d", [1.0]) * n
+        return result
+
+    def to_list(self) -> list[list]:
+        cols = self.cols
+        data = self.data
+        return [data[i:i + cols].tolist() for i in range(0, self.rows * cols, cols)]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+    def row(self, i: int) -> memoryview:
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError("Индекс строки вне диапазона")
+        return self._view[i * self.cols:(i + 1) * self.cols]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            i, j = index
+            return self.row(i)[j]
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(self.rows))]
+        return self.row(index)
+
+    def __setitem__(self, index, value):
+        if not isinstance(index, tuple):
+            raise TypeError("Присваивание возможно только по индексу элемента: matrix[i, j] = value")
+        i, j = index
+        self.row(i)[j] = value
+
+    def __iter__(self):
+        view = self._view
+        cols = self.cols
+        for start in range(0, self.rows * cols, cols):
+            yield view[start:start + cols]
+
+    def __eq__(self, other):
+        if isinstance(other, Matrix):
+            return self.shape == other.shape and self.data == other.data
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Matrix({self.rows}x{self.cols}, {self.to_list()!r})"
+
+    # Сериализация для передачи в другие процессы (memoryview не сериализуется)
+    def __getstate__(self):
+        return self.rows, self.cols, self.data
+
+    def __setstate__(self, state):
+        rows, cols, data = state
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self._view = memoryview(data)
+
+
+class SparseMatrix:
+    # Разреженная матрица в формате CSR: для строки i ненулевые элементы
+    # лежат в indices/data на позициях indptr[i]..indptr[i + 1], столбцы по возрастанию
+    __slots__ = ("rows", "cols", "indptr", "indices", "data")
+
+    def __init__(self, rows: int, cols: int, indptr, indices, data):
+        if rows < 0 or cols < 0:
+            raise ValueError("Размерность матрицы не может быть отрицательной")
+        self.rows = rows
+        self.cols = cols
+        self.indptr = indptr if isinstance(indptr, array) else array("q", indptr)
+        self.indices = indices if isinstance(indices, array) else array("q", indices)
+        self.data = data if isinstance(data, array) else array("d", data)
+        if len(self.indptr) != rows + 1 or len(self.indices) != len(self.data):
+            raise ValueError("Некорректная структура разреженной матрицы")
+
+    @classmethod
+    def from_coo(cls, rows: int, cols: int, entries) -> "SparseMatrix":
+        # entries - тройки (строка, столбец, значение); повторы суммируются, нули отбрасываются
+        row_maps = [{} for _ in range(rows)]
+        for i, j, value in entries:
+            if not (0 <= i < rows and 0 <= j < cols):
+                raise ValueError(f"Индекс элемента ({i}, {j}) выходит за пределы матрицы {rows}x{cols}")
+            row = row_maps[i]
+            row[j] = row.get(j, 0.0) + value
+        return cls._from_row_maps(rows, cols, row_maps)
+
+    @classmethod
+    def from_dense(cls, matrix: list[list]) -> "SparseMatrix":
+        if isinstance(matrix, SparseMatrix):
+            return matrix
+        rows = len(matrix)
+        cols = len(matrix[0]) if rows else 0
+        indptr = array("q", [0])
+        indices = array("q")
+        data = array("d")
+        for row in matrix:
+            if len(row) != cols:
+                raise ValueError("Все строки должны иметь одинаковую длину")
+            for j, value in enumerate(row):
+                if value != 0:
+                    indices.append(j)
+                    data.append(value)
+            indptr.append(len(indices))
+        return cls(rows, cols, indptr, indices, data)
+
+    @classmethod
+    def _from_row_maps(cls, rows: int, cols: int, row_maps: list[dict]) -> "SparseMatrix":
+        indptr = array("q", [0])
+        indices = array("q")
+        data = array("d")
+        for row in row_maps:
+            for j in sorted(row):
+                value = row[j]
+                if value != 0:
+                    indices.append(j)
+                    data.append(value)
+            indptr.append(len(indices))
+        return cls(rows, cols, indptr, indices, data)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @property
+    def density(self) -> float:
+        size = self.rows * self.cols
+        return self.nnz / size if size else 0.0
+
+    def row_items(self, i: int) -> list[tuple[int, float]]:
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return list(zip(self.indices[start:end], self.data[start:end]))
+
+    def to_coo(self) -> list[tuple[int, int, float]]:
+        return [(i, j, value) for i in range(self.rows) for j, value in self.row_items(i)]
+
+    def to_dense(self) -> list[list]:
+        result = [[0.0] * self.cols for _ in range(self.rows)]
+        for i, row in enumerate(result):
+            for j, value in self.row_items(i):
+                row[j] = value
+        return result
+
+    def __eq__(self, other):
+        if isinstance(other, SparseMatrix):
+            return self.shape == other.shape and self.to_coo() == other.to_coo()
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SparseMatrix({self.rows}x{self.cols}, nnz={self.nnz})"
+
+
+# Файлы матриц для вычислений вне памяти: .npy (float64 little-endian, порядок строк),
+# кадр application/x-matrix (сигнатура MTX1, строки и столбцы uint32 little-endian)
+# или сырые float64 little-endian построчно без заголовка - с явной размерностью
+_NPY_MAGIC = b"\x93NUMPY"
+_FRAME_MAGIC = b"MTX1"
+# Объем блока в памяти при вычислениях с файлами матриц, байты
+OUT_OF_CORE_BLOCK_BYTES = int(os.environ.get("MATRIX_BLOCK_BYTES", str(64 * 1024 * 1024)))
+# Каталог для файлов результатов, если выходной файл не указан (по умолчанию - временный каталог системы)
+OUT_OF_CORE_DIR = os.environ.get("MATRIX_OUT_OF_CORE_DIR") or None
+
+
+def _npy_header(rows: int, cols: int) -> bytes:
+    header = f"{{'descr': '<f8', 'fortran_order': False, 'shape': ({rows}, {cols}), }}"
+    # Заголовок дополняется пробелами до кратности 64 байт (формат .npy версии 1.0)
+    padding = 64 - (len(_NPY_MAGIC) + 4 + len(header) + 1) % 64
+    header = header + " " * (padding % 64) + "\n"
+    return _NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+def _read_matrix_header(file, shape) -> tuple[int, int, int]:
+    # Размерность и смещение данных в файле матрицы
+    head = file.read(12)
+    if head[:6] == _NPY_MAGIC:
+        if len(head) < 12:
+            raise ValueError("Некорректный заголовок .npy")
+        if head[6] == 1:
+            (length,) = struct.unpack_from("<H", head, 8)
+            start = 10
+        else:
+            (length,) = struct.unpack_from("<I", head, 8)
+            start = 12
+        file.seek(start)
+        try:
+            header = ast.literal_eval(file.read(length).decode("latin1"))
+            descr, fortran_order, file_shape = header["descr"], header["fortran_order"], tuple(header["shape"])
+        except (ValueError, SyntaxError, KeyError, TypeError):
+            raise ValueError("Некорректный заголовок .npy") from None
+        if descr != "<f8":
+            raise ValueError(f"Для вычислений вне памяти нужен тип данных <f8, в файле {descr}")
+        if fortran_order:
+            raise ValueError("Файлы .npy с порядком данных по столбцам не поддерживаются")
+        if len(file_shape) == 1:
+            file_shape = (1, file_shape[0])
+        elif len(file_shape) != 2:
+            raise ValueError("Поддерживаются только одно- и двумерные массивы .npy")
+        rows, cols = file_shape
+        offset = start + length
+    elif head[:4] == _FRAME_MAGIC and len(head) == 12:
+        rows, cols = struct.unpack_from("<II", head, 4)
+        offset = 12
+    else:
+        if shape is None:
+            raise ValueError("Для файла без заголовка нужно указать размерность матрицы")
+        rows, cols = shape
+        offset = 0
+        if os.fstat(file.fileno()).st_size != 8 * rows * cols:
+            raise ValueError("Размер файла не совпадает с размерностью матрицы")
+    if shape is not None and tuple(shape) != (rows, cols):
+        raise ValueError(f"Размерность в файле {rows}x{cols} не совпадает с указанной {shape[0]}x{shape[1]}")
+    if os.fstat(file.fileno()).st_size < offset + 8 * rows * cols:
+        raise ValueError("Размер файла не совпадает с размерностью матрицы")
+    return rows, cols, offset
+
+
+class FileMatrix:
+    # Плотная матрица в файле, отображенном в память через mmap. Данные читаются
+    # с диска по мере обращения к страницам, поэтому матрица может быть больше
+    # оперативной памяти. Строки отдаются как memoryview, как у Matrix. matrix_add,
+    # matrix_multiply и transpose обрабатывают такие матрицы по блокам и пишут
+    # результат в файл; остальные операции читают их как обычные плотные матрицы
+    __slots__ = ("path", "rows", "cols", "offset", "writable", "_file", "_mmap", "_view")
+
+    def __init__(self, path, shape: tuple[int, int] | None = None, writable: bool = False):
+        if sys.byteorder != "little":
+            raise ValueError("Файлы матриц поддерживаются только на платформах little-endian")
+        self.path = os.fspath(path)
+        self.writable = writable
+        self._file = open(self.path, "r+b" if writable else "rb")
+        try:
+            self.rows, self.cols, self.offset = _read_matrix_header(self._file, shape)
+            if self.rows == 0 or self.cols == 0:
+                raise ValueError("Матрица не может быть пустой")
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                                   access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        end = self.offset + 8 * self.rows * self.cols
+        self._view = memoryview(self._mmap)[self.offset:end].cast("d")
+
+    @classmethod
+    def create(cls, path, rows: int, cols: int) -> "FileMatrix":
+        # Новый файл, заполненный нулями: .npy по расширению, иначе сырые float64
+        if rows <= 0 or cols <= 0:
+            raise ValueError("Матрица не может быть пустой")
+        path = os.fspath(path)
+        header = _npy_header(rows, cols) if path.endswith(".npy") else b""
+        with open(path, "wb") as file:
+            file.write(header)
+            file.truncate(len(header) + 8 * rows * cols)
+        return cls(path, (rows, cols), writable=True)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.rows, self.cols
+
+    @property
+    def closed(self) -> bool:
+        return self._mmap.closed
+
+    def block(self, start: int, stop: int) -> memoryview:
+        # Строки start..stop одним непрерывным участком, без копирования
+        return self._view[start * self.cols:stop * self.cols]
+
+    def row(self, i: int) -> memoryview:
+        if i < 0:
+            i += self.rows
+        if not 0 <= i < self.rows:
+            raise IndexError("Индекс строки вне диапазона")
+        return self._view[i * self.cols:(i + 1) * self.cols]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            i, j = index
+            return self.row(i)[j]
+        if isinstance(index, slice):
+            return [self.row(i) for i in range(*index.indices(self.rows))]
+        return self.row(index)
+
+    def __setitem__(self, index, value):
+        if not isinstance(index, tuple):
+            raise TypeError("Присваивание возможно только по индексу элемента: matrix[i, j] = value")
+        i, j = index
+        self.row(i)[j] = value
+
+    def __iter__(self):
+        for i in range(self.rows):
+            yield self.row(i)
+
+    def to_matrix(self) -> Matrix:
+        data = array("d")
+        data.frombytes(self._view.cast("B"))
+        return Matrix(self.rows, self.cols, data)
+
+    def to_list(self) -> list[list]:
+        return self.to_matrix().to_list()
+
+    def flush(self) -> None:
+        if self.writable:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        # Строки, полученные из матрицы, после закрытия использовать нельзя
+        if self._mmap.closed:
+            return
+        self.flush()
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __repr__(self) -> str:
+        return f"FileMatrix({self.path!r}, {self.rows}x{self.cols})"
+
+    # В другой процесс передается только путь: файл открывается там заново
+    def __getstate__(self):
+        return self.path, self.shape, self.writable
+
+    def __setstate__(self, state):
+        path, shape, writable = state
+        self.__init__(path, shape, writable)
+
+
+def _accepts_matrix(func):
+    # Если хотя бы один аргумент - Matrix, матричный результат тоже возвращается как Matrix.
+    # Точные результаты (дроби движка "exact") остаются списками, чтобы не терять точность
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        result = func(*args, **kwargs)
+        if (isinstance(result, list) and result and isinstance(result[0], list)
+                and not (result[0] and isinstance(result[0][0], Fraction))
+                and any(isinstance(arg, Matrix) for arg in args)):
+            return Matrix.from_list(result)
+        return result
+    return wrapper
+
+
+# Трассировка вычислений: спан на каждый вызов публичной функции (время, размерности,
+# выбранный движок и алгоритм) и счетчики внутри алгоритмов (перестановки строк,
+# операции с плавающей точкой, рекурсивные вызовы). Трассировщик хранится в ContextVar,
+# поэтому у каждого потока и запроса свой; выключенная трассировка стоит одного чтения
+# ContextVar на вызов функции или шаг исключения, во внутренних циклах проверок нет
+_tracer = ContextVar("matrix_tracer", default=None)
+
+
+class Tracer:
+    __slots__ = ("spans", "_stack", "_started")
+
+    def __init__(self):
+        self.spans = []
+        self._stack = []
+        self._started = perf_counter()
+
+    def begin(self, name: str, **attributes) -> dict:
+        span = {"name": name, "depth": len(self._stack), "start": perf_counter() - self._started,
+                "duration": None, "attributes": attributes, "counters": {}}
+        self.spans.append(span)
+        self._stack.append(span)
+        return span
+
+    def end(self, span: dict) -> None:
+        span["duration"] = perf_counter() - self._started - span["start"]
+        self._stack.pop()
+
+    def count(self, name: str, amount: int = 1) -> None:
+        # Счетчик относится к самому внутреннему открытому спану
+        if self._stack:
+            counters = self._stack[-1]["counters"]
+            counters[name] = counters.get(name, 0) + amount
+
+    def annotate(self, name: str, value) -> None:
+        # Первое значение атрибута сохраняется: рекурсивные вызовы его не перезаписывают
+        if self._stack:
+            self._stack[-1]["attributes"].setdefault(name, value)
+
+    def report(self) -> dict:
+        totals = {}
+        for span in self.spans:
+            for name, value in span["counters"].items():
+                totals[name] = totals.get(name, 0) + value
+        return {"spans": self.spans, "counters": totals}
+
+
+@contextmanager
+def tracing():
+    # with tracing() as tracer: ... - трассировка вызовов в текущем потоке
+    tracer = Tracer()
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+
+
+def traced_call(func, *args, **kwargs) -> tuple:
+    # Результат и отчет трассировки одного вызова; функция уровня модуля,
+    # поэтому вызов можно передать в пул процессов. Ошибка входных данных
+    # (ValueError) возвращается вместо результата, чтобы не потерять отчет
+    with tracing() as tracer:
+        try:
+            result = func(*args, **kwargs)
+        except ValueError as e:
+            result = e
+    return result, tracer.report()
+
+
+def _count(name: str, amount: int = 1) -> None:
+    tracer = _tracer.get()
+    if tracer is not None:
+        tracer.count(name, amount)
+
+
+def _annotate(name: str, value) -> None:
+    tracer = _tracer.get()
+    if tracer is not None:
+        tracer.annotate(name, value)
+
+
+# Прогресс долгих вычислений: слушатель listener(stage, done, total) получает число
+# завершенных шагов внешнего цикла алгоритма перед каждым шагом и done == total после
+# последнего ("elimination" - столбцы исключения в методе Гаусса, LU-разложении,
+# обращении, определителе и ранге, "rows" - готовые блоки строк произведения).
+# Слушатель хранится в ContextVar, как трассировщик; алгоритм читает его один раз,
+# без слушателя стоимость - одна проверка на шаг внешнего цикла. Исключение
+# из слушателя прерывает вычисление
+_progress = ContextVar("matrix_progress", default=None)
+
+# Количество шагов, на которое делится умножение для отчета о прогрессе
+_PROGRESS_STEPS = 100
+
+
+class ComputationCancelled(Exception):
+    # Вычисление прервано слушателем прогресса (не ошибка входных данных)
+    pass
+
+
+@contextmanager
+def progress_listener(listener):
+    # with progress_listener(lambda stage, done, total: ...): ... - прогресс вызовов в текущем потоке
+    token = _progress.set(listener)
+    try:
+        yield listener
+    finally:
+        _progress.reset(token)
+
+
+def _trace_shape(value) -> list:
+    if isinstance(value, (Matrix, SparseMatrix, FileMatrix)):
+        return list(value.shape)
+    if value and isinstance(value[0], (list, tuple)):
+        return [len(value), len(value[0])]
+    return [len(value)]
+
+
+def _traced(func):
+    # Спан на вызов публичной функции с размерностями матричных аргументов
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        tracer = _tracer.get()
+        if tracer is None:
+            return func(*args, **kwargs)
+        span = tracer.begin(name, shapes=[_trace_shape(arg) for arg in args
+                                          if isinstance(arg, (list, array, Matrix, SparseMatrix, FileMatrix))])
+        try:
+            return func(*args, **kwargs)
+        except ValueError as e:
+            span["attributes"]["error"] = str(e)
+            raise
+        finally:
+            tracer.end(span)
+    return wrapper
+
+
+# Общий слой проверки входных данных. Каждая публичная функция проверяет
+# аргументы один раз и дальше вызывает ядра без повторных проверок.
+# Matrix прямоугольна по построению, поэтому ее размерность берется без обхода строк
+def _dims(matrix) -> tuple[int, int]:
+    # Размерность по первой строке, без проверки прямоугольности
+    if isinstance(matrix, (Matrix, SparseMatrix, FileMatrix)):
+        return matrix.shape
+    return len(matrix), len(matrix[0]) if len(matrix) else 0
+
+
+def _is_empty(matrix) -> bool:
+    rows, cols = _dims(matrix)
+    return rows == 0 or cols == 0
+
+
+def _checked_shape(matrix, ragged_message: str) -> tuple[int, int]:
+    # Матрица не пустая: проверку пустоты выполняет вызывающая функция
+    if isinstance(matrix, (Matrix, SparseMatrix, FileMatrix)):
+        return matrix.shape
+    cols = len(matrix[0])
+    for row in matrix:
+        if len(row) != cols:
+            raise ValueError(ragged_message)
+    return len(matrix), cols
+
+
+def _checked_square(matrix) -> int:
+    n = len(matrix)
+    if isinstance(matrix, (Matrix, FileMatrix)):
+        if matrix.cols != n:
+            raise ValueError(f"Матрица должна быть квадратной. Строка 0 имеет длину {matrix.cols}, ожидалось {n}")
+        return n
+    for i, row in enumerate(matrix):
+        if len(row) != n:
+            raise ValueError(f"Матрица должна быть квадратной. Строка {i} имеет длину {len(row)}, ожидалось {n}")
+    return n
+
+
+def _add_kernel(a: list[list], b: list[list]) -> list[list]:
+    # Две плотные матрицы складываются поэлементно по общему буферу
+    if isinstance(a, Matrix) and isinstance(b, Matrix):
+        return Matrix(a.rows, a.cols, array("d", map(add, a.data, b.data)))
+    return [list(map(add, row_a, row_b)) for row_a, row_b in zip(a, b)]
+
+
+@_traced
+@_accepts_matrix
+def matrix_add(a: list[list], b: list[list], engine: str | None = None, out=None,
+               block_bytes: int | None = None) -> list[list]:
     # Проверка, что матрицы не пустые
-    if len(a) == 0 or len(b) == 0 or len(a[0]) == 0 or len(b[0]) == 0:
+    if _is_empty(a) or _is_empty(b):
         raise ValueError("Матрицы не могут быть пустыми")
 
     # Проверка размерности матриц
-    if len(a) != len(b):
+    if _dims(a)[0] != _dims(b)[0]:
         raise ValueError("Матрицы должны иметь одинаковое количество строк")
 
-    if len(a[0]) != len(b[0]):
+    if _dims(a)[1] != _dims(b)[1]:
         raise ValueError("Матрицы должны иметь одинаковое количество столбцов")
 
     # Проверка, что все строки имеют одинаковую длину
-    for i in range(len(a)):
-        if len(a[i]) != len(a[0]):
-            raise ValueError("Все строки первой матрицы должны иметь одинаковую длину")
+    rows, cols = _checked_shape(a, "Все строки первой матрицы должны иметь одинаковую длину")
+    _checked_shape(b, "Все строки второй матрицы должны иметь одинаковую длину")
+
+    # Файлы матриц или выходной файл: сложение по блокам строк
+    if out is not None or isinstance(a, FileMatrix) or isinstance(b, FileMatrix):
+        return _out_of_core_add(a, b, out, block_bytes)
+
+    if isinstance(a, SparseMatrix) or isinstance(b, SparseMatrix):
+        return _sparse_add(a, b)
+
+    implementation = _engine_operation(engine, "matrix_add", rows * cols)
+    if implementation is not None:
+        return implementation(a, b)
+
+    return _add_kernel(a, b)
+
+
+# Ширина блока столбцов B: блок транспонированных столбцов остается в кэше,
+# пока по нему проходят все строки A
+_MULTIPLY_TILE = 64
+
 
-    for i in range(len(b)):
-        if len(b[i]) != len(b[0]):
-            raise ValueError("Все строки второй матрицы должны иметь одинаковую длину")
+def _multiply_kernel(a: list[list], b: list[list]) -> list[list]:
+    # Строка A умножается на заранее транспонированные столбцы B:
+    # скалярное произведение считается встроенной функцией без индексации
+    return _multiply_columns(a, list(zip(*b)))
 
-    # Создание результирующей матрицы
+
+def _multiply_columns(a: list[list], columns: list) -> list[list]:
+    _count("flops", 2 * len(a) * len(columns) * len(columns[0]))
+
+    progress = _progress.get()
+    if progress is None:
+        return _multiply_rows(a, columns)
+
+    # Со слушателем - по блокам строк с отчетом после каждого
+    rows = len(a)
+    step = -(-rows // _PROGRESS_STEPS)
     result = []
-    for i in range(len(a)):
-        row = []
-        for j in range(len(a[0])):
-            row.append(a[i][j] + b[i][j])
-        result.append(row)
+    for start in range(0, rows, step):
+        stop = min(rows, start + step)
+        result.extend(_multiply_rows(a[start:stop], columns))
+        progress("rows", stop, rows)
+    return result
+
+
+def _multiply_rows(a: list[list], columns: list) -> list[list]:
+    if len(columns) <= _MULTIPLY_TILE:
+        return [[_dot(row, column) for column in columns] for row in a]
+
+    # Для больших матриц - обход по блокам столбцов
+    result = [[] for _ in range(len(a))]
+    for start in range(0, len(columns), _MULTIPLY_TILE):
+        block = columns[start:start + _MULTIPLY_TILE]
+        for row, result_row in zip(a, result):
+            result_row.extend([_dot(row, column) for column in block])
 
     return result
 
 
-def matrix_multiply(a: list[list], b: list[list]) -> list[list]:
-    # Проверка, что матрицы не пустые
-    if len(a) == 0 or len(b) == 0 or len(a[0]) == 0 or len(b[0]) == 0:
-        raise ValueError("Матрицы не могут быть пустыми")
+# Размер блока, начиная с которого метод Штрассена передает умножение
+# классическому ядру
+STRASSEN_CUTOFF = 128
+
+
+def _add_blocks(a: list[list], b: list[list]) -> list[list]:
+    return [[x + y for x, y in zip(row_a, row_b)] for row_a, row_b in zip(a, b)]
 
-    # Проверка, что матрицы двумерные и корректной формы
-    rows_a = len(a)
-    cols_a = len(a[0])
-    rows_b = len(b)
-    cols_b = len(b[0])
 
-    # Проверка, что все строки матрицы a имеют одинаковую длину
-    for i in range(rows_a):
-        if len(a[i]) != cols_a:
-            raise ValueError("Все строки первой матрицы должны иметь одинаковую длину")
+def _sub_blocks(a: list[list], b: list[list]) -> list[list]:
+    return [[x - y for x, y in zip(row_a, row_b)] for row_a, row_b in zip(a, b)]
 
-    # Проверка, что все строки матрицы b имеют одинаковую длину
-    for i in range(rows_b):
-        if len(b[i]) != cols_b:
-            raise ValueError("Все строки второй матрицы должны иметь одинаковую длину")
+
+def _strassen(a: list[list], b: list[list], cutoff: int) -> list[list]:
+    # a и b - квадратные матрицы одинакового размера, размер делится на 2
+    # на каждом уровне рекурсии вплоть до cutoff
+    n = len(a)
+    _count("strassen_calls")
+    if n <= cutoff or n % 2:
+        return _multiply_kernel(a, b)
+
+    h = n // 2
+    a11 = [row[:h] for row in a[:h]]
+    a12 = [row[h:] for row in a[:h]]
+    a21 = [row[:h] for row in a[h:]]
+    a22 = [row[h:] for row in a[h:]]
+    b11 = [row[:h] for row in b[:h]]
+    b12 = [row[h:] for row in b[:h]]
+    b21 = [row[:h] for row in b[h:]]
+    b22 = [row[h:] for row in b[h:]]
+
+    m1 = _strassen(_add_blocks(a11, a22), _add_blocks(b11, b22), cutoff)
+    m2 = _strassen(_add_blocks(a21, a22), b11, cutoff)
+    m3 = _strassen(a11, _sub_blocks(b12, b22), cutoff)
+    m4 = _strassen(a22, _sub_blocks(b21, b11), cutoff)
+    m5 = _strassen(_add_blocks(a11, a12), b22, cutoff)
+    m6 = _strassen(_sub_blocks(a21, a11), _add_blocks(b11, b12), cutoff)
+    m7 = _strassen(_sub_blocks(a12, a22), _add_blocks(b21, b22), cutoff)
+
+    c11 = _add_blocks(_sub_blocks(_add_blocks(m1, m4), m5), m7)
+    c12 = _add_blocks(m3, m5)
+    c21 = _add_blocks(m2, m4)
+    c22 = _add_blocks(_sub_blocks(m1, m2), _add_blocks(m3, m6))
+
+    return [r1 + r2 for r1, r2 in zip(c11, c12)] + [r1 + r2 for r1, r2 in zip(c21, c22)]
+
+
+def _multiply_strassen(a: list[list], b: list[list], cutoff: int) -> list[list]:
+    rows_a, cols_a, cols_b = len(a), len(a[0]), len(b[0])
+    n = max(rows_a, cols_a, cols_b)
+    if n <= cutoff:
+        return _multiply_kernel(a, b)
+
+    # Минимальный размер вида s * 2^k (s <= cutoff), не меньший n:
+    # блоки делятся пополам на каждом уровне рекурсии
+    size, levels = n, 0
+    while size > cutoff:
+        size = (size + 1) // 2
+        levels += 1
+    padded = size << levels
+
+    # Дополнение нулями до квадратной матрицы padded x padded
+    a_padded = [list(row) + [0] * (padded - cols_a) for row in a]
+    a_padded += [[0] * padded for _ in range(padded - rows_a)]
+    b_padded = [list(row) + [0] * (padded - cols_b) for row in b]
+    b_padded += [[0] * padded for _ in range(padded - cols_a)]
+
+    result = _strassen(a_padded, b_padded, cutoff)
+    return [row[:cols_b] for row in result[:rows_a]]
+
+
+# Параллельное умножение: A, транспонированная B и результат лежат в разделяемой
+# памяти (multiprocessing.shared_memory), пул процессов живет между вызовами.
+# Задача для процесса - имена блоков памяти и диапазон строк результата,
+# поэтому операнды не сериализуются и не копируются в каждую задачу
+PARALLEL_WORKERS = int(os.environ.get("MATRIX_PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+# Задач на процесс: строки делятся с запасом, чтобы процессы не простаивали,
+# если одни части считаются дольше других
+_PARALLEL_CHUNKS_PER_WORKER = 4
+_parallel_pool = None
+_parallel_lock = threading.Lock()
+
+
+def set_parallel_workers(workers: int) -> None:
+    global PARALLEL_WORKERS
+    if workers < 1:
+        raise ValueError("Количество процессов должно быть положительным")
+    shutdown_parallel_pool()
+    PARALLEL_WORKERS = workers
+
+
+def shutdown_parallel_pool() -> None:
+    global _parallel_pool
+    with _parallel_lock:
+        if _parallel_pool is not None:
+            _parallel_pool.shutdown(wait=True, cancel_futures=True)
+            _parallel_pool = None
+
+
+def _get_parallel_pool() -> ProcessPoolExecutor:
+    global _parallel_pool
+    with _parallel_lock:
+        if _parallel_pool is None:
+            _parallel_pool = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS)
+        return _parallel_pool
+
+
+def _shared_array(values: array) -> shared_memory.SharedMemory:
+    block = shared_memory.SharedMemory(create=True, size=max(8 * len(values), 1))
+    block.buf[:8 * len(values)] = memoryview(values).cast("B")
+    return block
+
+
+def _parallel_rows(a_name: str, columns_name: str, result_name: str, inner: int, cols: int,
+                   start: int, stop: int) -> None:
+    # Выполняется в процессе пула: строки start..stop результата.
+    # Столбцы B собираются в каждой задаче (это стоит примерно одну строку
+    # результата) и не остаются в памяти процесса после умножения
+    a_block = shared_memory.SharedMemory(name=a_name)
+    columns_block = shared_memory.SharedMemory(name=columns_name)
+    result_block = shared_memory.SharedMemory(name=result_name)
+    try:
+        view = columns_block.buf.cast("d")
+        columns = [tuple(view[j * inner:(j + 1) * inner]) for j in range(cols)]
+        view.release()
+        a_view = a_block.buf.cast("d")
+        result_view = result_block.buf.cast("d")
+        rows = [a_view[i * inner:(i + 1) * inner].tolist() for i in range(start, stop)]
+        for i, row in enumerate(_multiply_rows(rows, columns), start):
+            result_view[i * cols:(i + 1) * cols] = array("d", row)
+        a_view.release()
+        result_view.release()
+    finally:
+        a_block.close()
+        columns_block.close()
+        result_block.close()
+
+
+def _multiply_parallel(a: list[list], b: list[list]) -> list[list]:
+    rows_a, inner = _dims(a)
+    cols_b = _dims(b)[1]
+    workers = PARALLEL_WORKERS
+    # Целые операнды дают целый результат, как при классическом умножении:
+    # в float64 он точен, пока суммы произведений не выходят за 2**53
+    bound_a = _int_bound(a)
+    bound_b = _int_bound(b) if bound_a is not None else None
+    integral = bound_b is not None
+    if workers < 2 or rows_a < 2 or (integral and bound_a * bound_b * inner >= 2 ** 53):
+        return _multiply_kernel(a, b)
+    _count("flops", 2 * rows_a * cols_b * inner)
+
+    b_data = _dense_block(b, 0, inner)
+    columns = array("d")
+    for j in range(cols_b):
+        columns.extend(b_data[j::cols_b])
+    blocks = []
+    try:
+        a_block = _shared_array(_dense_block(a, 0, rows_a))
+        blocks.append(a_block)
+        columns_block = _shared_array(columns)
+        blocks.append(columns_block)
+        result_block = shared_memory.SharedMemory(create=True, size=8 * rows_a * cols_b)
+        blocks.append(result_block)
+
+        step = -(-rows_a // (workers * _PARALLEL_CHUNKS_PER_WORKER))
+        pool = _get_parallel_pool()
+        futures = [pool.submit(_parallel_rows, a_block.name, columns_block.name, result_block.name,
+                               inner, cols_b, start, min(rows_a, start + step))
+                   for start in range(0, rows_a, step)]
+        progress = _progress.get()
+        try:
+            for i, future in enumerate(futures, 1):
+                future.result()
+                if progress is not None:
+                    progress("rows", min(rows_a, i * step), rows_a)
+        except BrokenProcessPool:
+            # Процесс пула завершился аварийно: при следующем вызове пул создается заново
+            shutdown_parallel_pool()
+            raise
+        except BaseException:
+            # Вычисление прервано: общая память освобождается только после того,
+            # как процессы пула закончат работу с ней
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            raise
+        data = array("d")
+        data.frombytes(result_block.buf[:8 * rows_a * cols_b])
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    if integral:
+        return [[int(x) for x in data[i * cols_b:(i + 1) * cols_b]] for i in range(rows_a)]
+    result = Matrix(rows_a, cols_b, data)
+    return result if isinstance(a, Matrix) or isinstance(b, Matrix) else result.to_list()
+
+
+def _int_bound(matrix) -> int | None:
+    # Наибольший модуль элемента, если матрица - списки из одних int, иначе None
+    if not isinstance(matrix, list):
+        return None
+    bound = 0
+    for row in matrix:
+        for x in row:
+            if type(x) is not int:
+                return None
+            bound = max(bound, abs(x))
+    return bound
+
+
+@_traced
+@_accepts_matrix
+def matrix_multiply(a: list[list], b: list[list], engine: str | None = None,
+                    method: str = "classical", strassen_cutoff: int = STRASSEN_CUTOFF, out=None,
+                    block_bytes: int | None = None) -> list[list]:
+    # Проверка, что матрицы не пустые
+    if _is_empty(a) or _is_empty(b):
+        raise ValueError("Матрицы не могут быть пустыми")
+
+    # Проверка, что все строки каждой матрицы имеют одинаковую длину
+    rows_a, cols_a = _checked_shape(a, "Все строки первой матрицы должны иметь одинаковую длину")
+    rows_b, cols_b = _checked_shape(b, "Все строки второй матрицы должны иметь одинаковую длину")
 
     # Проверка совместимости размерностей для умножения
     if cols_a != rows_b:
@@ -59,29 +978,190 @@ def matrix_multiply(a: list[list], b: list[list]) -> list[list]:
             f"Количество столбцов A должно равняться количеству строк B"
         )
 
-    # Создание результирующей матрицы размером rows_a x cols_b
-    result = [[0 for _ in range(cols_b)] for _ in range(rows_a)]
+    if method not in ("classical", "strassen", "parallel"):
+        raise ValueError(f"Неизвестный метод умножения: {method}")
+
+    if strassen_cutoff < 1:
+        raise ValueError("Порог метода Штрассена должен быть положительным")
+
+    # Файлы матриц или выходной файл: умножение блоками классическим ядром или движком
+    if out is not None or isinstance(a, FileMatrix) or isinstance(b, FileMatrix):
+        return _out_of_core_multiply(a, b, out, block_bytes, engine)
+
+    if isinstance(a, SparseMatrix) or isinstance(b, SparseMatrix):
+        return _sparse_multiply(a, b)
+
+    implementation = _engine_operation(engine, "matrix_multiply", max(rows_a * cols_a, rows_b * cols_b))
+    if implementation is not None:
+        return implementation(a, b)
+
+    if method == "strassen":
+        _annotate("algorithm", "strassen")
+        return _multiply_strassen(a, b, strassen_cutoff)
+
+    if method == "parallel":
+        _annotate("algorithm", "parallel")
+        return _multiply_parallel(a, b)
+
+    # Плотные по объявлению, но почти нулевые матрицы умножаются разреженным алгоритмом
+    sparse_a = _detect_sparse(a)
+    if sparse_a is not None:
+        return _sparse_multiply(sparse_a, b)
+    sparse_b = _detect_sparse(b)
+    if sparse_b is not None:
+        return _sparse_multiply(a, sparse_b)
+
+    return _multiply_kernel(a, b)
+
+
+# Разложение по столбцу выгоднее LU только для маленьких матриц с большим количеством нулей
+_COFACTOR_MAX_SIZE = 6
+# Точный (целочисленный) алгоритм Барейса используется до этого размера:
+# дальше длинная арифметика становится дороже, чем LU-разложение в float
+_BAREISS_MAX_SIZE = 80
+
+
+def _is_integral(matrix: list[list]) -> bool:
+    # Все элементы целые (или вещественные с нулевой дробной частью)
+    for row in matrix:
+        for x in row:
+            if isinstance(x, float):
+                if not x.is_integer():
+                    return False
+            elif not isinstance(x, int):
+                return False
+    return True
+
+
+def _determinant_bareiss(matrix: list[list]) -> int:
+    # Алгоритм Барейса: исключение без дробей, все промежуточные значения
+    # являются минорами исходной матрицы и делятся нацело
+    mat = [[int(x) for x in row] for row in matrix]
+    n = len(mat)
+    sign = 1
+    prev = 1
+    progress = _progress.get()
+
+    for k in range(n - 1):
+        if progress is not None:
+            progress("elimination", k, n)
+        if mat[k][k] == 0:
+            # Ищем строку с ненулевым элементом в столбце k
+            for i in range(k + 1, n):
+                if mat[i][k] != 0:
+                    mat[k], mat[i] = mat[i], mat[k]
+                    sign = -sign
+                    _count("pivot_swaps")
+                    break
+            else:
+                if progress is not None:
+                    progress("elimination", n, n)
+                return 0
+
+        pivot_row = mat[k]
+        pivot = pivot_row[k]
+        tail = pivot_row[k + 1:]
+        for i in range(k + 1, n):
+            row = mat[i]
+            factor = row[k]
+            row[k + 1:] = [(x * pivot - factor * y) // prev for x, y in zip(row[k + 1:], tail)]
+        prev = pivot
+
+    if progress is not None:
+        progress("elimination", n, n)
+    return sign * mat[n - 1][n - 1]
+
+
+def _determinant_lu(matrix: list[list]) -> float:
+    # LU-разложение с частичным выбором ведущего элемента:
+    # определитель равен произведению ведущих элементов с учетом перестановок
+    mat = [[float(x) for x in row] for row in matrix]
+    n = len(mat)
+    det = 1.0
+    progress = _progress.get()
+
+    for k in range(n):
+        if progress is not None:
+            progress("elimination", k, n)
+        # Выбираем максимальный по модулю элемент в столбце
+        pivot_index = k
+        max_value = abs(mat[k][k])
+        for i in range(k + 1, n):
+            value = abs(mat[i][k])
+            if value > max_value:
+                max_value = value
+                pivot_index = i
+
+        if max_value == 0:
+            if progress is not None:
+                progress("elimination", n, n)
+            return 0.0
+
+        if pivot_index != k:
+            mat[k], mat[pivot_index] = mat[pivot_index], mat[k]
+            det = -det
+            _count("pivot_swaps")
+
+        pivot_row = mat[k]
+        pivot = pivot_row[k]
+        det *= pivot
+        tail = pivot_row[k + 1:]
+        for i in range(k + 1, n):
+            row = mat[i]
+            factor = row[k] / pivot
+            if factor != 0:
+                row[k + 1:] = [x - factor * y for x, y in zip(row[k + 1:], tail)]
+
+    if progress is not None:
+        progress("elimination", n, n)
+    return det
 
-    # Алгоритм умножения матриц
-    for i in range(rows_a):  # Для каждой строки матрицы A
-        for j in range(cols_b):  # Для каждого столбца матрицы B
-            for k in range(cols_a):  # Для каждого элемента в строке A/столбце B
-                result[i][j] += a[i][k] * b[k][j]
 
-    return result
+def _determinant_cofactor(matrix: list[list], best_col: int) -> float:
+    # Разложение по столбцу best_col, нулевые элементы пропускаются
+    n = len(matrix)
+    det = 0
+    for i in range(n):
+        if matrix[i][best_col] == 0:
+            continue  # Пропускаем нулевые элементы
 
+        # Создаем минорную матрицу
+        minor = [
+            [value for l, value in enumerate(matrix[k]) if l != best_col]
+            for k in range(n) if k != i
+        ]
 
-def determinant_optimized(matrix: list[list], col: int = 0) -> float:
-    n = len(matrix)
+        # Вычисляем алгебраическое дополнение
+        sign = 1 if (i + best_col) % 2 == 0 else -1
+        det += sign * matrix[i][best_col] * _determinant(minor)
+
+    return det
+
+
+@_traced
+@_accepts_matrix
+def determinant_optimized(matrix: list[list], col: int = 0, engine: str | None = None) -> float:
+    if isinstance(matrix, SparseMatrix):
+        matrix = matrix.to_dense()
 
     # Проверка, что матрица не пустая
     if not matrix:
         raise ValueError("Матрица не может быть пустой")
 
     # Проверка, что матрица квадратная
-    for i in range(n):
-        if len(matrix[i]) != n:
-            raise ValueError(f"Матрица должна быть квадратной. Строка {i} имеет длину {len(matrix[i])}, ожидалось {n}")
+    n = _checked_square(matrix)
+
+    implementation = _engine_operation(engine, "determinant", n * n)
+    if implementation is not None:
+        return implementation(matrix)
+
+    return _determinant(matrix, col)
+
+
+def _determinant(matrix: list[list], col: int = 0) -> float:
+    # Ядро без проверок: матрица уже проверена вызывающей функцией
+    n = len(matrix)
+    _count("determinant_calls")
 
     # Базовые случаи
     if n == 1:
@@ -90,104 +1170,166 @@ def determinant_optimized(matrix: list[list], col: int = 0) -> float:
     if n == 2:
         return matrix[0][0] * matrix[1][1] - matrix[0][1] * matrix[1][0]
 
-    # Ищем столбец с максимальным количеством нулей для оптимизации
-    max_zeros = -1
-    best_col = col
-    for j in range(n):
-        zeros_count = sum(1 for i in range(n) if matrix[i][j] == 0)
-        if zeros_count > max_zeros:
-            max_zeros = zeros_count
-            best_col = j
+    # Быстрый путь для маленьких разреженных матриц: разложение по столбцу
+    # с максимальным количеством нулей
+    if n <= _COFACTOR_MAX_SIZE:
+        max_zeros = -1
+        best_col = col
+        for j in range(n):
+            zeros_count = sum(1 for i in range(n) if matrix[i][j] == 0)
+            if zeros_count > max_zeros:
+                max_zeros = zeros_count
+                best_col = j
 
-    # Разложение по лучшему столбцу
-    det = 0
-    for i in range(n):
-        if matrix[i][best_col] == 0:
-            continue  # Пропускаем нулевые элементы
+        if max_zeros == n:
+            return 0
+        if max_zeros >= n - 2:
+            _annotate("algorithm", "cofactor")
+            return _determinant_cofactor(matrix, best_col)
 
-        # Создаем минорную матрицу
-        minor = []
-        for k in range(n):
-            if k != i:  # Пропускаем i-ю строку
-                row = []
-                for l in range(n):
-                    if l != best_col:  # Пропускаем best_col-й столбец
-                        row.append(matrix[k][l])
-                minor.append(row)
+    # Целочисленная матрица: точный результат без ошибок округления
+    if n <= _BAREISS_MAX_SIZE and _is_integral(matrix):
+        _annotate("algorithm", "bareiss")
+        det = _determinant_bareiss(matrix)
+        if any(isinstance(x, float) for row in matrix for x in row):
+            return float(det)
+        return det
 
-        # Вычисляем алгебраическое дополнение
-        sign = 1 if (i + best_col) % 2 == 0 else -1
-        det += sign * matrix[i][best_col] * determinant_optimized(minor)
-
-    return det
+    _annotate("algorithm", "lu")
+    return _determinant_lu(matrix)
 
 
-def inverse(matrix: list[list]) -> list[list]:
-    # Проверка, что матрица не пустая
-    if not matrix:
-        raise ValueError("Матрица не может быть пустой")
+# Относительный порог, ниже которого ведущий элемент считается нулевым
+_PIVOT_EPS = 1e-12
 
-    n = len(matrix)
 
-    # Проверка, что матрица квадратная
-    for i in range(n):
-        if len(matrix[i]) != n:
-            raise ValueError(f"Матрица должна быть квадратной. Строка {i} имеет длину {len(matrix[i])}, ожидалось {n}")
+# До этого размера обратная матрица строится по присоединенной
+_ADJUGATE_MAX_SIZE = 3
 
-    # Вычисляем определитель
-    det = determinant_optimized(matrix)
 
-    # Проверка на вырожденность
-    if abs(det) < 1e-10:  # Маленькое значение для учета погрешности вычислений
-        raise ValueError("Матрица вырожденная (определитель = 0), обратной матрицы не существует")
+def _inverse_adjugate(matrix: list[list]) -> list[list]:
+    n = len(matrix)
 
     # Случай матрицы 1x1
     if n == 1:
+        if abs(matrix[0][0]) < 1e-10:
+            raise ValueError("Матрица вырожденная (определитель = 0), обратной матрицы не существует")
         return [[1 / matrix[0][0]]]
 
-    # Создаем матрицу алгебраических дополнений
-    cofactor_matrix = []
+    # Матрица алгебраических дополнений (миноры не больше 2x2 считаются по формуле)
+    cofactors = []
     for i in range(n):
         cofactor_row = []
         for j in range(n):
-            # Создаем минорную матрицу (исключаем i-ю строку и j-й столбец)
-            minor = []
-            for k in range(n):
-                if k != i:
-                    row = []
-                    for l in range(n):
-                        if l != j:
-                            row.append(matrix[k][l])
-                    minor.append(row)
-
-            # Вычисляем минор и алгебраическое дополнение
-            minor_det = determinant_optimized(minor)
+            minor = [[matrix[k][l] for l in range(n) if l != j] for k in range(n) if k != i]
             sign = 1 if (i + j) % 2 == 0 else -1
-            cofactor = sign * minor_det
-            cofactor_row.append(cofactor)
-        cofactor_matrix.append(cofactor_row)
-
-    # Транспонируем матрицу алгебраических дополнений (получаем присоединенную матрицу)
-    adjugate = []
-    for j in range(n):
-        adjugate_row = []
-        for i in range(n):
-            adjugate_row.append(cofactor_matrix[i][j])
-        adjugate.append(adjugate_row)
+            cofactor_row.append(sign * _determinant(minor))
+        cofactors.append(cofactor_row)
 
-    # Делим каждый элемент присоединенной матрицы на определитель
-    inverse_matrix = []
-    for i in range(n):
-        inverse_row = []
-        for j in range(n):
-            inverse_row.append(adjugate[i][j] / det)
-        inverse_matrix.append(inverse_row)
+    # Определитель - разложение по первой строке
+    det = sum(matrix[0][j] * cofactors[0][j] for j in range(n))
+    if abs(det) < 1e-10:
+        raise ValueError("Матрица вырожденная (определитель = 0), обратной матрицы не существует")
 
-    return inverse_matrix
+    # Транспонируем дополнения (присоединенная матрица) и делим на определитель
+    return [[cofactors[i][j] / det for i in range(n)] for j in range(n)]
 
 
-def solve_system_gaussian(coefficients: list[list], constants: list) -> list:
-    n = len(coefficients)
+@_traced
+@_accepts_matrix
+def inverse(matrix: list[list], engine: str | None = None) -> list[list]:
+    # Обратная к разреженной матрице в общем случае плотная
+    if isinstance(matrix, SparseMatrix):
+        matrix = matrix.to_dense()
+
+    # Проверка, что матрица не пустая
+    if not matrix:
+        raise ValueError("Матрица не может быть пустой")
+
+    # Проверка, что матрица квадратная
+    n = _checked_square(matrix)
+
+    implementation = _engine_operation(engine, "inverse", n * n)
+    if implementation is not None:
+        return implementation(matrix)
+
+    return _inverse(matrix)
+
+
+def _inverse(matrix: list[list]) -> list[list]:
+    n = len(matrix)
+
+    # Для матриц до 3x3 явная формула через алгебраические дополнения
+    # дешевле исключения и точнее для целочисленных входных данных
+    if n <= _ADJUGATE_MAX_SIZE:
+        _annotate("algorithm", "adjugate")
+        return _inverse_adjugate(matrix)
+    _annotate("algorithm", "gauss_jordan")
+
+    # Копия матрицы сразу становится результатом: метод Гаусса-Жордана
+    # обращает ее на месте, без расширенной матрицы и отдельного определителя
+    result = [[float(x) for x in row] for row in matrix]
+    scale = max(abs(x) for row in result for x in row)
+    tolerance = _PIVOT_EPS * scale
+    swaps = []
+    progress = _progress.get()
+
+    for k in range(n):
+        if progress is not None:
+            progress("elimination", k, n)
+        # Частичный выбор ведущего элемента
+        pivot_index = k
+        max_value = abs(result[k][k])
+        for i in range(k + 1, n):
+            value = abs(result[i][k])
+            if value > max_value:
+                max_value = value
+                pivot_index = i
+
+        # Вырожденность определяется по ведущему элементу
+        if max_value == 0 or max_value <= tolerance:
+            raise ValueError("Матрица вырожденная (определитель = 0), обратной матрицы не существует")
+
+        if pivot_index != k:
+            result[k], result[pivot_index] = result[pivot_index], result[k]
+            _count("pivot_swaps")
+        swaps.append(pivot_index)
+
+        # Нормализация ведущей строки (на месте ведущего элемента остается 1 / pivot)
+        pivot_row = result[k]
+        pivot = pivot_row[k]
+        pivot_row[k] = 1.0
+        pivot_row = [x / pivot for x in pivot_row]
+        result[k] = pivot_row
+
+        # Исключение столбца k из остальных строк
+        for i in range(n):
+            if i == k:
+                continue
+            row = result[i]
+            factor = row[k]
+            if factor != 0:
+                row[k] = 0.0
+                result[i] = [x - factor * y for x, y in zip(row, pivot_row)]
+
+    if progress is not None:
+        progress("elimination", n, n)
+    # Перестановки строк исходной матрицы соответствуют перестановкам столбцов обратной
+    for k in range(n - 1, -1, -1):
+        j = swaps[k]
+        if j != k:
+            for row in result:
+                row[k], row[j] = row[j], row[k]
+
+    return result
+
+
+@_traced
+@_accepts_matrix
+def solve_system_gaussian(coefficients: list[list], constants: list, engine: str | None = None) -> list:
+    # constants - вектор или матрица n x k (по столбцу на каждую правую часть);
+    # во втором случае результат - матрица решений n x k
+    n = _dims(coefficients)[0]
 
     # Проверка корректности входных данных
     if n == 0:
@@ -196,16 +1338,73 @@ def solve_system_gaussian(coefficients: list[list], constants: list) -> list:
     if len(constants) != n:
         raise ValueError("Размер вектора констант не совпадает с размером системы")
 
-    for i in range(n):
-        if len(coefficients[i]) != n:
-            raise ValueError("Матрица коэффициентов должна быть квадратной")
+    if _checked_shape(coefficients, "Матрица коэффициентов должна быть квадратной")[1] != n:
+        raise ValueError("Матрица коэффициентов должна быть квадратной")
+
+    multiple = _has_multiple_constants(constants)
+    if multiple:
+        _checked_constants(constants)
+
+    if isinstance(coefficients, SparseMatrix):
+        _annotate("algorithm", "sparse")
+        return _solve_each(_sparse_solve, coefficients, constants) if multiple else _sparse_solve(coefficients, constants)
+
+    implementation = _engine_operation(engine, "solve_system_gaussian", n * n)
+    if implementation is not None:
+        return implementation(coefficients, constants)
+
+    sparse = _detect_sparse(coefficients)
+    if sparse is not None:
+        _annotate("algorithm", "sparse")
+        return _solve_each(_sparse_solve, sparse, constants) if multiple else _sparse_solve(sparse, constants)
+
+    if multiple:
+        _annotate("algorithm", "lu")
+        return _solve_multiple(coefficients, constants)
+    _annotate("algorithm", "gaussian")
+    return _solve_gaussian(coefficients, constants)
+
+
+def _has_multiple_constants(constants) -> bool:
+    # Несколько правых частей передаются матрицей n x k
+    return isinstance(constants, Matrix) or (len(constants) > 0 and isinstance(constants[0], (list, tuple)))
+
+
+def _checked_constants(constants) -> int:
+    if _is_empty(constants):
+        raise ValueError("Матрица констант не может быть пустой")
+    return _checked_shape(constants, "Все строки матрицы констант должны иметь одинаковую длину")[1]
+
+
+def _solve_each(kernel, coefficients, constants: list[list]) -> list[list]:
+    # Каждая правая часть решается отдельно, столбцы решений собираются в матрицу
+    solutions = [kernel(coefficients, list(column)) for column in zip(*constants)]
+    return [list(row) for row in zip(*solutions)]
+
+
+def _solve_multiple(coefficients: list[list], constants: list[list]) -> list[list]:
+    # Одно разложение на все правые части: O(n^3 + k * n^2) вместо O(k * n^3)
+    try:
+        factorization = _lu_factor(coefficients)
+    except ValueError:
+        # Вырожденная матрица: тип ошибки (нет решений / бесконечно много)
+        # определяет метод Гаусса
+        return _solve_each(_solve_gaussian, coefficients, constants)
+    return factorization._solve_multiple(constants)
+
+
+def _solve_gaussian(coefficients: list[list], constants: list) -> list:
+    n = len(coefficients)
 
     # Создаем расширенную матрицу
-    augmented = [coefficients[i] + [constants[i]] for i in range(n)]
+    augmented = [list(coefficients[i]) + [constants[i]] for i in range(n)]
+    progress = _progress.get()
 
     # Прямой ход метода Гаусса
     rank = 0
     for col in range(n):
+        if progress is not None:
+            progress("elimination", col, n)
         # Поиск ненулевого элемента в текущем столбце
         pivot_row = -1
         for row in range(rank, n):
@@ -220,6 +1419,7 @@ def solve_system_gaussian(coefficients: list[list], constants: list) -> list:
         # Перестановка строк (ставим ведущую строку на позицию rank)
         if pivot_row != rank:
             augmented[rank], augmented[pivot_row] = augmented[pivot_row], augmented[rank]
+            _count("pivot_swaps")
 
         # Нормализация ведущей строки
         pivot_value = augmented[rank][col]
@@ -234,6 +1434,8 @@ def solve_system_gaussian(coefficients: list[list], constants: list) -> list:
 
         rank += 1
 
+    if progress is not None:
+        progress("elimination", n, n)
     # Проверка на совместность системы
     for row in range(rank, n):
         # Если в строке все коэффициенты нулевые, но свободный член не нулевой
@@ -268,27 +1470,444 @@ def solve_system_gaussian(coefficients: list[list], constants: list) -> list:
     return solution
 
 
-def transpose(matrix: list[list]) -> list[list]:
-    if not matrix:
+class LUFactorization:
+    # LU-разложение с частичным выбором ведущего элемента (PA = LU).
+    # L без единичной диагонали и U хранятся в одной плотной матрице;
+    # каждая следующая система с той же матрицей решается за O(n^2)
+    __slots__ = ("lu", "perm")
+
+    def __init__(self, lu: Matrix, perm: list[int]):
+        self.lu = lu
+        self.perm = perm
+
+    @property
+    def n(self) -> int:
+        return self.lu.rows
+
+    def solve(self, constants):
+        if len(constants) != self.n:
+            raise ValueError("Размер вектора констант не совпадает с размером системы")
+        if not _has_multiple_constants(constants):
+            return self._solve_vector(constants)
+        _checked_constants(constants)
+        result = self._solve_multiple(constants)
+        return Matrix.from_list(result) if isinstance(constants, Matrix) else result
+
+    def _solve_vector(self, constants) -> list:
+        n = self.n
+        lu = self.lu
+        # Прямой ход (L с единичной диагональю), затем обратный (U)
+        y = [float(constants[p]) for p in self.perm]
+        for i in range(1, n):
+            y[i] -= _dot(lu.row(i)[:i], y[:i])
+        for i in range(n - 1, -1, -1):
+            row = lu.row(i)
+            y[i] = (y[i] - _dot(row[i + 1:], y[i + 1:])) / row[i]
+        return y
+
+    def _solve_multiple(self, constants: list[list]) -> list[list]:
+        solutions = [self._solve_vector(column) for column in zip(*constants)]
+        return [list(row) for row in zip(*solutions)]
+
+    def __repr__(self) -> str:
+        return f"LUFactorization({self.n}x{self.n})"
+
+
+@_traced
+def lu_factorize(coefficients: list[list]) -> LUFactorization:
+    if isinstance(coefficients, SparseMatrix):
+        coefficients = coefficients.to_dense()
+
+    if _is_empty(coefficients):
         raise ValueError("Матрица не может быть пустой")
-    rows = len(matrix)
-    cols = len(matrix[0])
-    for i in range(rows):
-        if len(matrix[i]) != cols:
-            raise ValueError("Все строки должны иметь одинаковую длину")
-    return [[matrix[j][i] for j in range(rows)] for i in range(cols)]
+    _checked_square(coefficients)
+    return _lu_factor(coefficients)
+
+
+def _lu_factor(matrix: list[list]) -> LUFactorization:
+    mat = [list(map(float, row)) for row in matrix]
+    n = len(mat)
+    perm = list(range(n))
+    scale = max(abs(x) for row in mat for x in row)
+    tolerance = _PIVOT_EPS * scale
+    progress = _progress.get()
+
+    for k in range(n):
+        if progress is not None:
+            progress("elimination", k, n)
+        # Частичный выбор ведущего элемента
+        pivot_index = k
+        max_value = abs(mat[k][k])
+        for i in range(k + 1, n):
+            value = abs(mat[i][k])
+            if value > max_value:
+                max_value = value
+                pivot_index = i
+
+        if max_value == 0 or max_value <= tolerance:
+            raise ValueError("Матрица коэффициентов вырожденная, LU-разложение невозможно")
+
+        if pivot_index != k:
+            mat[k], mat[pivot_index] = mat[pivot_index], mat[k]
+            perm[k], perm[pivot_index] = perm[pivot_index], perm[k]
+            _count("pivot_swaps")
+
+        # Множители исключения сохраняются на месте обнуленных элементов (столбец L)
+        pivot_row = mat[k]
+        pivot = pivot_row[k]
+        tail = pivot_row[k + 1:]
+        for i in range(k + 1, n):
+            row = mat[i]
+            factor = row[k] / pivot
+            row[k] = factor
+            if factor != 0:
+                row[k + 1:] = [x - factor * y for x, y in zip(row[k + 1:], tail)]
+
+    if progress is not None:
+        progress("elimination", n, n)
+    return LUFactorization(Matrix.from_list(mat), perm)
+
+
+# Итерационные методы решения СЛАУ для больших систем с диагональным
+# преобладанием (Якоби, Гаусс-Зейдель), симметричных положительно
+# определенных (сопряженные градиенты) и произвольных (GMRES)
+ITERATIVE_METHODS = ("jacobi", "gauss_seidel", "cg", "gmres")
+PRECONDITIONERS = ("jacobi", "ilu0")
+ITERATIVE_MAX_ITER = 1000
+GMRES_RESTART = 30
+
+
+class _LinearOperator:
+    # Общий доступ к плотной и разреженной матрице для итерационных методов
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.sparse = isinstance(matrix, SparseMatrix)
+        self.n = _dims(matrix)[0]
+
+    def matvec(self, x: list) -> list:
+        if self.sparse:
+            return _sparse_matvec(self.matrix, x)
+        return [_dot(row, x) for row in self.matrix]
+
+    def row_dot(self, i: int, x: list) -> float:
+        if self.sparse:
+            a = self.matrix
+            start, end = a.indptr[i], a.indptr[i + 1]
+            return _dot(a.data[start:end], [x[j] for j in a.indices[start:end]])
+        return _dot(self.matrix[i], x)
+
+    def residual(self, b: list, x: list) -> list:
+        return list(map(sub, b, self.matvec(x)))
+
+    def row_maps(self) -> list[dict]:
+        # Ненулевые элементы строк: {столбец: значение}
+        if self.sparse:
+            return [dict(self.matrix.row_items(i)) for i in range(self.n)]
+        return [{j: value for j, value in enumerate(row) if value != 0} for row in self.matrix]
+
+    def diagonal(self, method: str) -> list:
+        if self.sparse:
+            diagonal = [dict(self.matrix.row_items(i)).get(i, 0.0) for i in range(self.n)]
+        else:
+            diagonal = [self.matrix[i][i] for i in range(self.n)]
+        if any(value == 0 for value in diagonal):
+            raise ValueError(f"Нулевой элемент на диагонали: метод {method} неприменим")
+        return [float(value) for value in diagonal]
+
+
+def _norm(x: list) -> float:
+    return sqrt(_dot(x, x))
+
+
+def _jacobi_preconditioner(operator: _LinearOperator):
+    inverse_diagonal = [1.0 / value for value in operator.diagonal("jacobi")]
+    return lambda r: list(map(mul, r, inverse_diagonal))
+
+
+def _ilu0_preconditioner(operator: _LinearOperator):
+    # Неполное LU-разложение без заполнения: L и U сохраняют портрет матрицы
+    rows = operator.row_maps()
+    n = operator.n
+    lower = []
+    upper = []
+    diagonal = []
+    for i in range(n):
+        row = rows[i]
+        for k in sorted(j for j in row if j < i):
+            factor = row[k] / diagonal[k]
+            row[k] = factor
+            for j, value in upper[k]:
+                if j in row:
+                    row[j] -= factor * value
+        pivot = row.get(i, 0.0)
+        if pivot == 0:
+            raise ValueError("Нулевой ведущий элемент: предобусловливатель ilu0 неприменим")
+        diagonal.append(pivot)
+        lower.append(sorted((j, value) for j, value in row.items() if j < i))
+        upper.append(sorted((j, value) for j, value in row.items() if j > i))
+
+    def apply(r: list) -> list:
+        # Прямой ход с L (единичная диагональ), обратный с U
+        y = list(r)
+        for i in range(n):
+            for j, value in lower[i]:
+                y[i] -= value * y[j]
+        for i in range(n - 1, -1, -1):
+            for j, value in upper[i]:
+                y[i] -= value * y[j]
+            y[i] /= diagonal[i]
+        return y
+
+    return apply
+
+
+def _jacobi_iterations(operator, b, x, tol, max_iter, b_norm, precondition):
+    diagonal = operator.diagonal("jacobi")
+    r = operator.residual(b, x)
+    history = [_norm(r) / b_norm]
+    while history[-1] > tol and len(history) <= max_iter and isfinite(history[-1]):
+        x = [xi + ri / d for xi, ri, d in zip(x, r, diagonal)]
+        r = operator.residual(b, x)
+        history.append(_norm(r) / b_norm)
+    return x, history
+
+
+def _gauss_seidel_iterations(operator, b, x, tol, max_iter, b_norm, precondition):
+    diagonal = operator.diagonal("gauss_seidel")
+    history = [_norm(operator.residual(b, x)) / b_norm]
+    while history[-1] > tol and len(history) <= max_iter and isfinite(history[-1]):
+        # Обновленные компоненты сразу используются в следующих строках
+        for i in range(operator.n):
+            x[i] += (b[i] - operator.row_dot(i, x)) / diagonal[i]
+        history.append(_norm(operator.residual(b, x)) / b_norm)
+    return x, history
+
+
+def _cg_iterations(operator, b, x, tol, max_iter, b_norm, precondition):
+    r = operator.residual(b, x)
+    z = precondition(r)
+    p = list(z)
+    rz = _dot(r, z)
+    history = [_norm(r) / b_norm]
+    while history[-1] > tol and len(history) <= max_iter and isfinite(history[-1]):
+        ap = operator.matvec(p)
+        curvature = _dot(p, ap)
+        if curvature <= 0:
+            # Матрица не положительно определенная: метод не применим
+            break
+        alpha = rz / curvature
+        x = [xi + alpha * pi for xi, pi in zip(x, p)]
+        r = [ri - alpha * api for ri, api in zip(r, ap)]
+        history.append(_norm(r) / b_norm)
+        z = precondition(r)
+        rz_next = _dot(r, z)
+        beta = rz_next / rz
+        rz = rz_next
+        p = [zi + beta * pi for zi, pi in zip(z, p)]
+    return x, history
+
+
+def _gmres_iterations(operator, b, x, tol, max_iter, b_norm, precondition, restart=GMRES_RESTART):
+    # GMRES с перезапуском и правым предобусловливанием: невязка в истории -
+    # невязка исходной системы, оцененная по вращениям Гивенса
+    history = [_norm(operator.residual(b, x)) / b_norm]
+    iterations = 0
+    while history[-1] > tol and iterations < max_iter and isfinite(history[-1]):
+        r = operator.residual(b, x)
+        beta = _norm(r)
+        if beta == 0:
+            break
+        basis = [[ri / beta for ri in r]]
+        directions = []
+        columns = []
+        cosines, sines = [], []
+        g = [beta]
+
+        for j in range(min(restart, max_iter - iterations)):
+            z = precondition(basis[j])
+            directions.append(z)
+            w = operator.matvec(z)
+            # Ортогонализация Арнольди (модифицированный Грам-Шмидт)
+            h = []
+            for v in basis:
+                coefficient = _dot(w, v)
+                w = [wi - coefficient * vi for wi, vi in zip(w, v)]
+                h.append(coefficient)
+            h_next = _norm(w)
+            h.append(h_next)
+
+            for i in range(j):
+                h[i], h[i + 1] = cosines[i] * h[i] + sines[i] * h[i + 1], -sines[i] * h[i] + cosines[i] * h[i + 1]
+            radius = hypot(h[j], h[j + 1])
+            c, s = (h[j] / radius, h[j + 1] / radius) if radius else (1.0, 0.0)
+            h[j], h[j + 1] = radius, 0.0
+            g.append(-s * g[j])
+            g[j] *= c
+            cosines.append(c)
+            sines.append(s)
+            columns.append(h)
+
+            iterations += 1
+            history.append(abs(g[j + 1]) / b_norm)
+            if history[-1] <= tol or h_next == 0:
+                break
+            basis.append([wi / h_next for wi in w])
+
+        # Решение треугольной системы и поправка к приближению
+        k = len(columns)
+        y = [0.0] * k
+        for i in range(k - 1, -1, -1):
+            total = g[i] - sum(columns[l][i] * y[l] for l in range(i + 1, k))
+            y[i] = total / columns[i][i] if columns[i][i] else 0.0
+        for yi, z in zip(y, directions):
+            x = [xi + yi * zi for xi, zi in zip(x, z)]
+    return x, history
+
+
+_ITERATIVE_KERNELS = {
+    "jacobi": _jacobi_iterations,
+    "gauss_seidel": _gauss_seidel_iterations,
+    "cg": _cg_iterations,
+    "gmres": _gmres_iterations,
+}
+
+
+@_traced
+def solve_iterative(coefficients: list[list], constants: list, method: str = "cg", tol: float = 1e-10,
+                    max_iter: int | None = None, preconditioner: str | None = None, x0: list | None = None,
+                    restart: int = GMRES_RESTART) -> dict:
+    # Результат: {"solution", "iterations", "converged", "residuals"}, где residuals -
+    # относительная невязка ||b - Ax|| / ||b|| до первой и после каждой итерации
+    n = _dims(coefficients)[0]
 
+    # Проверка корректности входных данных
+    if n == 0:
+        raise ValueError("Система не может быть пустой")
+
+    if len(constants) != n:
+        raise ValueError("Размер вектора констант не совпадает с размером системы")
+
+    if _checked_shape(coefficients, "Матрица коэффициентов должна быть квадратной")[1] != n:
+        raise ValueError("Матрица коэффициентов должна быть квадратной")
+
+    if _has_multiple_constants(constants):
+        raise ValueError("Итерационные методы решают систему с одним вектором констант")
+
+    if method not in _ITERATIVE_KERNELS:
+        raise ValueError(f"Неизвестный итерационный метод: {method}")
+
+    if preconditioner == "none":
+        preconditioner = None
+    if preconditioner is not None:
+        if preconditioner not in PRECONDITIONERS:
+            raise ValueError(f"Неизвестный предобусловливатель: {preconditioner}")
+        if method not in ("cg", "gmres"):
+            raise ValueError("Предобусловливание поддерживается только методами cg и gmres")
+
+    if tol <= 0:
+        raise ValueError("Точность должна быть положительной")
+
+    if max_iter is None:
+        max_iter = ITERATIVE_MAX_ITER
+    if max_iter < 1:
+        raise ValueError("Максимальное число итераций должно быть положительным")
+
+    if x0 is not None and len(x0) != n:
+        raise ValueError("Размер начального приближения не совпадает с размером системы")
+
+    if restart < 1:
+        raise ValueError("Период перезапуска GMRES должен быть положительным")
+
+    if not isinstance(coefficients, SparseMatrix):
+        coefficients = _detect_sparse(coefficients) or coefficients
+    operator = _LinearOperator(coefficients)
+
+    if preconditioner == "jacobi":
+        precondition = _jacobi_preconditioner(operator)
+    elif preconditioner == "ilu0":
+        precondition = _ilu0_preconditioner(operator)
+    else:
+        precondition = list
+
+    b = [float(value) for value in constants]
+    x = [float(value) for value in x0] if x0 is not None else [0.0] * n
+    b_norm = _norm(b)
+    if b_norm == 0:
+        # Нулевая правая часть: невязка считается абсолютной
+        b_norm = 1.0
+
+    kernel = _ITERATIVE_KERNELS[method]
+    if method == "gmres":
+        kernel = partial(kernel, restart=restart)
+    x, history = kernel(operator, b, x, tol, max_iter, b_norm, precondition)
+    _annotate("algorithm", method if preconditioner is None else f"{method}+{preconditioner}")
+    _count("iterations", len(history) - 1)
+    return {
+        "solution": x,
+        "iterations": len(history) - 1,
+        "converged": history[-1] <= tol,
+        "residuals": history,
+    }
+
+
+@_traced
+@_accepts_matrix
+def transpose(matrix: list[list], engine: str | None = None, out=None,
+              block_bytes: int | None = None) -> list[list]:
+    if isinstance(matrix, SparseMatrix):
+        if matrix.rows == 0:
+            raise ValueError("Матрица не может быть пустой")
+        if out is None:
+            return _sparse_transpose(matrix)
+    elif not matrix:
+        raise ValueError("Матрица не может быть пустой")
+    rows, cols = _checked_shape(matrix, "Все строки должны иметь одинаковую длину")
+    if out is not None or isinstance(matrix, FileMatrix):
+        return _out_of_core_transpose(matrix, out, block_bytes)
+    implementation = _engine_operation(engine, "transpose", rows * cols)
+    if implementation is not None:
+        return implementation(matrix)
+    return _transpose(matrix)
+
+
+def _transpose(matrix: list[list]) -> list[list]:
+    if isinstance(matrix, Matrix):
+        # Столбец плотной матрицы - срез буфера с шагом cols
+        rows, cols = matrix.shape
+        data = array("d")
+        for j in range(cols):
+            data.extend(matrix.data[j::cols])
+        return Matrix(cols, rows, data)
+    return [list(column) for column in zip(*matrix)]
+
+
+@_traced
+@_accepts_matrix
+def rank(matrix: list[list], engine: str | None = None) -> int:
+    if isinstance(matrix, SparseMatrix):
+        matrix = matrix.to_dense()
 
-def rank(matrix: list[list]) -> int:
     if not matrix:
         raise ValueError("Матрица не может быть пустой")
+    rows, cols = _checked_shape(matrix, "Все строки должны иметь одинаковую длину")
 
+    implementation = _engine_operation(engine, "rank", rows * cols)
+    if implementation is not None:
+        return implementation(matrix)
+
+    return _rank(matrix)
+
+
+def _rank(matrix: list[list]) -> int:
     # Копируем матрицу в вещественных числах
-    mat = [row[:] for row in matrix]
+    mat = [list(row) for row in matrix]
     rows, cols = len(mat), len(mat[0])
     rank_val = 0
+    progress = _progress.get()
 
     for col in range(cols):
+        if progress is not None:
+            progress("elimination", col, cols)
         pivot = None
         for r in range(rank_val, rows):
             if abs(mat[r][col]) > 1e-12:
@@ -298,7 +1917,9 @@ def rank(matrix: list[list]) -> int:
         if pivot is None:
             continue
 
-        mat[rank_val], mat[pivot] = mat[pivot], mat[rank_val]
+        if pivot != rank_val:
+            mat[rank_val], mat[pivot] = mat[pivot], mat[rank_val]
+            _count("pivot_swaps")
         pivot_val = mat[rank_val][col]
         mat[rank_val] = [x / pivot_val for x in mat[rank_val]]
 
@@ -309,7 +1930,545 @@ def rank(matrix: list[list]) -> int:
 
         rank_val += 1
 
+    if progress is not None:
+        progress("elimination", cols, cols)
     return rank_val
 
 
+# Разреженные матрицы: порог доли ненулевых элементов и минимальный размер,
+# начиная с которых плотные по объявлению входные данные обрабатываются как CSR
+SPARSE_DENSITY_THRESHOLD = 0.05
+SPARSE_MIN_ELEMENTS = 2500
+
+
+def _detect_sparse(matrix) -> SparseMatrix | None:
+    # Подсчет ненулевых элементов с ранним выходом, если матрица заполнена
+    rows, cols = _dims(matrix)
+    size = rows * cols
+    if size < SPARSE_MIN_ELEMENTS:
+        return None
+    limit = SPARSE_DENSITY_THRESHOLD * size
+    if isinstance(matrix, Matrix):
+        if size - matrix.data.count(0.0) > limit:
+            return None
+    elif isinstance(matrix, FileMatrix):
+        # Файл читается блоками строк, целиком в память он не загружается
+        nonzero = 0
+        step = _block_rows(None, cols)
+        for start in range(0, rows, step):
+            block = _dense_block(matrix, start, min(rows, start + step))
+            nonzero += len(block) - block.count(0.0)
+            if nonzero > limit:
+                return None
+    else:
+        nonzero = 0
+        for row in matrix:
+            nonzero += cols - row.count(0)
+            if nonzero > limit:
+                return None
+    return SparseMatrix.from_dense(matrix)
+
+
+def _sparse_add(a, b):
+    # Сумма двух разреженных матриц разреженная; с плотной - плотная
+    if not isinstance(b, SparseMatrix):
+        a, b = b, a
+    if not isinstance(a, SparseMatrix):
+        result = [list(row) for row in a]
+        for i, row in enumerate(result):
+            for j, value in b.row_items(i):
+                row[j] += value
+        return result
+
+    row_maps = []
+    for i in range(a.rows):
+        row = dict(a.row_items(i))
+        for j, value in b.row_items(i):
+            row[j] = row.get(j, 0.0) + value
+        row_maps.append(row)
+    return SparseMatrix._from_row_maps(a.rows, a.cols, row_maps)
+
+
+def _sparse_multiply(a, b):
+    if isinstance(a, SparseMatrix) and isinstance(b, SparseMatrix):
+        # Алгоритм Густавсона (SpGEMM): строка результата накапливается
+        # как линейная комбинация строк B
+        b_rows = [b.row_items(k) for k in range(b.rows)]
+        if _tracer.get() is not None:
+            _annotate("algorithm", "sparse")
+            _count("flops", 2 * sum(len(b_rows[k]) for k in a.indices))
+        row_maps = []
+        for i in range(a.rows):
+            acc = {}
+            for k, value in a.row_items(i):
+                for j, other in b_rows[k]:
+                    acc[j] = acc.get(j, 0.0) + value * other
+            row_maps.append(acc)
+        return SparseMatrix._from_row_maps(a.rows, b.cols, row_maps)
+
+    if isinstance(a, SparseMatrix):
+        # Разреженная на плотную: каждая ненулевая a[i][k] добавляет строку B
+        cols = _dims(b)[1]
+        result = []
+        for i in range(a.rows):
+            row = [0.0] * cols
+            for k, value in a.row_items(i):
+                row = [x + value * y for x, y in zip(row, b[k])]
+            result.append(row)
+        return result
+
+    # Плотная на разреженную
+    b_rows = [b.row_items(k) for k in range(b.rows)]
+    result = []
+    for dense_row in a:
+        row = [0.0] * b.cols
+        for k, value in enumerate(dense_row):
+            if value != 0:
+                for j, other in b_rows[k]:
+                    row[j] += value * other
+        result.append(row)
+    return result
+
+
+def _sparse_matvec(a: SparseMatrix, x) -> list:
+    # SpMV: y = A * x
+    indptr, indices, data = a.indptr, a.indices, a.data
+    return [
+        _dot(data[indptr[i]:indptr[i + 1]], [x[j] for j in indices[indptr[i]:indptr[i + 1]]])
+        for i in range(a.rows)
+    ]
+
+
+def _sparse_transpose(matrix: SparseMatrix) -> SparseMatrix:
+    # Сортировка подсчетом по номерам столбцов (CSR -> CSR транспонированной)
+    counts = [0] * (matrix.cols + 1)
+    for j in matrix.indices:
+        counts[j + 1] += 1
+    for j in range(matrix.cols):
+        counts[j + 1] += counts[j]
+
+    indptr = array("q", counts)
+    position = counts[:-1]
+    indices = array("q", bytes(8 * matrix.nnz))
+    data = array("d", bytes(8 * matrix.nnz))
+    for i in range(matrix.rows):
+        for j, value in matrix.row_items(i):
+            target = position[j]
+            indices[target] = i
+            data[target] = value
+            position[j] = target + 1
+    return SparseMatrix(matrix.cols, matrix.rows, indptr, indices, data)
+
+
+def _sparse_solve(coefficients: SparseMatrix, constants: list) -> list:
+    # Разреженный метод Гаусса: строки хранятся словарями, ведущий элемент
+    # выбирается пороговым частичным выбором (не меньше 0.1 от максимума
+    # в столбце), среди подходящих - строка с наименьшим числом ненулевых
+    # элементов, чтобы ограничить заполнение
+    n = coefficients.rows
+    rows = [dict(coefficients.row_items(i)) for i in range(n)]
+    rhs = [float(x) for x in constants]
+    column_rows = [set() for _ in range(n)]
+    for i, row in enumerate(rows):
+        for j in row:
+            column_rows[j].add(i)
+
+    scale = max((abs(x) for x in coefficients.data), default=0.0)
+    tolerance = _PIVOT_EPS * scale
+    active = set(range(n))
+    pivots = []
+    fill_in = 0
+
+    for col in range(n):
+        candidates = [i for i in column_rows[col] if i in active]
+        largest = max((abs(rows[i][col]) for i in candidates), default=0.0)
+        if largest == 0 or largest <= tolerance:
+            # Вырожденная система: тип ошибки определяет плотный алгоритм
+            return _solve_gaussian(coefficients.to_dense(), constants)
+
+        pivot = min(
+            (i for i in candidates if abs(rows[i][col]) >= 0.1 * largest),
+            key=lambda i: len(rows[i]),
+        )
+        active.discard(pivot)
+        pivots.append(pivot)
+        pivot_row = rows[pivot]
+        pivot_value = pivot_row[col]
+
+        for i in candidates:
+            if i == pivot:
+                continue
+            row = rows[i]
+            factor = row.pop(col) / pivot_value
+            column_rows[col].discard(i)
+            for j, value in pivot_row.items():
+                if j == col:
+                    continue
+                if j not in row:
+                    column_rows[j].add(i)
+                    row[j] = -factor * value
+                    fill_in += 1
+                else:
+                    row[j] -= factor * value
+            rhs[i] -= factor * rhs[pivot]
+
+    _count("fill_in", fill_in)
+
+    # Обратный ход в порядке, обратном выбору ведущих строк
+    solution = [0.0] * n
+    for col in range(n - 1, -1, -1):
+        row = rows[pivots[col]]
+        total = rhs[pivots[col]]
+        for j, value in row.items():
+            if j != col:
+                total -= value * solution[j]
+        solution[col] = total / row[col]
+    return solution
+
+
+# Вычисления вне памяти: операнды читаются, а результат пишется по блокам,
+# поэтому в памяти одновременно находятся только буферы блоков общим объемом
+# не больше block_bytes (плюс временные объекты ядра умножения)
+def _block_rows(block_bytes: int | None, width: int) -> int:
+    # Сколько строк по width чисел float64 помещается в блок
+    if block_bytes is None:
+        block_bytes = OUT_OF_CORE_BLOCK_BYTES
+    if block_bytes <= 0:
+        raise ValueError("Размер блока должен быть положительным")
+    return max(1, block_bytes // (8 * width))
+
+
+def _dense_block(matrix, start: int, stop: int, col_start: int = 0, col_stop: int | None = None) -> array:
+    # Подматрица (строки start..stop, столбцы col_start..col_stop) как плоский буфер float64
+    cols = _dims(matrix)[1]
+    if col_stop is None:
+        col_stop = cols
+    data = array("d")
+    if isinstance(matrix, SparseMatrix):
+        width = col_stop - col_start
+        data.frombytes(bytes(8 * (stop - start) * width))
+        indices, values = matrix.indices, matrix.data
+        for i in range(start, stop):
+            base = (i - start) * width - col_start
+            for k in range(matrix.indptr[i], matrix.indptr[i + 1]):
+                if col_start <= indices[k] < col_stop:
+                    data[base + indices[k]] = values[k]
+        return data
+    if isinstance(matrix, (Matrix, FileMatrix)) and col_start == 0 and col_stop == cols:
+        data.frombytes(matrix._view[start * cols:stop * cols].cast("B"))
+        return data
+    for i in range(start, stop):
+        part = matrix[i][col_start:col_stop]
+        if isinstance(part, memoryview):
+            data.frombytes(part.cast("B"))
+        else:
+            data.extend(part)
+    return data
+
+
+def _output_file(out, rows: int, cols: int, *inputs) -> FileMatrix:
+    # Файл результата: открытый FileMatrix, путь или None (временный файл .npy).
+    # Временный файл принадлежит вызывающему: после close() его удаляют по result.path
+    if isinstance(out, FileMatrix):
+        if out.shape != (rows, cols):
+            raise ValueError(f"Размерность выходного файла {out.rows}x{out.cols} не совпадает "
+                             f"с размерностью результата {rows}x{cols}")
+        if not out.writable:
+            raise ValueError("Выходной файл открыт только для чтения")
+        path = out.path
+    elif out is None:
+        descriptor, path = tempfile.mkstemp(suffix=".npy", dir=OUT_OF_CORE_DIR)
+        os.close(descriptor)
+    else:
+        path = os.fspath(out)
+    # Результат, записанный поверх операнда, испортил бы еще не прочитанные блоки
+    for matrix in inputs:
+        if (isinstance(matrix, FileMatrix) and os.path.exists(path)
+                and os.path.samefile(path, matrix.path)):
+            raise ValueError("Выходной файл не может совпадать с входным")
+    return out if isinstance(out, FileMatrix) else FileMatrix.create(path, rows, cols)
+
+
+@contextmanager
+def _writing(result: FileMatrix, out):
+    # Прерванное вычисление закрывает открытый здесь файл и удаляет временный
+    try:
+        yield result
+    except BaseException:
+        if result is not out:
+            result.close()
+        if out is None:
+            os.remove(result.path)
+        raise
+    result.flush()
+
+
+def _out_of_core_add(a, b, out, block_bytes: int | None) -> FileMatrix:
+    _annotate("algorithm", "out_of_core")
+    rows, cols = _dims(a)
+    # В памяти блоки обоих операндов и суммы
+    step = _block_rows(block_bytes, 3 * cols)
+    result = _output_file(out, rows, cols, a, b)
+    with _writing(result, out):
+        for start in range(0, rows, step):
+            stop = min(rows, start + step)
+            _count("blocks")
+            result.block(start, stop)[:] = array("d", map(add, _dense_block(a, start, stop),
+                                                           _dense_block(b, start, stop)))
+    return result
+
+
+def _out_of_core_transpose(matrix, out, block_bytes: int | None) -> FileMatrix:
+    _annotate("algorithm", "out_of_core")
+    rows, cols = _dims(matrix)
+    step = _block_rows(block_bytes, cols)
+    result = _output_file(out, cols, rows, matrix)
+    view = result._view
+    with _writing(result, out):
+        for start in range(0, rows, step):
+            stop = min(rows, start + step)
+            _count("blocks")
+            data = _dense_block(matrix, start, stop)
+            # Столбец j блока становится участком строки j результата
+            for j in range(cols):
+                view[j * rows + start:j * rows + stop] = data[j::cols]
+    return result
+
+
+def _out_of_core_multiply(a, b, out, block_bytes: int | None, engine) -> FileMatrix:
+    _annotate("algorithm", "out_of_core")
+    rows_a, inner = _dims(a)
+    cols_b = _dims(b)[1]
+    # Блок строк A, блок столбцов B и блок результата делят объем поровну.
+    # Блок столбцов B собирается проходом по всем строкам B, поэтому он читается
+    # один раз, а строки A (непрерывные участки файла) - на каждый блок столбцов
+    width = min(cols_b, _block_rows(block_bytes, 3 * inner))
+    step = min(rows_a, _block_rows(block_bytes, 3 * inner), _block_rows(block_bytes, 3 * width))
+    result = _output_file(out, rows_a, cols_b, a, b)
+    view = result._view
+    implementation = _engine_operation(engine, "matrix_multiply", step * inner)
+    kernel = implementation or _multiply_kernel
+    progress = _progress.get()
+    total = rows_a * (-(-cols_b // width))
+    done = 0
+    # Блоки считаются без слушателя: прогресс - по блокам всего произведения
+    with _writing(result, out), progress_listener(None):
+        for col_start in range(0, cols_b, width):
+            col_stop = min(cols_b, col_start + width)
+            columns = Matrix(inner, col_stop - col_start, _dense_block(b, 0, inner, col_start, col_stop))
+            for start in range(0, rows_a, step):
+                stop = min(rows_a, start + step)
+                _count("blocks")
+                product = kernel(Matrix(stop - start, inner, _dense_block(a, start, stop)), columns)
+                for i, row in enumerate(product, start):
+                    view[i * cols_b + col_start:i * cols_b + col_stop] = array("d", row)
+                done += stop - start
+                if progress is not None:
+                    progress("rows", done, total)
+    return result
+
+
+# Движок на NumPy/BLAS. Функции получают уже проверенные данные
+# и возвращают вложенные списки, как и встроенная реализация
+def _to_numpy(matrix) -> "np.ndarray":
+    # Буфер Matrix используется без копирования
+    if isinstance(matrix, Matrix):
+        return np.frombuffer(matrix.data, dtype=float).reshape(matrix.rows, matrix.cols)
+    return np.asarray(matrix, dtype=float)
+
+
+def _numpy_matrix_add(a: list[list], b: list[list]) -> list[list]:
+    return (_to_numpy(a) + _to_numpy(b)).tolist()
+
+
+def _numpy_matrix_multiply(a: list[list], b: list[list]) -> list[list]:
+    return (_to_numpy(a) @ _to_numpy(b)).tolist()
+
+
+def _numpy_determinant(matrix: list[list]) -> float:
+    n = len(matrix)
+    # Целочисленные матрицы считаются точно, как и во встроенном движке
+    if n <= _BAREISS_MAX_SIZE and _is_integral(matrix):
+        return _determinant(matrix)
+    return float(np.linalg.det(_to_numpy(matrix)))
+
+
+def _numpy_inverse(matrix: list[list]) -> list[list]:
+    if len(matrix) <= _ADJUGATE_MAX_SIZE:
+        return _inverse_adjugate(matrix)
+
+    a = _to_numpy(matrix)
+    try:
+        result = np.linalg.inv(a)
+    except np.linalg.LinAlgError:
+        result = None
+
+    # Вырожденность оценивается по числу обусловленности (в норме 1),
+    # порог совпадает с порогом ведущего элемента встроенного движка
+    if (result is None or not np.isfinite(result).all()
+            or np.linalg.norm(a, 1) * np.linalg.norm(result, 1) * _PIVOT_EPS > 1):
+        raise ValueError("Матрица вырожденная (определитель = 0), обратной матрицы не существует")
+    return result.tolist()
+
+
+def _numpy_solve_system_gaussian(coefficients: list[list], constants: list) -> list:
+    a = _to_numpy(coefficients)
+    try:
+        solution = np.linalg.solve(a, np.asarray(constants, dtype=float))
+    except np.linalg.LinAlgError:
+        solution = None
+
+    if solution is None or not np.isfinite(solution).all():
+        # Вырожденная система: тип ошибки (нет решений / бесконечно много)
+        # определяет встроенная реализация
+        if _has_multiple_constants(constants):
+            return _solve_each(_solve_gaussian, coefficients, constants)
+        return _solve_gaussian(coefficients, constants)
+    return solution.tolist()
+
+
+def _numpy_transpose(matrix: list[list]) -> list[list]:
+    if isinstance(matrix, Matrix):
+        return _to_numpy(matrix).T.tolist()
+    return np.asarray(matrix).T.tolist()
+
+
+def _numpy_rank(matrix: list[list]) -> int:
+    return int(np.linalg.matrix_rank(_to_numpy(matrix)))
+
+
+if np is not None:
+    register_engine("numpy", {
+        "matrix_add": _numpy_matrix_add,
+        "matrix_multiply": _numpy_matrix_multiply,
+        "determinant": _numpy_determinant,
+        "inverse": _numpy_inverse,
+        "solve_system_gaussian": _numpy_solve_system_gaussian,
+        "transpose": _numpy_transpose,
+        "rank": _numpy_rank,
+    })
+
+
+# Точный движок "exact": рациональная арифметика без ошибок округления.
+# Вещественные числа переводятся в дроби по их десятичной записи (0.1 -> 1/10),
+# результаты - int и Fraction
+def _exact_number(x) -> Fraction:
+    if isinstance(x, float):
+        if not isfinite(x):
+            raise ValueError("Точный режим не поддерживает бесконечные значения и NaN")
+        return Fraction(repr(x))
+    return Fraction(x)
+
+
+def _exact_matrix(matrix: list[list]) -> list[list]:
+    return [[_exact_number(x) for x in row] for row in matrix]
+
+
+def _exact_integer_rows(matrix: list[list]) -> tuple[list[list], list[int]]:
+    # Каждая строка умножается на общий знаменатель своих элементов;
+    # возвращает целочисленную матрицу и множители строк
+    rows = []
+    scales = []
+    for row in _exact_matrix(matrix):
+        scale = lcm(*(x.denominator for x in row)) if row else 1
+        rows.append([int(x * scale) for x in row])
+        scales.append(scale)
+    return rows, scales
+
+
+def _fraction_free_jordan(mat: list[list], pivot_cols: int) -> list[int]:
+    # Целочисленный метод Гаусса-Жордана (вариант Барейса, на месте): после шага
+    # с ведущим элементом p все строки умножаются на p и делятся нацело на
+    # предыдущий ведущий элемент. Элементы остаются минорами исходной матрицы,
+    # поэтому растут полиномиально, а дроби не нужны. Ведущие элементы ищутся
+    # в первых pivot_cols столбцах; в конце ненулевые строки имеют вид
+    # d * (строка приведенной ступенчатой формы). Возвращает столбцы ведущих элементов
+    rows = len(mat)
+    pivots = []
+    prev = 1
+    r = 0
+    for col in range(pivot_cols):
+        pivot = next((i for i in range(r, rows) if mat[i][col] != 0), None)
+        if pivot is None:
+            continue
+        mat[r], mat[pivot] = mat[pivot], mat[r]
+        pivot_row = mat[r]
+        value = pivot_row[col]
+        for i in range(rows):
+            if i != r:
+                factor = mat[i][col]
+                mat[i] = [(value * x - factor * y) // prev for x, y in zip(mat[i], pivot_row)]
+        prev = value
+        pivots.append(col)
+        r += 1
+        if r == rows:
+            break
+    return pivots
+
+
+def _exact_matrix_add(a: list[list], b: list[list]) -> list[list]:
+    return [[_exact_number(x) + _exact_number(y) for x, y in zip(row_a, row_b)] for row_a, row_b in zip(a, b)]
+
+
+def _exact_matrix_multiply(a: list[list], b: list[list]) -> list[list]:
+    a = _exact_matrix(a)
+    columns = list(zip(*_exact_matrix(b)))
+    return [[sum(map(mul, row, column), Fraction(0)) for column in columns] for row in a]
+
+
+def _exact_determinant(matrix: list[list]) -> int | Fraction:
+    # Строки умножаются на общий знаменатель, определитель целочисленной
+    # матрицы считается алгоритмом Барейса без дробей
+    mat, scales = _exact_integer_rows(matrix)
+    det = Fraction(_determinant_bareiss(mat), prod(scales))
+    return det.numerator if det.denominator == 1 else det
+
+
+def _exact_inverse(matrix: list[list]) -> list[list]:
+    n = len(matrix)
+    mat, scales = _exact_integer_rows(matrix)
+    for i, row in enumerate(mat):
+        row.extend(int(i == j) for j in range(n))
+    if len(_fraction_free_jordan(mat, n)) < n:
+        raise ValueError("Матрица вырожденная (определитель = 0), обратной матрицы не существует")
+    # (DA)^-1 = A^-1 D^-1, поэтому столбец j результата умножается на множитель строки j
+    return [[Fraction(row[n + j] * scales[j], row[i]) for j in range(n)] for i, row in enumerate(mat)]
+
+
+def _exact_solve_system_gaussian(coefficients: list[list], constants: list) -> list:
+    n = len(coefficients)
+    multiple = _has_multiple_constants(constants)
+    columns = list(zip(*_exact_matrix(constants))) if multiple else [[_exact_number(x) for x in constants]]
+    # Строки коэффициентов и столбцы констант приводятся к целым отдельно: знаменатели
+    # правой части (например, 17 знаков у float) не должны попадать в коэффициенты
+    mat, scales = _exact_integer_rows(coefficients)
+    column_scales = [lcm(*(x.denominator for x in column)) for column in columns]
+    for i, row in enumerate(mat):
+        row.extend(int(column[i] * scales[i] * scale) for column, scale in zip(columns, column_scales))
+
+    rank_value = len(_fraction_free_jordan(mat, n))
+    if rank_value < n:
+        # Для каждой правой части по порядку: строка вида 0 = b, b != 0, означает
+        # несовместность, иначе решений бесконечно много
+        for col in range(n, len(mat[0])):
+            if any(mat[row][col] != 0 for row in range(rank_value, n)):
+                raise ValueError("Система несовместна: нет решений")
+            raise ValueError("Система имеет бесконечно много решений")
+
+    solution = [[Fraction(x, row[i] * scale) for x, scale in zip(row[n:], column_scales)] for i, row in enumerate(mat)]
+    return solution if multiple else [row[0] for row in solution]
+
+
+def _exact_rank(matrix: list[list]) -> int:
+    mat, _ = _exact_integer_rows(matrix)
+    return len(_fraction_free_jordan(mat, len(mat[0])))
+
 
+register_engine("exact", {
+    "matrix_add": _exact_matrix_add,
+    "matrix_multiply": _exact_matrix_multiply,
+    "determinant": _exact_determinant,
+    "inverse": _exact_inverse,
+    "solve_system_gaussian": _exact_solve_system_gaussian,
+    "rank": _exact_rank,
+})
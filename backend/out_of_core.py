@@ -0,0 +1,107 @@
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+# Добавляем родительскую директорию в путь Python
+current_dir = Path(__file__).parent
+parent_dir = current_dir.parent
+sys.path.append(str(parent_dir))
+
+from backend.matrix_core import (
+    FileMatrix,
+    matrix_add,
+    matrix_multiply,
+    transpose,
+)
+
+
+# Операции над файлами матриц: функция и количество входных файлов
+FILE_OPERATIONS = {
+    "add": (matrix_add, 2),
+    "multiply": (matrix_multiply, 2),
+    "transpose": (transpose, 1),
+}
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    # Размер в байтах: 65536, 64K, 64M, 1G
+    match = re.fullmatch(r"(\d+)\s*([KMG]?)B?", value.strip().upper())
+    if match is None:
+        raise ValueError(f"Некорректный размер: {value}")
+    return int(match.group(1)) * _SIZE_UNITS[match.group(2)]
+
+
+def parse_input(value: str) -> tuple[str, tuple[int, int] | None]:
+    # Путь к файлу и, для сырых float64 без заголовка, размерность: data.bin:1000x500
+    match = re.fullmatch(r"(.+):(\d+)x(\d+)", value)
+    if match is None:
+        return value, None
+    return match.group(1), (int(match.group(2)), int(match.group(3)))
+
+
+def open_file_matrix(path, shape: tuple[int, int] | None = None, writable: bool = False) -> FileMatrix:
+    # Ошибки файловой системы - тоже ошибки входных данных
+    try:
+        return FileMatrix(path, shape, writable)
+    except OSError as e:
+        raise ValueError(f"Не удалось открыть файл {path}: {e.strerror or e}") from None
+
+
+def run_file_operation(operation: str, inputs: list, output=None, shapes: list | None = None,
+                       block_bytes: int | None = None, engine: str | None = None) -> dict:
+    # Операция над файлами матриц по блокам; результат - файл output
+    # (None - временный файл .npy). Возвращает путь и размерность результата
+    if operation not in FILE_OPERATIONS:
+        raise ValueError(f"Неизвестная операция: {operation}")
+    func, count = FILE_OPERATIONS[operation]
+    if len(inputs) != count:
+        raise ValueError(f"Для операции {operation} нужно входных файлов: {count}, указано {len(inputs)}")
+    if shapes is None:
+        shapes = [None] * count
+
+    matrices = []
+    try:
+        for path, shape in zip(inputs, shapes):
+            matrices.append(open_file_matrix(path, shape))
+        try:
+            result = func(*matrices, engine=engine, out=output, block_bytes=block_bytes)
+        except OSError as e:
+            raise ValueError(f"Не удалось записать результат: {e.strerror or e}") from None
+        result.close()
+        return {"path": result.path, "rows": result.rows, "cols": result.cols}
+    finally:
+        for matrix in matrices:
+            matrix.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Операции над матрицами в файлах (.npy, application/x-matrix, сырые float64) "
+                    "без загрузки в память")
+    parser.add_argument("operation", choices=list(FILE_OPERATIONS), help="операция")
+    parser.add_argument("inputs", nargs="+",
+                        help="входные файлы; для сырых float64 с размерностью: data.bin:ROWSxCOLS")
+    parser.add_argument("-o", "--output", default=None,
+                        help="выходной файл (.npy или сырые float64); по умолчанию - временный .npy")
+    parser.add_argument("--block-bytes", type=parse_size, default=None,
+                        help="объем блоков в памяти, например 64M (по умолчанию MATRIX_BLOCK_BYTES)")
+    parser.add_argument("--engine", default=None, help="вычислительный движок для блоков умножения")
+    args = parser.parse_args(argv)
+
+    paths, shapes = zip(*map(parse_input, args.inputs))
+    try:
+        result = run_file_operation(args.operation, list(paths), args.output, list(shapes),
+                                    args.block_bytes, args.engine)
+    except ValueError as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
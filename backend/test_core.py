@@ -1,11 +1,30 @@
 import math
+import os
+import random
+import socket
+import threading
 import pytest
+from fractions import Fraction
+from functools import partial
 
 from matrix import matrix_add
 from matrix import matrix_multiply
 from matrix import determinant_optimized
 from matrix import inverse
 from matrix import solve_system_gaussian
+from matrix import transpose
+from matrix import rank
+from matrix import Matrix
+from matrix import SparseMatrix
+from matrix import FileMatrix
+from matrix import LUFactorization, lu_factorize
+from matrix import solve_iterative
+from matrix import tracing, traced_call
+from matrix import progress_listener, ComputationCancelled
+from matrix import set_parallel_workers, shutdown_parallel_pool
+from matrix import register_engine, unregister_engine, available_engines, set_default_engine, get_default_engine
+import benchmark
+from distributed import ClusterError, ENGINE_OPERATIONS, WorkerServer, configure_cluster
 class TestMatrixAdd:
     """Тесты для функции matrix_add"""
 
@@ -291,6 +310,135 @@ class TestMatrixMultiply:
         assert matrix_multiply(a, b) == expected
 
 
+class TestMatrixMultiplyKernel:
+    """Тесты ядра умножения (транспонирование B и обход по блокам)"""
+
+    @staticmethod
+    def reference(a, b):
+        return [[sum(a[i][k] * b[k][j] for k in range(len(b))) for j in range(len(b[0]))] for i in range(len(a))]
+
+    def test_tiled_rectangular(self):
+        """Тест больших прямоугольных матриц (несколько блоков столбцов)"""
+        a = [[(i * 3 + j) % 11 - 5 for j in range(130)] for i in range(70)]
+        b = [[(i + j * 7) % 13 - 6 for j in range(150)] for i in range(130)]
+        assert matrix_multiply(a, b) == self.reference(a, b)
+
+    def test_integer_result_type(self):
+        """Тест, что произведение целочисленных матриц остается целочисленным"""
+        result = matrix_multiply([[1, 2], [3, 4]], [[5, 6], [7, 8]], engine="python")
+        assert result == [[19, 22], [43, 50]]
+        assert all(isinstance(x, int) for row in result for x in row)
+
+    def test_row_and_column_vectors(self):
+        """Тест умножения строки на столбец и столбца на строку"""
+        row = [[1, 2, 3]]
+        column = [[4], [5], [6]]
+        assert matrix_multiply(row, column) == [[32]]
+        assert matrix_multiply(column, row) == [[4, 8, 12], [5, 10, 15], [6, 12, 18]]
+
+
+class TestMatrixMultiplyStrassen:
+    """Тесты умножения методом Штрассена"""
+
+    def test_integer_exact(self):
+        """Тест: на целых числах результат совпадает с классическим точно"""
+        a = [[(i * 5 + j * 3) % 17 - 8 for j in range(37)] for i in range(37)]
+        b = [[(i * 2 + j * 7) % 19 - 9 for j in range(37)] for i in range(37)]
+        assert matrix_multiply(a, b, method="strassen", strassen_cutoff=4) == matrix_multiply(a, b)
+
+    def test_rectangular_padding(self):
+        """Тест прямоугольных матриц, дополняемых нулями"""
+        a = [[i - j for j in range(13)] for i in range(21)]
+        b = [[i * j % 5 for j in range(9)] for i in range(13)]
+        result = matrix_multiply(a, b, method="strassen", strassen_cutoff=2)
+        assert result == matrix_multiply(a, b)
+        assert len(result) == 21 and len(result[0]) == 9
+
+    def test_float_error_bound(self):
+        """Тест погрешности на вещественных числах.
+
+        Для метода Штрассена известна нормовая оценка
+        |C - C'| <= c * n^log2(12) * u * max|A| * max|B|, где u - машинная точность.
+        Проверяем ее с константой c = 1.
+        """
+        n = 48
+        a = [[math.sin(i * n + j) for j in range(n)] for i in range(n)]
+        b = [[math.cos(i - j * n) for j in range(n)] for i in range(n)]
+        classical = matrix_multiply(a, b)
+        strassen = matrix_multiply(a, b, method="strassen", strassen_cutoff=3)
+
+        bound = n ** math.log2(12) * 2.0 ** -52
+        error = max(abs(x - y) for r1, r2 in zip(classical, strassen) for x, y in zip(r1, r2))
+        assert error <= bound
+
+    def test_small_matrices_use_classical(self):
+        """Тест матриц меньше порога"""
+        a = [[1, 2], [3, 4]]
+        b = [[5, 6], [7, 8]]
+        assert matrix_multiply(a, b, method="strassen") == [[19, 22], [43, 50]]
+
+    def test_unknown_method(self):
+        """Тест ошибки при неизвестном методе"""
+        with pytest.raises(ValueError, match="Неизвестный метод умножения"):
+            matrix_multiply([[1]], [[1]], method="winograd")
+
+    def test_invalid_cutoff(self):
+        """Тест ошибки при неположительном пороге"""
+        with pytest.raises(ValueError, match="Порог метода Штрассена"):
+            matrix_multiply([[1]], [[1]], method="strassen", strassen_cutoff=0)
+
+
+class TestMatrixMultiplyParallel:
+    """Тесты параллельного умножения в разделяемой памяти"""
+
+    @pytest.fixture(autouse=True)
+    def pool(self):
+        set_parallel_workers(2)
+        yield
+        shutdown_parallel_pool()
+
+    def test_matches_classical(self):
+        """Тест: результат совпадает с однопроцессным ядром"""
+        a = [[(i * 5 + j * 3) % 17 - 8.5 for j in range(23)] for i in range(41)]
+        b = [[(i * 2 + j * 7) % 19 - 9 for j in range(70)] for i in range(23)]
+        result = matrix_multiply(a, b, method="parallel", engine="python")
+        assert isinstance(result, list)
+        assert result == matrix_multiply(a, b, engine="python")
+
+    def test_matrix_result(self):
+        """Тест: для Matrix на входе результат - Matrix"""
+        a = Matrix.from_list([[1, 2], [3, 4], [5, 6]])
+        result = matrix_multiply(a, [[1, 0], [0, 1]], method="parallel", engine="python")
+        assert isinstance(result, Matrix)
+        assert result == [[1, 2], [3, 4], [5, 6]]
+
+    def test_repeated_calls(self):
+        """Тест: последовательные умножения не влияют друг на друга"""
+        a = [[1, 2], [3, 4], [5, 6], [7, 8]]
+        assert matrix_multiply(a, [[1, 0], [0, 1]], method="parallel", engine="python") == a
+        assert matrix_multiply(a, [[0, 1], [1, 0]], method="parallel", engine="python") == \
+            [[2, 1], [4, 3], [6, 5], [8, 7]]
+
+    def test_integer_result(self):
+        """Тест: для целых матриц результат целый, как у классического умножения"""
+        a = [[1, 2], [3, 4], [5, 6]]
+        result = matrix_multiply(a, [[1, 0], [0, 1]], method="parallel", engine="python")
+        assert result == a
+        assert all(type(x) is int for row in result for x in row)
+
+    def test_large_integers_exact(self):
+        """Тест: целые, произведение которых не точно в float, умножаются точно"""
+        a = [[2 ** 40 + 1, 3], [5, 2 ** 40 - 1]]
+        b = [[2 ** 20 + 1, 1], [7, 2 ** 30]]
+        assert matrix_multiply(a, b, method="parallel", engine="python") == \
+            matrix_multiply(a, b, engine="python")
+
+    def test_invalid_workers(self):
+        """Тест: количество процессов должно быть положительным"""
+        with pytest.raises(ValueError, match="Количество процессов"):
+            set_parallel_workers(0)
+
+
 class TestMatrixMultiplyErrors:
     """Тесты на обработку ошибок"""
 
@@ -572,6 +720,63 @@ class TestDeterminantEdgeCases:
         assert determinant_optimized(matrix) == -1
 
 
+class TestDeterminantLU:
+    """Тесты LU-разложения и алгоритма Барейса для больших матриц"""
+
+    def test_integer_matrix_exact(self):
+        """Тест точного определителя целочисленной матрицы 12x12"""
+        n = 12
+        # A = L * U, где L - нижняя унитреугольная, U - верхняя треугольная
+        lower = [[1 if i == j else (i + 2 * j) % 5 if j < i else 0 for j in range(n)] for i in range(n)]
+        upper = [[(i % 3) + 2 if i == j else (i * j) % 7 if j > i else 0 for j in range(n)] for i in range(n)]
+        matrix = matrix_multiply(lower, upper)
+
+        expected = 1
+        for i in range(n):
+            expected *= upper[i][i]
+
+        assert determinant_optimized(matrix) == expected
+
+    def test_float_matrix_matches_cofactor(self):
+        """Тест совпадения LU-разложения с разложением по столбцу"""
+        matrix = [[1.0 / (i + j + 1) + (2.0 if i == j else 0.0) for j in range(7)] for i in range(7)]
+        expected = _cofactor_reference(matrix)
+        result = determinant_optimized(matrix)
+        assert math.isclose(result, expected, rel_tol=1e-10)
+
+    def test_singular_large_matrix(self):
+        """Тест вырожденной матрицы 10x10 с вещественными числами"""
+        matrix = [[(i + 1) * (j + 0.5) for j in range(10)] for i in range(10)]
+        assert abs(determinant_optimized(matrix)) < 1e-6
+
+    def test_permutation_sign(self):
+        """Тест знака определителя при перестановке строк"""
+        n = 9
+        matrix = [[1.5 if j == (i + 1) % n else 0.0 for j in range(n)] for i in range(n)]
+        # Циклическая перестановка длины 9 четная
+        assert math.isclose(determinant_optimized(matrix), 1.5 ** n)
+
+    def test_large_matrix_is_fast(self):
+        """Тест, что определитель матрицы 150x150 считается за полиномиальное время"""
+        n = 150
+        matrix = [[((i * 7 + j * 13) % 17) / 1000 + (1.0 if i == j else 0.0) for j in range(n)] for i in range(n)]
+        result = determinant_optimized(matrix)
+        assert math.isfinite(result)
+        assert result != 0
+
+
+def _cofactor_reference(matrix):
+    """Эталонное разложение по первой строке"""
+    n = len(matrix)
+    if n == 1:
+        return matrix[0][0]
+    total = 0
+    for j in range(n):
+        minor = [row[:j] + row[j + 1:] for row in matrix[1:]]
+        total += (-1) ** j * matrix[0][j] * _cofactor_reference(minor)
+    return total
+
+
 def test_recursive_calls():
     """Тест рекурсивных вызовов (проверка оптимизации по столбцам)"""
     # Матрица, где первый столбец имеет меньше нулей, чем второй
@@ -765,6 +970,49 @@ class TestInverseLargeMatrices:
                     assert math.isclose(result[i][j], 0.0, abs_tol=1e-8)
 
 
+class TestInverseGaussJordan:
+    """Тесты обращения методом Гаусса-Жордана"""
+
+    def test_zero_diagonal_needs_pivoting(self):
+        """Тест матрицы с нулями на диагонали"""
+        matrix = [
+            [0, 1, 0, 0],
+            [0, 0, 1, 0],
+            [0, 0, 0, 1],
+            [2, 0, 0, 0]
+        ]
+        expected = [
+            [0, 0, 0, 0.5],
+            [1, 0, 0, 0],
+            [0, 1, 0, 0],
+            [0, 0, 1, 0]
+        ]
+        assert inverse(matrix) == expected
+
+    def test_singular_large_matrix(self):
+        """Тест вырожденной матрицы 6x6"""
+        matrix = [[i + j for j in range(6)] for i in range(6)]
+        with pytest.raises(ValueError, match="Матрица вырожденная"):
+            inverse(matrix)
+
+    def test_input_not_modified(self):
+        """Тест, что исходная матрица не изменяется"""
+        matrix = [[4.0, 1.0, 0.0, 2.0], [1.0, 3.0, 1.0, 0.0], [0.0, 1.0, 5.0, 1.0], [2.0, 0.0, 1.0, 6.0]]
+        original = [row[:] for row in matrix]
+        inverse(matrix)
+        assert matrix == original
+
+    def test_large_matrix(self):
+        """Тест матрицы 60x60: A * A^(-1) = I"""
+        n = 60
+        matrix = [[((i * 31 + j * 17) % 23) / 23 + (4.0 if i == j else 0.0) for j in range(n)] for i in range(n)]
+        result = matrix_multiply(matrix, inverse(matrix))
+
+        for i in range(n):
+            for j in range(n):
+                assert math.isclose(result[i][j], 1.0 if i == j else 0.0, abs_tol=1e-9)
+
+
 class TestInverseProperties:
     """Тесты математических свойств обратной матрицы"""
 
@@ -1142,3 +1390,1017 @@ def test_gaussian_elimination_steps():
 
     for i in range(2):
         assert math.isclose(result[i], expected[i], abs_tol=1e-10)
+
+
+class TestGaussianMultipleConstants:
+    """Тесты решения с несколькими правыми частями и повторным использованием разложения"""
+
+    def test_matches_single_solves(self):
+        """Матрица правых частей дает те же решения, что и отдельные вызовы"""
+        coefficients = [[4, -2, 1, 0], [3, 6, -4, 2], [2, 1, 8, -1], [1, 0, 2, 5]]
+        constants = [[1, 0, 2], [2, 1, -1], [3, 0, 0], [4, -1, 5]]
+        result = solve_system_gaussian(coefficients, constants)
+
+        assert len(result) == 4 and all(len(row) == 3 for row in result)
+        for k in range(3):
+            single = solve_system_gaussian(coefficients, [row[k] for row in constants])
+            for i in range(4):
+                assert math.isclose(result[i][k], single[i], abs_tol=1e-10)
+
+    def test_matrix_input(self):
+        """Для Matrix результат тоже Matrix"""
+        coefficients = Matrix.from_list([[2, 1], [1, 3]])
+        constants = Matrix.from_list([[5, 3], [10, 4]])
+        result = solve_system_gaussian(coefficients, constants)
+
+        assert isinstance(result, Matrix)
+        expected = [[1.0, 1.0], [3.0, 1.0]]
+        for i in range(2):
+            for j in range(2):
+                assert math.isclose(result[i][j], expected[i][j], abs_tol=1e-10)
+
+    def test_sparse_coefficients(self):
+        """Разреженная матрица коэффициентов с несколькими правыми частями"""
+        coefficients = SparseMatrix.from_dense([[2, 0, 0], [0, 4, 0], [1, 0, 1]])
+        result = solve_system_gaussian(coefficients, [[2, 4], [4, 8], [2, 3]])
+        assert result == [[1.0, 2.0], [1.0, 2.0], [1.0, 1.0]]
+
+    def test_singular_errors(self):
+        """Для вырожденной матрицы сохраняются прежние сообщения об ошибках"""
+        with pytest.raises(ValueError, match="Система несовместна: нет решений"):
+            solve_system_gaussian([[1, 2], [2, 4]], [[3, 1], [7, 2]])
+        with pytest.raises(ValueError, match="Система имеет бесконечно много решений"):
+            solve_system_gaussian([[1, 2], [2, 4]], [[3, 1], [6, 2]])
+
+    def test_shape_errors(self):
+        """Размеры матрицы правых частей проверяются"""
+        with pytest.raises(ValueError, match="Размер вектора констант не совпадает с размером системы"):
+            solve_system_gaussian([[1, 0], [0, 1]], [[1, 2]])
+        with pytest.raises(ValueError, match="Все строки матрицы констант должны иметь одинаковую длину"):
+            solve_system_gaussian([[1, 0], [0, 1]], [[1, 2], [3]])
+        with pytest.raises(ValueError, match="Матрица констант не может быть пустой"):
+            solve_system_gaussian([[1, 0], [0, 1]], [[], []])
+
+    def test_factorization_reuse(self):
+        """Одно разложение решает несколько систем"""
+        coefficients = _tridiagonal(30)
+        factorization = lu_factorize(coefficients)
+        assert isinstance(factorization, LUFactorization)
+        assert factorization.n == 30
+
+        for seed in range(3):
+            constants = [float((i * 7 + seed) % 5) for i in range(30)]
+            expected = solve_system_gaussian(coefficients, constants)
+            result = factorization.solve(constants)
+            for i in range(30):
+                assert math.isclose(result[i], expected[i], abs_tol=1e-9)
+
+    def test_factorization_pivoting(self):
+        """Разложение с перестановками строк"""
+        factorization = lu_factorize([[0, 0, 1], [0, 1, 0], [1, 0, 0]])
+        assert factorization.solve([3, 2, 1]) == [1.0, 2.0, 3.0]
+        assert factorization.solve([[3], [2], [1]]) == [[1.0], [2.0], [3.0]]
+
+    def test_factorization_errors(self):
+        """Разложение вырожденной, пустой и неквадратной матриц"""
+        with pytest.raises(ValueError, match="LU-разложение невозможно"):
+            lu_factorize([[1, 2], [2, 4]])
+        with pytest.raises(ValueError, match="Матрица не может быть пустой"):
+            lu_factorize([])
+        with pytest.raises(ValueError, match="Матрица должна быть квадратной"):
+            lu_factorize([[1, 2, 3], [4, 5, 6]])
+        with pytest.raises(ValueError, match="Размер вектора констант не совпадает с размером системы"):
+            lu_factorize([[1, 0], [0, 1]]).solve([1, 2, 3])
+
+
+class TestIterativeSolvers:
+    """Тесты итерационных методов решения СЛАУ"""
+
+    @pytest.mark.parametrize("method", ["jacobi", "gauss_seidel", "cg", "gmres"])
+    def test_matches_gaussian(self, method):
+        """Решение совпадает с методом Гаусса"""
+        coefficients = _tridiagonal(40)
+        constants = [float(i % 7) for i in range(40)]
+        expected = solve_system_gaussian(coefficients, constants)
+        result = solve_iterative(coefficients, constants, method=method)
+
+        assert result["converged"]
+        assert result["iterations"] == len(result["residuals"]) - 1
+        assert result["residuals"][-1] <= 1e-10
+        for i in range(40):
+            assert math.isclose(result["solution"][i], expected[i], abs_tol=1e-8)
+
+    @pytest.mark.parametrize("method", ["cg", "gmres"])
+    @pytest.mark.parametrize("preconditioner", ["jacobi", "ilu0"])
+    def test_preconditioners(self, method, preconditioner):
+        """Предобусловливание не меняет решение и не увеличивает число итераций"""
+        coefficients = _tridiagonal(40)
+        constants = [1.0] * 40
+        plain = solve_iterative(coefficients, constants, method=method)
+        result = solve_iterative(coefficients, constants, method=method, preconditioner=preconditioner)
+
+        assert result["converged"]
+        assert result["iterations"] <= plain["iterations"]
+        for i in range(40):
+            assert math.isclose(result["solution"][i], plain["solution"][i], abs_tol=1e-8)
+
+    def test_ilu0_exact_for_tridiagonal(self):
+        """Для трехдиагональной матрицы ILU(0) совпадает с полным LU"""
+        result = solve_iterative(_tridiagonal(30), [1.0] * 30, method="gmres", preconditioner="ilu0")
+        assert result["iterations"] == 1
+
+    @pytest.mark.parametrize("method", ["jacobi", "gauss_seidel", "cg", "gmres"])
+    def test_sparse_and_matrix_input(self, method):
+        """Разреженная матрица и Matrix дают то же решение, что и списки"""
+        coefficients = _tridiagonal(30)
+        constants = [float(i) for i in range(30)]
+        expected = solve_iterative(coefficients, constants, method=method)["solution"]
+        for matrix in (SparseMatrix.from_dense(coefficients), Matrix.from_list(coefficients)):
+            result = solve_iterative(matrix, constants, method=method)
+            for i in range(30):
+                assert math.isclose(result["solution"][i], expected[i], abs_tol=1e-9)
+
+    def test_gmres_nonsymmetric(self):
+        """GMRES решает несимметричную систему"""
+        coefficients = [[4, 1, 0, 2], [-1, 5, 1, 0], [0, 2, 6, -1], [1, 0, -2, 7]]
+        constants = [1, 2, 3, 4]
+        expected = solve_system_gaussian(coefficients, constants)
+        result = solve_iterative(coefficients, constants, method="gmres", restart=2, tol=1e-12)
+
+        assert result["converged"]
+        for i in range(4):
+            assert math.isclose(result["solution"][i], expected[i], abs_tol=1e-9)
+
+    def test_not_converged(self):
+        """Без сходимости за max_iter возвращается текущее приближение"""
+        result = solve_iterative(_tridiagonal(50), [1.0] * 50, method="jacobi", max_iter=3)
+        assert not result["converged"]
+        assert result["iterations"] == 3
+        assert result["residuals"][-1] < result["residuals"][0]
+
+    def test_initial_guess_and_zero_constants(self):
+        """Точное начальное приближение и нулевая правая часть"""
+        coefficients = [[2, 0], [0, 4]]
+        result = solve_iterative(coefficients, [2, 4], method="cg", x0=[1, 1])
+        assert result["iterations"] == 0 and result["solution"] == [1.0, 1.0]
+
+        result = solve_iterative(coefficients, [0, 0], method="gauss_seidel")
+        assert result["converged"] and result["solution"] == [0.0, 0.0]
+
+    def test_errors(self):
+        """Ошибки входных данных"""
+        with pytest.raises(ValueError, match="Неизвестный итерационный метод: sor"):
+            solve_iterative([[1]], [1], method="sor")
+        with pytest.raises(ValueError, match="Неизвестный предобусловливатель: ssor"):
+            solve_iterative([[1]], [1], preconditioner="ssor")
+        with pytest.raises(ValueError, match="только методами cg и gmres"):
+            solve_iterative([[1]], [1], method="jacobi", preconditioner="ilu0")
+        with pytest.raises(ValueError, match="Нулевой элемент на диагонали: метод jacobi неприменим"):
+            solve_iterative([[0, 1], [1, 0]], [1, 1], method="jacobi")
+        with pytest.raises(ValueError, match="ilu0 неприменим"):
+            solve_iterative([[0, 1], [1, 0]], [1, 1], method="gmres", preconditioner="ilu0")
+        with pytest.raises(ValueError, match="одним вектором констант"):
+            solve_iterative([[1, 0], [0, 1]], [[1], [2]])
+        with pytest.raises(ValueError, match="Размер вектора констант не совпадает с размером системы"):
+            solve_iterative([[1, 0], [0, 1]], [1])
+        with pytest.raises(ValueError, match="Система не может быть пустой"):
+            solve_iterative([], [])
+        with pytest.raises(ValueError, match="Точность должна быть положительной"):
+            solve_iterative([[1]], [1], tol=0)
+        with pytest.raises(ValueError, match="Максимальное число итераций"):
+            solve_iterative([[1]], [1], max_iter=0)
+
+
+class TestTracing:
+    """Тесты трассировки вычислений"""
+
+    def test_disabled_by_default(self):
+        """Без tracing() вызовы работают как обычно"""
+        assert matrix_multiply([[1, 2]], [[3], [4]]) == [[11]]
+
+    def test_multiply_flops(self):
+        """Спан вызова с размерностями и количеством операций умножения"""
+        with tracing() as tracer:
+            matrix_multiply([[1, 2, 3], [4, 5, 6]], [[1, 0], [0, 1], [1, 1]], engine="python")
+        report = tracer.report()
+        assert len(report["spans"]) == 1
+        span = report["spans"][0]
+        assert span["name"] == "matrix_multiply"
+        assert span["attributes"]["shapes"] == [[2, 3], [3, 2]]
+        assert span["attributes"]["engine"] == "python"
+        assert span["counters"]["flops"] == 2 * 2 * 3 * 2
+        assert span["duration"] >= 0
+
+    def test_pivot_swaps(self):
+        """Перестановки строк в методе Гаусса"""
+        with tracing() as tracer:
+            solve_system_gaussian([[0, 1], [1, 0]], [1, 2], engine="python")
+        assert tracer.report()["counters"] == {"pivot_swaps": 1}
+
+    def test_determinant_recursion(self):
+        """Рекурсивные вызовы разложения по столбцу"""
+        with tracing() as tracer:
+            determinant_optimized([[0, 1, 2], [1, 0, 3], [4, 5, 6.5]], engine="python")
+        span = tracer.report()["spans"][0]
+        assert span["attributes"]["algorithm"] == "cofactor"
+        assert span["counters"]["determinant_calls"] == 3
+
+    def test_traced_call_keeps_error(self):
+        """Ошибка входных данных возвращается вместе с отчетом"""
+        result, report = traced_call(inverse, [[1, 2], [2, 4]], engine="python")
+        assert isinstance(result, ValueError)
+        assert "вырожденная" in report["spans"][0]["attributes"]["error"]
+
+    def test_iterations(self):
+        """Количество итераций итерационного метода"""
+        result, report = traced_call(solve_iterative, [[4, 1], [1, 3]], [1, 2], method="cg")
+        assert report["counters"]["iterations"] == result["iterations"]
+
+
+class TestProgress:
+    """Тесты отчетов о прогрессе вычислений"""
+
+    def test_solve_elimination_columns(self):
+        """Метод Гаусса сообщает о каждом столбце исключения и о завершении"""
+        events = []
+        with progress_listener(lambda *event: events.append(event)):
+            result = solve_system_gaussian([[2, 1, 0], [1, 3, 1], [0, 1, 4]], [3, 5, 5], engine="python")
+        assert result == pytest.approx([1, 1, 1])
+        assert events == [("elimination", col, 3) for col in range(4)]
+
+    def test_rank_elimination_columns(self):
+        """Ранг сообщает о столбцах исключения"""
+        events = []
+        with progress_listener(lambda *event: events.append(event)):
+            assert rank([[1, 2, 3], [2, 4, 6]], engine="python") == 1
+        assert events == [("elimination", col, 3) for col in range(4)]
+
+    def test_multiply_row_blocks(self):
+        """Умножение сообщает о готовых блоках строк, результат не меняется"""
+        a = [[float(i + j) for j in range(5)] for i in range(250)]
+        b = [[float(i - j) for j in range(4)] for i in range(5)]
+        events = []
+        with progress_listener(lambda *event: events.append(event)):
+            result = matrix_multiply(a, b, engine="python")
+        assert result == matrix_multiply(a, b, engine="python")
+        done = [event[1] for event in events]
+        assert done == sorted(done) and done[-1] == 250
+        assert all(event[0] == "rows" and event[2] == 250 for event in events)
+
+    @pytest.mark.parametrize("call", [
+        lambda m: inverse(m, engine="python"),
+        lambda m: determinant_optimized(m, engine="python"),
+        lu_factorize,
+    ])
+    def test_last_event_is_complete(self, call):
+        """Последнее сообщение исключения - done == total"""
+        events = []
+        with progress_listener(lambda *event: events.append(event)):
+            call([[float(i == j) + 0.1 * (i + j) for j in range(5)] for i in range(5)])
+        assert events[-1] == ("elimination", 5, 5)
+
+    @pytest.mark.parametrize("values", [
+        [[(i * 7 + j * 3) % 11 + (i == j) * 20 for j in range(9)] for i in range(9)],
+        [[float((i * 7 + j * 3) % 11) + (i == j) * 20 for j in range(9)] for i in range(9)],
+    ])
+    def test_integer_determinant(self, values):
+        """Точный определитель целой матрицы (Барейс) сообщает о столбцах исключения"""
+        events = []
+        with progress_listener(lambda *event: events.append(event)):
+            determinant_optimized(values, engine="python")
+        assert events == [("elimination", col, 9) for col in range(8)] + [("elimination", 9, 9)]
+
+    @pytest.mark.parametrize("values", [
+        [[1, 2, 3, 4, 5, 6, 7], [2, 4, 6, 8, 10, 12, 14]] + [[0] * 6 + [1]] * 5,
+        [[0.5, 2, 3, 4, 5, 6, 7], [1, 4, 6, 8, 10, 12, 14]] + [[0] * 6 + [1]] * 5,
+    ])
+    def test_singular_determinant_completes(self, values):
+        """Ранний выход при нулевом определителе тоже завершается done == total"""
+        events = []
+        with progress_listener(lambda *event: events.append(event)):
+            assert determinant_optimized(values, engine="python") == 0
+        assert events[-1] == ("elimination", 7, 7)
+
+    def test_determinant_cancels(self):
+        """Точный определитель прерывается слушателем"""
+        def cancel(stage, done, total):
+            if done >= 2:
+                raise ComputationCancelled("Вычисление отменено")
+
+        values = [[(i * 7 + j * 3) % 11 + (i == j) * 20 for j in range(9)] for i in range(9)]
+        with progress_listener(cancel), pytest.raises(ComputationCancelled):
+            determinant_optimized(values, engine="python")
+
+    def test_listener_cancels(self):
+        """Исключение из слушателя прерывает вычисление"""
+        def cancel(stage, done, total):
+            if done >= 2:
+                raise ComputationCancelled("Вычисление отменено")
+
+        with progress_listener(cancel):
+            with pytest.raises(ComputationCancelled):
+                inverse([[float(i == j) + 0.1 for j in range(6)] for i in range(6)], engine="python")
+
+    def test_listener_scope(self):
+        """Вне блока with слушатель не вызывается"""
+        events = []
+        with progress_listener(lambda *event: events.append(event)):
+            pass
+        rank([[1, 2], [3, 4]], engine="python")
+        assert events == []
+
+
+class TestMatrixType:
+    """Тесты плотной матрицы с общим буфером array('d')"""
+
+    def test_round_trip(self):
+        """Тест преобразования из вложенных списков и обратно"""
+        rows = [[1, 2, 3], [4, 5, 6]]
+        matrix = Matrix.from_list(rows)
+        assert matrix.shape == (2, 3)
+        assert len(matrix) == 2
+        assert matrix.to_list() == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+        assert matrix == rows
+
+    def test_ragged_rows(self):
+        """Тест ошибки при строках разной длины"""
+        with pytest.raises(ValueError, match="Все строки должны иметь одинаковую длину"):
+            Matrix.from_list([[1, 2], [3]])
+
+    def test_buffer_size_mismatch(self):
+        """Тест ошибки при несовпадении размера буфера"""
+        with pytest.raises(ValueError, match="Размер буфера"):
+            Matrix(2, 2, [1.0, 2.0, 3.0])
+
+    def test_row_is_zero_copy(self):
+        """Тест, что строка - представление буфера без копирования"""
+        matrix = Matrix.from_list([[1, 2], [3, 4]])
+        row = matrix[1]
+        matrix[1, 0] = 10
+        assert row[0] == 10.0
+        assert matrix[1, 0] == 10.0
+        assert matrix[-1][1] == 4.0
+
+    def test_identity(self):
+        """Тест единичной матрицы"""
+        assert Matrix.identity(3) == [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+
+    def test_compact_storage(self):
+        """Тест, что элемент занимает 8 байт"""
+        matrix = Matrix(100, 100)
+        assert matrix.data.itemsize * len(matrix.data) == 8 * 100 * 100
+
+    def test_operations_return_matrix(self):
+        """Тест, что операции принимают и возвращают Matrix"""
+        a = Matrix.from_list([[4, 1, 0, 2], [1, 3, 1, 0], [0, 1, 5, 1], [2, 0, 1, 6]])
+        b = Matrix.from_list([[1, 0, 0, 0], [0, 2, 0, 0], [0, 0, 3, 0], [0, 0, 0, 4]])
+        rows_a = a.to_list()
+        rows_b = b.to_list()
+
+        for result, expected in [
+            (matrix_add(a, b), matrix_add(rows_a, rows_b)),
+            (matrix_multiply(a, b), matrix_multiply(rows_a, rows_b)),
+            (matrix_multiply(a, b, method="strassen", strassen_cutoff=1), matrix_multiply(rows_a, rows_b)),
+            (transpose(a), transpose(rows_a)),
+            (inverse(a), inverse(rows_a)),
+        ]:
+            assert isinstance(result, Matrix)
+            assert result == expected
+
+        assert determinant_optimized(a) == determinant_optimized(rows_a)
+        assert rank(a) == rank(rows_a)
+        assert solve_system_gaussian(a, [1, 2, 3, 4]) == solve_system_gaussian(rows_a, [1, 2, 3, 4])
+
+    def test_mixed_inputs(self):
+        """Тест смешанных аргументов: Matrix и вложенный список"""
+        a = Matrix.from_list([[1, 2], [3, 4]])
+        result = matrix_multiply(a, [[1, 0], [0, 1]])
+        assert isinstance(result, Matrix)
+        assert result == [[1, 2], [3, 4]]
+
+    def test_input_not_modified(self):
+        """Тест, что операции не изменяют исходный буфер"""
+        a = Matrix.from_list([[0, 2, 1], [1, 1, 0], [3, 0, 1]])
+        original = a.to_list()
+        inverse(a)
+        rank(a)
+        solve_system_gaussian(a, [1, 2, 3])
+        determinant_optimized(a)
+        assert a == original
+
+    def test_validation_messages(self):
+        """Тест, что сообщения об ошибках не меняются"""
+        with pytest.raises(ValueError, match="Матрица должна быть квадратной"):
+            determinant_optimized(Matrix(2, 3))
+        with pytest.raises(ValueError, match="Несовместимые размерности для умножения"):
+            matrix_multiply(Matrix(2, 3), Matrix(2, 3))
+        with pytest.raises(ValueError, match="Матрицы не могут быть пустыми"):
+            matrix_add(Matrix(0, 0), Matrix(1, 1))
+
+    def test_pickle(self):
+        """Тест сериализации для передачи между процессами"""
+        import pickle
+        matrix = Matrix.from_list([[1, 2], [3, 4]])
+        restored = pickle.loads(pickle.dumps(matrix))
+        assert restored == matrix
+        assert restored[1][0] == 3.0
+
+
+def _tridiagonal(n):
+    """Трехдиагональная матрица с диагональным преобладанием"""
+    return [[4.0 if i == j else -1.0 if abs(i - j) == 1 else 0.0 for j in range(n)] for i in range(n)]
+
+
+class TestSparseMatrix:
+    """Тесты разреженных матриц (CSR)"""
+
+    def test_from_coo(self):
+        """Тест построения из троек: повторы суммируются, нули отбрасываются"""
+        matrix = SparseMatrix.from_coo(2, 3, [(0, 2, 1.5), (1, 0, 2), (0, 2, 0.5), (1, 1, 0)])
+        assert matrix.shape == (2, 3)
+        assert matrix.nnz == 2
+        assert matrix.to_dense() == [[0, 0, 2.0], [2.0, 0, 0]]
+        assert matrix.to_coo() == [(0, 2, 2.0), (1, 0, 2.0)]
+
+    def test_index_out_of_range(self):
+        """Тест ошибки при индексе вне матрицы"""
+        with pytest.raises(ValueError, match="выходит за пределы матрицы"):
+            SparseMatrix.from_coo(2, 2, [(2, 0, 1.0)])
+
+    def test_add(self):
+        """Тест сложения разреженных матриц и разреженной с плотной"""
+        a = SparseMatrix.from_coo(2, 2, [(0, 0, 1), (1, 1, 2)])
+        b = SparseMatrix.from_coo(2, 2, [(0, 0, -1), (0, 1, 3)])
+        result = matrix_add(a, b)
+        assert isinstance(result, SparseMatrix)
+        assert result.to_coo() == [(0, 1, 3.0), (1, 1, 2.0)]
+
+        assert matrix_add(a, [[1, 1], [1, 1]]) == [[2, 1], [1, 3]]
+        assert matrix_add([[1, 1], [1, 1]], a) == [[2, 1], [1, 3]]
+
+    def test_add_dimension_errors(self):
+        """Тест сообщений об ошибках при сложении"""
+        a = SparseMatrix.from_coo(2, 2, [])
+        with pytest.raises(ValueError, match="Матрицы должны иметь одинаковое количество строк"):
+            matrix_add(a, SparseMatrix.from_coo(3, 2, []))
+        with pytest.raises(ValueError, match="Матрицы должны иметь одинаковое количество столбцов"):
+            matrix_add(a, [[1, 2, 3], [4, 5, 6]])
+        with pytest.raises(ValueError, match="Матрицы не могут быть пустыми"):
+            matrix_add(SparseMatrix.from_coo(0, 0, []), a)
+
+    def test_multiply_variants(self):
+        """Тест SpGEMM и умножения разреженной матрицы на плотную"""
+        dense_a = [[1, 0, 2], [0, 0, 3], [4, 0, 0]]
+        dense_b = [[0, 1], [5, 0], [0, 2]]
+        expected = matrix_multiply(dense_a, dense_b)
+        a = SparseMatrix.from_dense(dense_a)
+        b = SparseMatrix.from_dense(dense_b)
+
+        result = matrix_multiply(a, b)
+        assert isinstance(result, SparseMatrix)
+        assert result.to_dense() == expected
+        assert matrix_multiply(a, dense_b) == expected
+        assert matrix_multiply(dense_a, b) == expected
+
+    def test_multiply_incompatible(self):
+        """Тест ошибки несовместимых размерностей"""
+        with pytest.raises(ValueError, match="Несовместимые размерности для умножения"):
+            matrix_multiply(SparseMatrix.from_coo(2, 3, []), SparseMatrix.from_coo(2, 3, []))
+
+    def test_transpose(self):
+        """Тест транспонирования"""
+        dense = [[1, 0, 2], [0, 0, 3]]
+        result = transpose(SparseMatrix.from_dense(dense))
+        assert isinstance(result, SparseMatrix)
+        assert result.to_dense() == transpose(dense)
+
+    def test_solve(self):
+        """Тест разреженного прямого решателя"""
+        n = 120
+        dense = _tridiagonal(n)
+        constants = [float(i % 7) for i in range(n)]
+        expected = solve_system_gaussian(dense, constants, engine="python")
+        result = solve_system_gaussian(SparseMatrix.from_dense(dense), constants)
+        for x, y in zip(result, expected):
+            assert math.isclose(x, y, abs_tol=1e-10)
+
+    def test_solve_needs_pivoting(self):
+        """Тест системы с нулем на диагонали"""
+        matrix = SparseMatrix.from_coo(3, 3, [(0, 1, 1), (1, 0, 1), (2, 2, 2), (1, 2, 1)])
+        result = solve_system_gaussian(matrix, [2, 4, 6])
+        assert result == [1.0, 2.0, 3.0]
+
+    def test_solve_singular_messages(self):
+        """Тест сообщений для вырожденных систем"""
+        matrix = SparseMatrix.from_coo(2, 2, [(0, 0, 1), (0, 1, 1), (1, 0, 1), (1, 1, 1)])
+        with pytest.raises(ValueError, match="Система несовместна"):
+            solve_system_gaussian(matrix, [1, 2])
+        with pytest.raises(ValueError, match="Система имеет бесконечно много решений"):
+            solve_system_gaussian(matrix, [1, 1])
+
+    def test_dense_operations_accept_sparse(self):
+        """Тест определителя, обратной матрицы и ранга для разреженного входа"""
+        matrix = SparseMatrix.from_coo(2, 2, [(0, 0, 2), (1, 1, 4)])
+        assert determinant_optimized(matrix) == 8
+        assert inverse(matrix) == [[0.5, 0], [0, 0.25]]
+        assert rank(matrix) == 2
+
+    def test_density_detection(self, monkeypatch):
+        """Тест, что почти нулевая плотная матрица обрабатывается разреженным алгоритмом"""
+        import matrix as core
+
+        calls = []
+        original = core._sparse_solve
+
+        def tracking(coefficients, constants):
+            calls.append(coefficients)
+            return original(coefficients, constants)
+
+        monkeypatch.setattr(core, "_sparse_solve", tracking)
+
+        n = 100
+        dense = _tridiagonal(n)
+        result = core.solve_system_gaussian(dense, [1.0] * n, engine="python")
+        assert len(calls) == 1 and isinstance(calls[0], SparseMatrix)
+
+        for i in range(n):
+            lhs = sum(dense[i][j] * result[j] for j in range(n))
+            assert math.isclose(lhs, 1.0, abs_tol=1e-10)
+
+        # Заполненная матрица остается на плотном пути
+        filled = [[float(i == j) + 1.0 / (1 + i + j) for j in range(60)] for i in range(60)]
+        core.solve_system_gaussian(filled, [1.0] * 60, engine="python")
+        assert len(calls) == 1
+
+    def test_dense_product_of_sparse_input(self):
+        """Тест автоматического разреженного умножения плотных матриц"""
+        n = 80
+        dense = _tridiagonal(n)
+        identity = [[float(i == j) for j in range(n)] for i in range(n)]
+        assert matrix_multiply(dense, identity, engine="python") == dense
+        assert matrix_multiply(identity, dense, engine="python") == dense
+
+
+class TestFileMatrix:
+    """Тесты вычислений с матрицами в файлах"""
+
+    A = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.5], [0.5, -1.0, 2.0]]
+    B = [[1.0, 0.0], [2.0, -1.0], [0.0, 3.0]]
+
+    @pytest.fixture
+    def write(self):
+        # Все открытые в тесте файлы закрываются после него
+        opened = []
+
+        def write(path, values):
+            with FileMatrix.create(path, len(values), len(values[0])) as matrix:
+                for i, row in enumerate(values):
+                    for j, value in enumerate(row):
+                        matrix[i, j] = value
+            opened.append(FileMatrix(path, (len(values), len(values[0]))))
+            return opened[-1]
+
+        yield write
+        for matrix in opened:
+            matrix.close()
+
+    def test_npy_roundtrip(self, tmp_path, write):
+        """Файл .npy с заголовком открывается без указания размерности"""
+        write(tmp_path / "a.npy", self.A)
+        with FileMatrix(tmp_path / "a.npy") as matrix:
+            assert matrix.shape == (4, 3)
+            assert matrix.to_list() == self.A
+            assert list(matrix[2]) == [7.0, 8.0, 9.5]
+
+    def test_raw_requires_shape(self, tmp_path, write):
+        """Сырые float64 открываются только с размерностью, совпадающей с размером файла"""
+        write(tmp_path / "a.bin", self.A)
+        with pytest.raises(ValueError, match="нужно указать размерность"):
+            FileMatrix(tmp_path / "a.bin")
+        with pytest.raises(ValueError, match="Размер файла"):
+            FileMatrix(tmp_path / "a.bin", (3, 3))
+
+    @pytest.mark.parametrize("block_bytes", [8, 64, None])
+    def test_add(self, tmp_path, write, block_bytes):
+        """Сложение по блокам совпадает со сложением в памяти"""
+        a = write(tmp_path / "a.npy", self.A)
+        with matrix_add(a, self.A, out=tmp_path / "sum.npy", block_bytes=block_bytes) as result:
+            assert isinstance(result, FileMatrix)
+            assert result.to_list() == matrix_add(self.A, self.A)
+
+    @pytest.mark.parametrize("block_bytes", [8, 64, None])
+    def test_transpose(self, tmp_path, write, block_bytes):
+        """Транспонирование по блокам строк"""
+        a = write(tmp_path / "a.npy", self.A)
+        with transpose(a, out=tmp_path / "t.bin", block_bytes=block_bytes) as result:
+            assert result.shape == (3, 4)
+            assert result.to_list() == transpose(self.A)
+
+    @pytest.mark.parametrize("block_bytes", [8, 100, None])
+    def test_multiply(self, tmp_path, write, block_bytes):
+        """Умножение блоками строк A и столбцов B"""
+        a = write(tmp_path / "a.npy", self.A)
+        b = write(tmp_path / "b.bin", self.B)
+        matrix_multiply(a, b, out=tmp_path / "c.npy", block_bytes=block_bytes).close()
+        with FileMatrix(tmp_path / "c.npy") as stored:
+            assert stored.to_list() == matrix_multiply(self.A, self.B)
+
+    def test_temporary_output(self, tmp_path, write):
+        """Без выходного файла результат пишется во временный .npy, удаляет его вызывающий"""
+        a = write(tmp_path / "a.npy", self.A)
+        result = transpose(a)
+        try:
+            assert result.path.endswith(".npy")
+            assert result.to_list() == transpose(self.A)
+        finally:
+            result.close()
+            os.remove(result.path)
+
+    def test_temporary_output_removed_on_cancel(self, tmp_path, write, monkeypatch):
+        """Прерванное вычисление не оставляет временного файла"""
+        import matrix as core
+
+        monkeypatch.setattr(core, "OUT_OF_CORE_DIR", str(tmp_path / "out"))
+        (tmp_path / "out").mkdir()
+        a = write(tmp_path / "a.npy", self.A)
+        b = write(tmp_path / "b.bin", self.B)
+
+        def cancel(stage, done, total):
+            raise ComputationCancelled("Вычисление отменено")
+
+        with progress_listener(cancel), pytest.raises(ComputationCancelled):
+            matrix_multiply(a, b, block_bytes=8)
+        assert list((tmp_path / "out").iterdir()) == []
+
+    def test_output_is_input(self, tmp_path, write):
+        """Результат нельзя записать поверх операнда"""
+        a = write(tmp_path / "a.npy", self.A)
+        with pytest.raises(ValueError, match="совпадать с входным"):
+            matrix_add(a, a, out=tmp_path / "a.npy")
+        assert a.to_list() == self.A
+
+    def test_validation(self, tmp_path, write):
+        """Проверки размерности и размера блока"""
+        a = write(tmp_path / "a.npy", self.A)
+        with pytest.raises(ValueError, match="Несовместимые размерности"):
+            matrix_multiply(a, a, out=tmp_path / "c.npy")
+        with pytest.raises(ValueError, match="Размер блока"):
+            transpose(a, out=tmp_path / "t.npy", block_bytes=0)
+
+    @pytest.mark.parametrize("diagonal_only", [False, True])
+    def test_solve_above_sparse_threshold(self, tmp_path, write, diagonal_only):
+        """СЛАУ с матрицей в файле больше порога определения разреженности"""
+        n = 60
+        a = [[4.0 if i == j else (0.0 if diagonal_only else 1.0 / (1 + i + j)) for j in range(n)]
+             for i in range(n)]
+        x = [float(i % 7) for i in range(n)]
+        b = [sum(a[i][j] * x[j] for j in range(n)) for i in range(n)]
+        coefficients = write(tmp_path / "a.npy", a)
+        assert solve_system_gaussian(coefficients, b) == pytest.approx(x)
+        assert solve_iterative(coefficients, b)["solution"] == pytest.approx(x, abs=1e-6)
+
+    def test_other_operations(self, tmp_path, write):
+        """Остальные операции читают файл как обычную плотную матрицу"""
+        square = write(tmp_path / "s.npy", [[2.0, 1.0], [1.0, 3.0]])
+        assert determinant_optimized(square) == pytest.approx(5.0)
+        assert rank(square) == 2
+
+
+class TestValidationLayer:
+    """Тесты общего слоя проверки входных данных"""
+
+    def test_internal_calls_skip_validation(self, monkeypatch):
+        """Тест, что проверка квадратности выполняется один раз на вызов"""
+        import matrix as core
+
+        calls = []
+        original = core._checked_square
+
+        def counting(matrix):
+            calls.append(len(matrix))
+            return original(matrix)
+
+        monkeypatch.setattr(core, "_checked_square", counting)
+        core.inverse([[2, 0, 1], [1, 3, 0], [0, 1, 4]])
+        core.determinant_optimized([[1, 0, 0, 2], [0, 1, 0, 0], [0, 0, 1, 0], [3, 0, 0, 1]])
+        assert calls == [3, 4]
+
+    def test_matrix_shape_without_row_scan(self, monkeypatch):
+        """Тест, что размерность Matrix берется без обхода строк"""
+        a = Matrix.from_list([[1, 2], [3, 4]])
+        monkeypatch.setattr(Matrix, "__iter__", lambda self: pytest.fail("обход строк"))
+        assert matrix_add(a, a) == [[2, 4], [6, 8]]
+
+    def test_rank_ragged_matrix(self):
+        """Тест ошибки ранга для неровной матрицы"""
+        with pytest.raises(ValueError, match="Все строки должны иметь одинаковую длину"):
+            rank([[1, 2], [3]])
+
+    def test_solve_non_square_message(self):
+        """Тест сообщения для неквадратной матрицы коэффициентов"""
+        with pytest.raises(ValueError, match="Матрица коэффициентов должна быть квадратной"):
+            solve_system_gaussian([[1, 2, 3], [4, 5, 6]], [1, 2])
+
+
+class TestEngines:
+    """Тесты реестра вычислительных движков"""
+
+    @pytest.fixture(autouse=True)
+    def remove_fake_engine(self):
+        yield
+        unregister_engine("fake")
+
+    def test_python_engine_always_available(self):
+        """Тест, что встроенный движок доступен всегда"""
+        assert "python" in available_engines()
+        assert "auto" in available_engines()
+
+    def test_unknown_engine(self):
+        """Тест ошибки при неизвестном движке"""
+        with pytest.raises(ValueError, match="Неизвестный вычислительный движок"):
+            matrix_add([[1]], [[2]], engine="fortran")
+
+        with pytest.raises(ValueError, match="Неизвестный вычислительный движок"):
+            set_default_engine("fortran")
+
+    def test_custom_engine_per_call(self):
+        """Тест выбора зарегистрированного движка для отдельного вызова"""
+        calls = []
+
+        def fake_add(a, b):
+            calls.append((a, b))
+            return [[0]]
+
+        register_engine("fake", {"matrix_add": fake_add})
+        assert matrix_add([[1]], [[2]], engine="fake") == [[0]]
+        assert calls == [([[1]], [[2]])]
+
+        # Операции, которых нет в движке, выполняются встроенной реализацией
+        assert matrix_multiply([[2]], [[3]], engine="fake") == [[6]]
+
+    def test_validation_before_dispatch(self):
+        """Тест, что проверка данных выполняется до вызова движка"""
+        register_engine("fake", {"matrix_add": lambda a, b: [[0]]})
+        with pytest.raises(ValueError, match="Матрицы должны иметь одинаковое количество строк"):
+            matrix_add([[1], [2]], [[1]], engine="fake")
+
+    def test_default_engine(self):
+        """Тест выбора движка по умолчанию"""
+        register_engine("fake", {"transpose": lambda matrix: "fake"})
+        previous = get_default_engine()
+        set_default_engine("fake")
+        try:
+            assert transpose([[1, 2]]) == "fake"
+            assert transpose([[1, 2]], engine="python") == [[1], [2]]
+        finally:
+            set_default_engine(previous)
+
+    def test_unregister_engine(self):
+        """Тест удаления движка из реестра"""
+        register_engine("fake", {"matrix_add": lambda a, b: [[0]]})
+        unregister_engine("fake")
+        assert "fake" not in available_engines()
+        with pytest.raises(ValueError, match="Неизвестный вычислительный движок"):
+            matrix_add([[1]], [[2]], engine="fake")
+
+
+class TestNumpyEngine:
+    """Тесты движка NumPy (пропускаются, если NumPy не установлен)"""
+
+    @pytest.fixture(autouse=True)
+    def require_numpy(self):
+        pytest.importorskip("numpy")
+
+    def test_operations_match_python(self):
+        """Тест совпадения результатов движков"""
+        a = [[4.0, 1.0, 0.5, 2.0], [1.0, 3.0, 1.0, 0.0], [0.0, 1.0, 5.0, 1.0], [2.0, 0.0, 1.0, 6.0]]
+        b = [[1.0, 2.0, 3.0, 4.0], [0.0, 1.0, 0.0, 1.0], [2.0, 0.0, 1.0, 0.0], [1.0, 1.0, 1.0, 1.0]]
+
+        pairs = [
+            (matrix_add(a, b), matrix_add(a, b, engine="numpy")),
+            (matrix_multiply(a, b), matrix_multiply(a, b, engine="numpy")),
+            (inverse(a), inverse(a, engine="numpy")),
+            (transpose(a), transpose(a, engine="numpy")),
+        ]
+        for expected, result in pairs:
+            for i in range(4):
+                for j in range(4):
+                    assert math.isclose(result[i][j], expected[i][j], abs_tol=1e-10)
+
+        assert math.isclose(determinant_optimized(a, engine="numpy"), determinant_optimized(a))
+        assert rank(a, engine="numpy") == rank(a)
+
+        solution = solve_system_gaussian(a, [1, 2, 3, 4], engine="numpy")
+        expected = solve_system_gaussian(a, [1, 2, 3, 4])
+        for i in range(4):
+            assert math.isclose(solution[i], expected[i], abs_tol=1e-10)
+
+    def test_same_error_messages(self):
+        """Тест одинаковых сообщений об ошибках"""
+        with pytest.raises(ValueError, match="Матрица вырожденная"):
+            inverse([[i + j for j in range(6)] for i in range(6)], engine="numpy")
+
+        with pytest.raises(ValueError, match="Система несовместна"):
+            solve_system_gaussian([[1, 1], [1, 1]], [1, 2], engine="numpy")
+
+        with pytest.raises(ValueError, match="Система имеет бесконечно много решений"):
+            solve_system_gaussian([[1, 1], [2, 2]], [1, 2], engine="numpy")
+
+    def test_integer_determinant_exact(self):
+        """Тест точного определителя целочисленной матрицы"""
+        assert determinant_optimized([[1, 2, 3], [4, 5, 6], [7, 8, 10]], engine="numpy") == -3
+
+    def test_auto_engine(self):
+        """Тест автоматического выбора движка по размеру"""
+        small = [[1, 2], [3, 4]]
+        assert matrix_multiply(small, small, engine="auto") == [[7, 10], [15, 22]]
+
+        n = 70
+        large = [[float(i == j) for j in range(n)] for i in range(n)]
+        assert matrix_multiply(large, large, engine="auto") == large
+
+
+class TestExactEngine:
+    """Тесты точного режима (движок "exact", рациональные числа)"""
+
+    def test_determinant_integer(self):
+        """Определитель целочисленной матрицы - точное целое число"""
+        result = determinant_optimized([[1, 2, 3], [4, 5, 6], [7, 8, 10]], engine="exact")
+        assert result == -3
+        assert isinstance(result, int)
+
+    def test_determinant_large_integers(self):
+        """Определитель без переполнения и потери точности для больших чисел"""
+        n = 12
+        hilbert_scaled = [[27720 // (i + j + 1) for j in range(n)] for i in range(n)]
+        expected = determinant_optimized(hilbert_scaled)
+        result = determinant_optimized(hilbert_scaled, engine="exact")
+        assert isinstance(result, int)
+        assert math.isclose(result, expected, rel_tol=1e-3)
+
+    def test_determinant_decimal_fractions(self):
+        """Десятичные дроби переводятся в рациональные числа без шума float"""
+        assert determinant_optimized([[0.1, 0.2], [0.3, 0.5]], engine="exact") == Fraction(-1, 100)
+
+    def test_inverse(self):
+        """Обратная матрица в рациональных числах"""
+        a = [[2, 1, 0], [1, 3, 1], [0, 1, 4]]
+        result = inverse(a, engine="exact")
+        identity = [[sum(Fraction(a[i][k]) * result[k][j] for k in range(3)) for j in range(3)] for i in range(3)]
+        assert identity == [[1, 0, 0], [0, 1, 0], [0, 0, 1]]
+        assert result[0][0] == Fraction(11, 18)
+
+    def test_solve(self):
+        """Точное решение СЛАУ, в том числе с несколькими правыми частями"""
+        a = [[2, 1], [1, 3]]
+        assert solve_system_gaussian(a, [1, 2], engine="exact") == [Fraction(1, 5), Fraction(3, 5)]
+        assert solve_system_gaussian(a, [[1, 0], [2, 1]], engine="exact") == \
+            [[Fraction(1, 5), Fraction(-1, 5)], [Fraction(3, 5), Fraction(2, 5)]]
+
+    def test_rank(self):
+        """Ранг без порога сравнения с нулем"""
+        assert rank([[1, 2, 3], [2, 4, 6], [1, 1, 1]], engine="exact") == 2
+        assert rank([[1, 1], [1, 1 + 1e-12]], engine="exact") == 2
+
+    def test_matrix_input_keeps_fractions(self):
+        """Для Matrix точный результат не превращается обратно в float"""
+        result = inverse(Matrix.from_list([[2, 1], [1, 3]]), engine="exact")
+        assert result == [[Fraction(3, 5), Fraction(-1, 5)], [Fraction(-1, 5), Fraction(2, 5)]]
+
+    def test_same_error_messages(self):
+        """Тест одинаковых сообщений об ошибках"""
+        with pytest.raises(ValueError, match="Матрица вырожденная"):
+            inverse([[1, 2], [2, 4]], engine="exact")
+
+        with pytest.raises(ValueError, match="Система несовместна"):
+            solve_system_gaussian([[1, 1], [1, 1]], [1, 2], engine="exact")
+
+        with pytest.raises(ValueError, match="Система имеет бесконечно много решений"):
+            solve_system_gaussian([[1, 1], [2, 2]], [1, 2], engine="exact")
+
+        with pytest.raises(ValueError, match="бесконечные значения"):
+            determinant_optimized([[math.inf]], engine="exact")
+
+
+class TestDistributedEngine:
+    """Тесты движка distributed на локальных узлах"""
+
+    @pytest.fixture(autouse=True)
+    def engine(self):
+        # Движок регистрируется в том модуле, через который вызываются операции
+        registered = "distributed" in available_engines()
+        register_engine("distributed", ENGINE_OPERATIONS)
+        yield
+        if not registered:
+            unregister_engine("distributed")
+
+    @pytest.fixture
+    def servers(self):
+        servers = [WorkerServer("127.0.0.1", 0) for _ in range(2)]
+        for server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield servers
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    @pytest.fixture
+    def cluster(self, servers):
+        cluster = configure_cluster([server.address for server in servers], block_size=4, retries=2)
+        yield cluster
+        cluster.close()
+
+    def test_multiply(self, cluster):
+        """Блоки результата собираются в исходном порядке"""
+        a = [[(i * 5 + j * 3) % 17 - 8 for j in range(11)] for i in range(9)]
+        b = [[(i * 2 + j * 7) % 19 - 9 for j in range(7)] for i in range(11)]
+        assert matrix_multiply(a, b, engine="distributed") == matrix_multiply(a, b, engine="python")
+
+    def test_solve_blocked_lu(self, cluster):
+        """Блочное LU-разложение с перестановками строк"""
+        n = 10
+        rng = random.Random(1)
+        a = [[rng.uniform(-1, 1) for _ in range(n)] for _ in range(n)]
+        x = [float(i) for i in range(n)]
+        b = [sum(a[i][j] * x[j] for j in range(n)) for i in range(n)]
+        result = solve_system_gaussian(a, b, engine="distributed")
+        assert result == pytest.approx(x, abs=1e-9)
+
+    def test_singular_system(self, cluster):
+        """Тип ошибки вырожденной системы - как у встроенной реализации"""
+        with pytest.raises(ValueError, match="бесконечно много решений"):
+            solve_system_gaussian([[1, 2], [2, 4]], [1, 2], engine="distributed")
+
+    def test_lost_worker(self, servers):
+        """Задачи недоступного узла выполняет другой узел"""
+        servers[0].shutdown()
+        servers[0].server_close()
+        addresses = [server.address for server in servers]
+        cluster = configure_cluster(addresses, block_size=2, retries=2)
+        try:
+            a = [[i + j for j in range(6)] for i in range(6)]
+            assert matrix_multiply(a, a, engine="distributed") == matrix_multiply(a, a, engine="python")
+        finally:
+            cluster.close()
+
+    def test_not_configured(self, monkeypatch):
+        """Без узлов - ошибка недоступного движка, а не входных данных"""
+        import distributed
+
+        monkeypatch.setattr(distributed, "_cluster", None)
+        monkeypatch.setattr(distributed, "CLUSTER_ADDRESSES", "")
+        with pytest.raises(ClusterError, match="Не заданы вычислительные узлы"):
+            matrix_multiply([[1, 2]], [[3], [4]], engine="distributed")
+
+    def test_no_workers(self):
+        """Все узлы недоступны"""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            address = probe.getsockname()
+        cluster = configure_cluster([address], retries=1)
+        try:
+            with pytest.raises(ClusterError, match="недоступны"):
+                matrix_multiply([[1, 2]], [[3], [4]], engine="distributed")
+        finally:
+            cluster.close()
+
+
+class TestBenchmark:
+    """Тесты бенчмарка: входные данные итерационных методов и сравнение с базовым прогоном"""
+
+    @staticmethod
+    def item(operation, seconds, peak=1000, **extra):
+        return {"operation": operation, "kind": "dense", "size": 10, "median_seconds": seconds,
+                "peak_bytes": peak, **extra}
+
+    def test_cg_input_is_spd(self):
+        """Метод сопряженных градиентов замеряется на симметричной матрице, где он сходится"""
+        # Функции берутся из модуля бенчмарка: его матрицы - типы того же модуля ядра
+        matrix = benchmark.sparse_spd_matrix(40, 40, 1)
+        dense = matrix.to_dense()
+        assert all(dense[i][j] == dense[j][i] for i in range(40) for j in range(40))
+        func, _, kinds, _ = benchmark.OPERATIONS["solve:cg"]
+        assert "sparse" not in kinds and "sparse" in benchmark.ITERATIVE_KINDS
+        result = benchmark.measure(func, matrix, [1.0] * 40, repeat=1, memory=False)
+        assert result["converged"] is True
+
+    def test_measure_records_divergence(self):
+        """Прогон без сходимости помечается"""
+        matrix = benchmark.sparse_matrix(40, 40, 1)
+        result = benchmark.measure(partial(benchmark.solve_iterative, method="cg", max_iter=2), matrix,
+                                   [1.0] * 40, repeat=1, memory=False)
+        assert result["converged"] is False
+        assert "converged" not in benchmark.measure(benchmark.transpose, [[1, 2]], repeat=1, memory=False)
+
+    def test_compare_results(self):
+        """Регрессии времени и памяти больше порога; быстрые замеры и новые операции не сравниваются"""
+        baseline = [self.item("multiply", 0.010), self.item("add", 0.010), self.item("inverse", 0.010),
+                    self.item("rank", 0.0001), self.item("solve:cg", 0.010, converged=True)]
+        current = [self.item("multiply", 0.015), self.item("add", 0.011, peak=2000),
+                   self.item("inverse", 0.011), self.item("rank", 0.0005), self.item("transpose", 1.0),
+                   self.item("solve:cg", 0.100, converged=False)]
+        regressions = benchmark.compare_results(current, baseline, threshold=0.2, min_seconds=1e-3)
+        assert [(item["key"], item["metric"]) for item in regressions] == [
+            ("multiply/dense/10", "median_seconds"), ("add/dense/10", "peak_bytes")]
+        assert regressions[0]["ratio"] == pytest.approx(1.5)
+        assert benchmark.compare_results(current, baseline, threshold=1.0) == []
@@ -6,21 +6,20 @@ class MatrixAPIClient {
     }
 
     /**
-     * Универсальная функция для отправки запросов к API
+     * Универсальная функция для отправки запросов к API.
+     * data - тело запроса (null для GET и DELETE)
      */
-    async _request(endpoint, data) {
+    async _request(endpoint, data, resultField = 'result', method = 'POST') {
         const controller = new AbortController();
         const timeoutId = setTimeout(() => controller.abort(), this.timeout);
 
         try {
-            const response = await fetch(`${this.baseURL}/${endpoint}`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(data),
-                signal: controller.signal
-            });
+            const options = { method, signal: controller.signal };
+            if (data !== null) {
+                options.headers = { 'Content-Type': 'application/json' };
+                options.body = JSON.stringify(data);
+            }
+            const response = await fetch(`${this.baseURL}/${endpoint}`, options);
 
             clearTimeout(timeoutId);
 
@@ -34,7 +33,7 @@ class MatrixAPIClient {
                 throw new Error(result.error);
             }
 
-            return result.result;
+            return result[resultField];
 
         } catch (error) {
             clearTimeout(timeoutId);
@@ -65,11 +64,13 @@ class MatrixAPIClient {
     }
 
     /**
-     * Вычисление определителя матрицы
+     * Вычисление определителя матрицы.
+     * options - необязательные параметры, например { exact: true, rational: 'pair' }:
+     * точный результат возвращается строкой 'p/q' или парой [p, q]
      */
-    async determinant(matrix) {
+    async determinant(matrix, options = {}) {
         this._validateMatrix(matrix, 'determinant');
-        return await this._request('determinant', { matrix });
+        return await this._request('determinant', { matrix, ...options });
     }
 
     /**
@@ -107,22 +108,26 @@ class MatrixAPIClient {
     }
 
     /**
-     * Нахождение обратной матрицы
+     * Нахождение обратной матрицы.
+     * options - как у determinant (точный режим)
      */
-    async inverseMatrix(matrix) {
+    async inverseMatrix(matrix, options = {}) {
         this._validateMatrix(matrix, 'inverse');
 
         if (matrix.length !== matrix[0].length) {
             throw new Error('Матрица должна быть квадратной для нахождения обратной матрицы');
         }
 
-        return await this._request('inverse', { matrix });
+        return await this._request('inverse', { matrix, ...options });
     }
 
     /**
-     * Решение системы линейных уравнений
+     * Решение системы линейных уравнений.
+     * options - необязательные параметры итерационного решения, например
+     * { method: 'cg', tol: 1e-8, max_iter: 500, preconditioner: 'ilu0' } или { exact: true };
+     * для итерационных методов результат - { solution, iterations, converged, residuals }
      */
-    async solveSystem(coefficients, constants) {
+    async solveSystem(coefficients, constants, options = {}) {
         this._validateMatrix(coefficients, 'sle');
         this._validateVector(constants, 'sle');
 
@@ -132,7 +137,139 @@ class MatrixAPIClient {
 
         return await this._request('solve', {
             coefficients,
-            constants
+            constants,
+            ...options
+        });
+    }
+
+    /**
+     * Пакетное выполнение операций одним запросом.
+     * operations - массив объектов вида { operation: 'determinant', matrix: [...] };
+     * возвращает массив { result } или { error } в том же порядке
+     */
+    async batch(operations, parallel = false) {
+        if (!Array.isArray(operations) || operations.length === 0) {
+            throw new Error('Список операций должен быть непустым массивом');
+        }
+
+        return await this._request('batch', { operations, parallel }, 'results');
+    }
+
+    /**
+     * Асинхронная задача: операция в формате элемента пакета, например
+     * { operation: 'inverse', matrix: [...] }. Возвращает состояние задачи с ее id
+     */
+    async submitJob(operation, args) {
+        return await this._request('jobs', { operation, ...args });
+    }
+
+    /**
+     * Состояние задачи: { id, status, progress, ... }; status - queued, running,
+     * done, failed или cancelled
+     */
+    async jobStatus(jobId) {
+        return await this._request(`jobs/${jobId}`, null, 'result', 'GET');
+    }
+
+    /**
+     * Результат завершенной задачи
+     */
+    async jobResult(jobId) {
+        return await this._request(`jobs/${jobId}/result`, null, 'result', 'GET');
+    }
+
+    /**
+     * Отмена незавершенной задачи или удаление завершенной
+     */
+    async cancelJob(jobId) {
+        return await this._request(`jobs/${jobId}`, null, 'result', 'DELETE');
+    }
+
+    /**
+     * Долгое вычисление без ограничения по времени: задача отправляется на сервер,
+     * ее состояние опрашивается каждые interval мс. options:
+     * { interval: 500, onProgress: (status) => {...}, signal: AbortSignal }
+     * (при отмене через signal задача отменяется и на сервере)
+     */
+    async runJob(operation, args, options = {}) {
+        const { interval = 500, onProgress = null, signal = null } = options;
+        let status = await this.submitJob(operation, args);
+
+        while (status.status === 'queued' || status.status === 'running') {
+            if (onProgress) {
+                onProgress(status);
+            }
+            await new Promise(resolve => setTimeout(resolve, interval));
+            if (signal && signal.aborted) {
+                await this.cancelJob(status.id);
+                throw new Error('Вычисление отменено');
+            }
+            status = await this.jobStatus(status.id);
+        }
+
+        if (onProgress) {
+            onProgress(status);
+        }
+        return await this.jobResult(status.id);
+    }
+
+    /**
+     * Вычисление с отчетами о прогрессе по WebSocket (/ws/compute): операция в формате
+     * submitJob. options: { onProgress: ({ stage, done, total, progress }) => {...},
+     * signal: AbortSignal } - отмена через signal прерывает вычисление на сервере
+     */
+    streamComputation(operation, args, options = {}) {
+        const { onProgress = null, signal = null } = options;
+        const url = `${this.baseURL.replace(/^http/, 'ws')}/ws/compute`;
+
+        return new Promise((resolve, reject) => {
+            const socket = new WebSocket(url);
+            let finished = false;
+
+            const finish = (callback, value) => {
+                finished = true;
+                if (signal) {
+                    signal.removeEventListener('abort', abort);
+                }
+                callback(value);
+            };
+            const abort = () => {
+                if (socket.readyState === WebSocket.OPEN) {
+                    socket.send(JSON.stringify({ type: 'cancel' }));
+                }
+            };
+
+            if (signal) {
+                if (signal.aborted) {
+                    reject(new Error('Вычисление отменено'));
+                    return;
+                }
+                signal.addEventListener('abort', abort);
+            }
+
+            socket.onopen = () => socket.send(JSON.stringify({ operation, ...args }));
+            socket.onmessage = (event) => {
+                const message = JSON.parse(event.data);
+                if (message.type === 'progress') {
+                    if (onProgress) {
+                        onProgress(message);
+                    }
+                } else if (message.type === 'result') {
+                    finish(resolve, message.result);
+                } else {
+                    finish(reject, new Error(message.error));
+                }
+            };
+            socket.onerror = () => {
+                if (!finished) {
+                    finish(reject, new Error('Не удалось подключиться к серверу. Проверьте, запущен ли бэкенд на localhost:8000'));
+                }
+            };
+            socket.onclose = () => {
+                if (!finished) {
+                    finish(reject, new Error('Соединение с сервером закрыто до получения результата'));
+                }
+            };
         });
     }
 